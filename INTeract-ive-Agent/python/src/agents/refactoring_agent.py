@@ -1,5 +1,6 @@
 
 from src.framework.core.agent import Agent
+from src.framework.orchestration.router import ModelRouter
 from src.framework.orchestration.supervisor import SupervisorAgent
 from src.framework.tools.git_tools import (
     list_branches_tool,
@@ -9,24 +10,42 @@ from src.framework.tools.git_tools import (
     diff_branches_tool
 )
 from src.framework.tools.preview_tools import create_summary_report_tool
-from src.framework.tools.supervisor_tool import create_supervisor_tool
+from src.framework.tools.supervisor_tool import create_delegate_tasks_tool, create_supervisor_tool, create_task_graph_tool
 
 from src.agents.subagents.pattern_detector import pattern_detector
 from src.agents.subagents.code_analyzer import code_analyzer
 from src.agents.subagents.diff_generator import diff_generator
 
+def create_model_router() -> ModelRouter:
+    """Small pattern/structure tasks try Haiku first; everything escalates to Sonnet."""
+    return ModelRouter([
+        {
+            "name": "small",
+            "model": "claude-3-5-haiku-20241022",
+            "max_input_chars": 40000,
+            "task_types": ["detect-patterns", "analyze-structure"]
+        },
+        {
+            "name": "large",
+            "model": "claude-3-5-sonnet-20241022",
+            "max_input_chars": None,
+            "task_types": None
+        }
+    ])
+
 def create_refactoring_orchestrator() -> SupervisorAgent:
     """Configure the Modernized Refactoring Supervisor."""
     supervisor = SupervisorAgent({
-        "max_concurrent_tasks": 3,
+        "max_concurrent_tasks": 16,
         "task_timeout_ms": 120000,
         "max_retries": 3
-    })
+    }, router=create_model_router())
 
-    # Register Worker Agents
-    supervisor.register_worker('pattern-detector', pattern_detector, ['detect-patterns'])
-    supervisor.register_worker('code-analyzer', code_analyzer, ['analyze-structure'])
-    supervisor.register_worker('diff-generator', diff_generator, ['generate-diff'])
+    # Register elastic pools of isolated worker sessions
+    supervisor.register_pool('pattern-detector', pattern_detector.config, ['detect-patterns'], {"min_size": 1, "max_size": 8, "idle_timeout": 60.0})
+    supervisor.register_pool('code-analyzer', code_analyzer.config, ['analyze-structure'], {"min_size": 1, "max_size": 4, "idle_timeout": 60.0})
+    # Diff generation writes files, so keep it to a single session
+    supervisor.register_pool('diff-generator', diff_generator.config, ['generate-diff'], {"min_size": 1, "max_size": 1, "idle_timeout": 60.0})
 
     return supervisor
 
@@ -43,7 +62,9 @@ def create_master_agent(supervisor: SupervisorAgent) -> Agent:
             get_log_tool,
             diff_branches_tool,
             create_summary_report_tool,
-            create_supervisor_tool(supervisor)
+            create_supervisor_tool(supervisor),
+            create_delegate_tasks_tool(supervisor),
+            create_task_graph_tool(supervisor)
         ],
         "system_prompt": """You are the Master Refactoring Agent. Your job is to orchestrate a team of specialized subagents to refactor code safely.
 
@@ -54,7 +75,7 @@ def create_master_agent(supervisor: SupervisorAgent) -> Agent:
 
 ## Your Workflow
 1. **Explore**: Use Git tools to understand the repository state.
-2. **Tasking**: Delegate analysis to subagents using the delegate_task tool.
+2. **Tasking**: Delegate analysis to subagents. Prefer delegate_task_graph to fan work out in one call, e.g. one "detect-patterns" task per directory feeding a single "analyze-structure" aggregation (via depends_on) and then "generate-diff". Use delegate_tasks to run several independent tasks in parallel, and delegate_task for a single follow-up task.
 3. **Review**: Combine findings and propose a plan to the user.
 4. **Execute**: Delegate change generation to the diff-generator.
 
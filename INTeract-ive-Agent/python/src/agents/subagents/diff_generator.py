@@ -1,6 +1,10 @@
 
 from src.framework.core.agent import Agent
-from src.framework.tools.preview_tools import generate_diff_preview_tool
+from src.framework.tools.preview_tools import (
+    generate_diff_preview_tool,
+    generate_batch_diff_preview_tool,
+    apply_patch_set_tool
+)
 from src.framework.tools.fs_tools import read_file_tool, write_file_tool
 
 diff_generator = Agent({
@@ -10,7 +14,9 @@ diff_generator = Agent({
     "tools": [
         read_file_tool,
         write_file_tool,
-        generate_diff_preview_tool
+        generate_diff_preview_tool,
+        generate_batch_diff_preview_tool,
+        apply_patch_set_tool
     ],
     "system_prompt": """You are an expert at generating precise code modifications and diffs.
 
@@ -29,5 +35,14 @@ For each refactoring:
 1. Read the current file content
 2. Propose the specific changes
 3. Generate a diff preview
-4. Apply the changes using write_file"""
+4. Apply the changes using write_file
+
+When a refactoring touches more than one file, use generate_batch_diff_preview
+with search/replace or line-range edits for every file in a single call instead
+of previewing files one by one. It reads the files from disk itself, so there
+is no need to send full file contents.
+
+Apply multi-file changes with apply_patch_set using the same edits plus the
+expected_sha256 of each file from the preview. It writes every file atomically
+or none at all, so prefer it over repeated write_file calls."""
 })
@@ -1,8 +1,20 @@
 
 import asyncio
-from typing import List, Dict, Any, Optional, TypedDict, Callable, Awaitable
-from anthropic import AsyncAnthropic
+import time
+from contextlib import AsyncExitStack
+from functools import partial
+from typing import List, Dict, Any, Optional, TypedDict, Callable, Awaitable, AsyncIterator
+from anthropic import APIStatusError, AsyncAnthropic
 from anthropic.types import MessageParam
+from src.framework.core.blob_store import BlobStore, READ_RESULT_PAGE, create_read_result_page_tool, shared_blob_store, spill_result
+from src.framework.core.cassette import Cassette, get_active_cassette
+from src.framework.core.client import client_registry, get_shared_client
+from src.framework.core.history import HistoryManager, estimate_tokens
+from src.framework.core.journal import SessionJournal
+from src.framework.core.tool_cache import ToolResultCache, shared_tool_cache
+from src.framework.core.tool_scheduler import ToolScheduler
+from src.framework.resilience.rate_limiter import RateLimiter, Reservation, request_priority, shared_rate_limiter
+from src.framework.resilience.retry import RetryConfig, remaining_time, with_retry
 
 # Type definitions matching the TS implementation
 class Tool(TypedDict):
@@ -10,6 +22,9 @@ class Tool(TypedDict):
     description: str
     input_schema: Dict[str, Any]
     handler: Callable[[Any], Awaitable[Any]]
+    serial: Optional[bool] # mutates state; never runs alongside other tools
+    cacheable: Optional[bool] # pure for a given input and dependency state
+    depends_on: Optional[Callable[[Any], List[str]]] # files the result depends on
 
 class AgentConfig(TypedDict):
     name: str
@@ -18,96 +33,130 @@ class AgentConfig(TypedDict):
     tools: List[Tool]
     system_prompt: str
     max_iterations: Optional[int]
+    max_parallel_tools: Optional[int]
+    prompt_caching: Optional[bool]
+    max_history_tokens: Optional[int]
+    tool_cache: Optional[ToolResultCache]
+    client: Optional[AsyncAnthropic]
+    rate_limiter: Optional[RateLimiter]
+    priority: Optional[int] # admission priority of this agent's API calls
+    cassette: Optional[Cassette] # record/replay API calls instead of the process-wide cassette
+    max_tool_result_chars: Optional[int] # larger results are spilled to the blob store (0 disables)
+    blob_store: Optional[BlobStore]
+    retry: Optional[RetryConfig] # retries of individual API calls
+    journal: Optional[SessionJournal] # checkpoint every iteration for resume()
 
 class AgentTokenUsage(TypedDict):
     input: int
     output: int
+    cache_read: int
+    cache_creation: int
 
 class AgentResult(TypedDict):
     response: str
     iterations: int
     tools_used: List[str]
     total_tokens: AgentTokenUsage
+    history_tokens_saved: List[int] # estimated tokens compacted away before each request
+    stop_reason: Optional[str] # 'tool_use' means the run stopped at max_iterations
+
+class AgentEvent(TypedDict, total=False):
+    type: str # 'text' | 'tool_call' | 'tool_result' | 'done'
+    text: str
+    id: str
+    name: str
+    input: Any
+    content: str
+    is_error: bool
+    result: AgentResult
+
+CACHE_CONTROL = {"type": "ephemeral"}
 
 class Agent:
     """Core Agent implementation."""
 
     def __init__(self, config: AgentConfig):
-        self.client = AsyncAnthropic()
         self.config = config
         self.config['max_iterations'] = config.get('max_iterations', 10)
+        self.config['max_parallel_tools'] = config.get('max_parallel_tools', 5)
+        self.config['prompt_caching'] = config.get('prompt_caching', True)
+        self.config['max_history_tokens'] = config.get('max_history_tokens', 100000)
         self.conversation_history: List[MessageParam] = []
+        self.history = HistoryManager({"max_tokens": self.config['max_history_tokens']})
+        self.tool_cache = config.get('tool_cache') or shared_tool_cache
+        self.rate_limiter = config.get('rate_limiter') or shared_rate_limiter
+        self.config['max_tool_result_chars'] = config.get('max_tool_result_chars', 20000)
+        self.blob_store = config.get('blob_store') or (
+            BlobStore(config['journal'].blob_root) if config.get('journal') else shared_blob_store
+        )
+        if self.config['max_tool_result_chars'] and not any(t['name'] == READ_RESULT_PAGE for t in config['tools']):
+            self.config['tools'] = [
+                *config['tools'],
+                create_read_result_page_tool(self.blob_store, self.config['max_tool_result_chars'])
+            ]
+
+    @property
+    def client(self) -> AsyncAnthropic:
+        # Looked up per request, so agents built at import time follow client_registry.configure()
+        return self.config.get('client') or get_shared_client()
+
+    async def run(self, user_message: str, first_response: Optional[Any] = None) -> AgentResult:
+        """Run the tool loop for ``user_message``.
 
-    async def run(self, user_message: str) -> AgentResult:
+        ``first_response`` resumes a run whose first request was answered
+        elsewhere (e.g. a Message Batch built from ``first_request``).
+        """
         tools_used: List[str] = []
-        iterations = 0
-        total_input_tokens = 0
-        total_output_tokens = 0
+        usage: AgentTokenUsage = {"input": 0, "output": 0, "cache_read": 0, "cache_creation": 0}
+        history_savings: List[int] = []
 
         self.conversation_history.append({
             "role": "user",
             "content": user_message
         })
+        self._journal("user", content=user_message)
 
-        # Prepare tools for Anthropic API
-        api_tools = [
-            {
-                "name": t['name'],
-                "description": t['description'],
-                "input_schema": t['input_schema']
-            }
-            for t in self.config['tools']
-        ]
+        response = await self._next_response(history_savings, usage, first_response)
+        return await self._run_loop(response, 0, tools_used, usage, history_savings)
 
-        response = await self.client.messages.create(
-            model=self.config['model'],
-            max_tokens=self.config['max_tokens'],
-            system=self.config['system_prompt'],
-            tools=api_tools,
-            messages=self.conversation_history
-        )
+    async def resume(self) -> AgentResult:
+        """Continue the run recorded in the configured journal.
 
-        # Accumulate tokens (approximate or extracted from usage)
-        if response.usage:
-            total_input_tokens += response.usage.input_tokens
-            total_output_tokens += response.usage.output_tokens
+        Completed API responses are never requested again: a run that
+        stopped while tools were executing re-runs only those tools, and a
+        finished run returns its recorded result.
+        """
+        state = self.config['journal'].restore() if self.config.get('journal') else None
+        if not state or not state["history"]:
+            raise ValueError("No journaled session to resume")
+
+        self.conversation_history = state["history"]
+        if state["result"] is not None:
+            return state["result"]
+
+        usage: AgentTokenUsage = state["usage"]
+        history_savings: List[int] = []
+        response = state["pending_response"]
+        if response is None:
+            response = await self._next_response(history_savings, usage)
+        return await self._run_loop(response, state["iterations"], state["tools_used"], usage, history_savings)
 
+    async def _next_response(self, history_savings: List[int], usage: AgentTokenUsage, response: Optional[Any] = None) -> Any:
+        if response is None:
+            response = await self._create_message(self._prepare_request(history_savings))
+        self._record_usage(response, usage)
+        self._journal("response", message=response, usage=usage)
+        return response
+
+    async def _run_loop(self, response: Any, iterations: int, tools_used: List[str], usage: AgentTokenUsage,
+                        history_savings: List[int]) -> AgentResult:
         while response.stop_reason == 'tool_use' and iterations < self.config['max_iterations']:
             iterations += 1
             
             # Extract tool use blocks
             tool_use_blocks = [block for block in response.content if block.type == 'tool_use']
             
-            tool_results = []
-            
-            for tool_use in tool_use_blocks:
-                tool_def = next((t for t in self.config['tools'] if t['name'] == tool_use.name), None)
-                
-                if not tool_def:
-                    tool_results.append({
-                        "type": "tool_result",
-                        "tool_use_id": tool_use.id,
-                        "content": f"Error: Unknown tool {tool_use.name}",
-                        "is_error": True
-                    })
-                    continue
-                
-                tools_used.append(tool_def['name'])
-                
-                try:
-                    result = await tool_def['handler'](tool_use.input)
-                    tool_results.append({
-                        "type": "tool_result",
-                        "tool_use_id": tool_use.id,
-                        "content": result if isinstance(result, str) else str(result)
-                    })
-                except Exception as e:
-                    tool_results.append({
-                        "type": "tool_result",
-                        "tool_use_id": tool_use.id,
-                        "content": f"Error: {str(e)}",
-                        "is_error": True
-                    })
+            tool_results = await self._execute_tools(tool_use_blocks, tools_used)
 
             self.conversation_history.append({
                 "role": "assistant",
@@ -118,18 +167,9 @@ class Agent:
                 "role": "user",
                 "content": tool_results
             })
+            self._journal("tool_results", results=tool_results, iterations=iterations, tools_used=tools_used)
 
-            response = await self.client.messages.create(
-                model=self.config['model'],
-                max_tokens=self.config['max_tokens'],
-                system=self.config['system_prompt'],
-                tools=api_tools,
-                messages=self.conversation_history
-            )
-
-            if response.usage:
-                total_input_tokens += response.usage.input_tokens
-                total_output_tokens += response.usage.output_tokens
+            response = await self._next_response(history_savings, usage)
 
         # Extract final response
         text_block = next((block for block in response.content if block.type == 'text'), None)
@@ -140,15 +180,309 @@ class Agent:
             "content": response.content
         })
 
-        return {
+        result: AgentResult = {
             "response": final_response,
             "iterations": iterations,
             "tools_used": list(set(tools_used)),
-            "total_tokens": {
-                "input": total_input_tokens,
-                "output": total_output_tokens
+            "total_tokens": usage,
+            "history_tokens_saved": history_savings,
+            "stop_reason": response.stop_reason
+        }
+        self._journal("done", result=result)
+        return result
+
+    async def stream(self, user_message: str) -> AsyncIterator[AgentEvent]:
+        """Run the agent like ``run``, yielding events as they happen.
+
+        Text deltas are yielded as they arrive and each tool call starts
+        executing as soon as its ``tool_use`` block is complete, while the rest
+        of the message is still streaming. The final event is ``done`` and
+        carries the AgentResult.
+        """
+        tools_used: List[str] = []
+        iterations = 0
+        usage: AgentTokenUsage = {"input": 0, "output": 0, "cache_read": 0, "cache_creation": 0}
+        history_savings: List[int] = []
+
+        self.conversation_history.append({
+            "role": "user",
+            "content": user_message
+        })
+        self._journal("user", content=user_message)
+
+        while True:
+            scheduler = ToolScheduler(self.config['max_parallel_tools'])
+            calls: List[Any] = []
+            # Tools only run if the loop will continue, matching run()
+            can_use_tools = iterations < self.config['max_iterations']
+            try:
+                request = self._prepare_request(history_savings)
+                cassette = self._cassette()
+                replaying = bool(cassette and cassette.replaying)
+                started = time.monotonic()
+                async with AsyncExitStack() as stack:
+                    await stack.enter_async_context(client_registry.track())
+                    message_stream, reservation = await with_retry(
+                        partial(self._enter_stream, stack, request, replaying),
+                        self.config.get('retry')
+                    )
+                    response = None
+                    try:
+                        async for event in message_stream:
+                            if event.type == 'text':
+                                yield {"type": "text", "text": event.text}
+                            elif event.type == 'content_block_stop' and event.content_block.type == 'tool_use':
+                                block = event.content_block
+                                if can_use_tools:
+                                    tool_def = next((t for t in self.config['tools'] if t['name'] == block.name), None)
+                                    task = scheduler.submit(
+                                        partial(self._execute_tool, block, tool_def, tools_used),
+                                        bool(tool_def and tool_def.get('serial'))
+                                    )
+                                    calls.append((block, task))
+                                yield {"type": "tool_call", "id": block.id, "name": block.name, "input": block.input}
+                        response = await message_stream.get_final_message()
+                        if not replaying:
+                            self.rate_limiter.update_from_headers(message_stream.response.headers)
+                    finally:
+                        # Also when the stream broke off or the caller stopped reading
+                        if reservation is not None:
+                            if response is None:
+                                self.rate_limiter.release(reservation)
+                            else:
+                                self._settle(reservation, response)
+
+                if not replaying and cassette:
+                    cassette.record(request, response, time.monotonic() - started)
+                self._record_usage(response, usage)
+                self._journal("response", message=response, usage=usage)
+                if response.stop_reason != 'tool_use' or not can_use_tools:
+                    break
+
+                iterations += 1
+                tool_results = []
+                for block, task in calls:
+                    tool_result = await task
+                    tool_results.append(tool_result)
+                    yield {
+                        "type": "tool_result",
+                        "id": block.id,
+                        "name": block.name,
+                        "content": tool_result["content"],
+                        "is_error": tool_result.get("is_error", False)
+                    }
+            finally:
+                scheduler.cancel()
+
+            self.conversation_history.append({
+                "role": "assistant",
+                "content": response.content
+            })
+            self.conversation_history.append({
+                "role": "user",
+                "content": tool_results
+            })
+            self._journal("tool_results", results=tool_results, iterations=iterations, tools_used=tools_used)
+
+        text_block = next((block for block in response.content if block.type == 'text'), None)
+
+        self.conversation_history.append({
+            "role": "assistant",
+            "content": response.content
+        })
+
+        result: AgentResult = {
+            "response": text_block.text if text_block else "",
+            "iterations": iterations,
+            "tools_used": list(set(tools_used)),
+            "total_tokens": usage,
+            "history_tokens_saved": history_savings,
+            "stop_reason": response.stop_reason
+        }
+        self._journal("done", result=result)
+        yield {"type": "done", "result": result}
+
+    def first_request(self, user_message: str) -> Dict[str, Any]:
+        """The request ``run(user_message)`` would send first, without running it."""
+        return self._build_request(self.conversation_history + [{"role": "user", "content": user_message}])
+
+    def _prepare_request(self, history_savings: List[int]) -> Dict[str, Any]:
+        history_savings.append(self.history.compact(self.conversation_history))
+        return self._build_request()
+
+    def _build_request(self, messages: Optional[List[Any]] = None) -> Dict[str, Any]:
+        """Assemble the messages.create arguments for the current history.
+
+        With prompt caching enabled, cache breakpoints are placed on the system
+        prompt, the last tool definition and the newest message. The system
+        prompt and tools never change between iterations, and each request's
+        history extends the previous one, so every iteration reads the prefix
+        written by the one before it instead of paying for it again.
+        """
+        api_tools: List[Dict[str, Any]] = [
+            {
+                "name": t['name'],
+                "description": t['description'],
+                "input_schema": t['input_schema']
             }
+            for t in self.config['tools']
+        ]
+        system: Any = self.config['system_prompt']
+        if messages is None:
+            messages = self.conversation_history
+
+        if self.config['prompt_caching']:
+            system = [{"type": "text", "text": system, "cache_control": CACHE_CONTROL}]
+            if api_tools:
+                api_tools[-1] = {**api_tools[-1], "cache_control": CACHE_CONTROL}
+            if messages:
+                messages = messages[:-1] + [_with_cache_breakpoint(messages[-1])]
+
+        return {
+            "model": self.config['model'],
+            "max_tokens": self.config['max_tokens'],
+            "system": system,
+            "tools": api_tools,
+            "messages": messages
         }
-    
+
+    async def _admit(self, request: Dict[str, Any]) -> Reservation:
+        """Wait for the shared rate limiter to admit ``request``."""
+        input_estimate = estimate_tokens({k: request[k] for k in ("system", "tools", "messages")})
+        priority = request_priority.get()
+        if priority is None:
+            priority = self.config.get('priority', 0)
+        return await self.rate_limiter.acquire(input_estimate, request['max_tokens'], priority)
+
+    def _settle(self, reservation: Reservation, response: Any):
+        if response.usage:
+            input_tokens = response.usage.input_tokens + (getattr(response.usage, "cache_creation_input_tokens", None) or 0)
+            self.rate_limiter.settle(reservation, input_tokens, response.usage.output_tokens)
+
+    def _journal(self, event: str, **data: Any):
+        if self.config.get('journal'):
+            self.config['journal'].append(event, **data)
+
+    def _cassette(self) -> Optional[Cassette]:
+        return self.config.get('cassette') or get_active_cassette()
+
+    def _request_options(self) -> Dict[str, Any]:
+        # Never let a single call outlive the task that made it
+        remaining = remaining_time()
+        return {"timeout": max(remaining, 0.001)} if remaining is not None else {}
+
+    def _open_stream(self, request: Dict[str, Any]) -> Any:
+        cassette = self._cassette()
+        if cassette and cassette.replaying:
+            return cassette.replay_stream(request)
+        return self.client.messages.stream(**request, **self._request_options())
+
+    async def _enter_stream(self, stack: AsyncExitStack, request: Dict[str, Any], replaying: bool) -> Any:
+        """Admit and open one stream attempt; the stream closes with ``stack``."""
+        reservation = None if replaying else await self._admit(request)
+        try:
+            message_stream = await stack.enter_async_context(self._open_stream(request))
+        except BaseException as e:
+            if isinstance(e, APIStatusError):
+                self.rate_limiter.update_from_headers(e.response.headers)
+            if reservation is not None:
+                # A failed attempt must not keep its tokens charged against the buckets
+                self.rate_limiter.release(reservation)
+            raise
+        return message_stream, reservation
+
+    async def _create_message(self, request: Dict[str, Any]) -> Any:
+        cassette = self._cassette()
+        if cassette and cassette.replaying:
+            return await cassette.replay(request)
+        return await with_retry(partial(self._send_message, request, cassette), self.config.get('retry'))
+
+    async def _send_message(self, request: Dict[str, Any], cassette: Optional[Cassette]) -> Any:
+        reservation = await self._admit(request)
+        started = time.monotonic()
+        async with client_registry.track():
+            try:
+                raw = await self.client.messages.with_raw_response.create(**request, **self._request_options())
+            except BaseException as e:
+                if isinstance(e, APIStatusError):
+                    self.rate_limiter.update_from_headers(e.response.headers)
+                # A failed attempt must not keep its tokens charged against the buckets
+                self.rate_limiter.release(reservation)
+                raise
+        self.rate_limiter.update_from_headers(raw.headers)
+        response = raw.parse()
+        self._settle(reservation, response)
+        if cassette:
+            cassette.record(request, response, time.monotonic() - started)
+        return response
+
+    def _record_usage(self, response: Any, usage: AgentTokenUsage):
+        if not response.usage:
+            return
+        usage["input"] += response.usage.input_tokens
+        usage["output"] += response.usage.output_tokens
+        usage["cache_read"] += getattr(response.usage, "cache_read_input_tokens", None) or 0
+        usage["cache_creation"] += getattr(response.usage, "cache_creation_input_tokens", None) or 0
+
+    async def _execute_tools(self, tool_use_blocks: List[Any], tools_used: List[str]) -> List[Dict[str, Any]]:
+        scheduler = ToolScheduler(self.config['max_parallel_tools'])
+        for tool_use in tool_use_blocks:
+            tool_def = next((t for t in self.config['tools'] if t['name'] == tool_use.name), None)
+            serial = bool(tool_def and tool_def.get('serial'))
+            scheduler.submit(partial(self._execute_tool, tool_use, tool_def, tools_used), serial)
+        try:
+            return await scheduler.results()
+        except BaseException:
+            scheduler.cancel()
+            raise
+
+    async def _execute_tool(self, tool_use: Any, tool_def: Optional[Tool], tools_used: List[str]) -> Dict[str, Any]:
+        if not tool_def:
+            return {
+                "type": "tool_result",
+                "tool_use_id": tool_use.id,
+                "content": f"Error: Unknown tool {tool_use.name}",
+                "is_error": True
+            }
+
+        tools_used.append(tool_def['name'])
+
+        try:
+            if tool_def.get('cacheable'):
+                result = await self.tool_cache.call(tool_def, tool_use.input, tool_def['handler'])
+            else:
+                result = await tool_def['handler'](tool_use.input)
+            content = result if isinstance(result, str) else str(result)
+            if self.config['max_tool_result_chars'] and tool_def['name'] != READ_RESULT_PAGE:
+                content = spill_result(self.blob_store, content, self.config['max_tool_result_chars'])
+            return {
+                "type": "tool_result",
+                "tool_use_id": tool_use.id,
+                "content": content
+            }
+        except Exception as e:
+            return {
+                "type": "tool_result",
+                "tool_use_id": tool_use.id,
+                "content": f"Error: {str(e)}",
+                "is_error": True
+            }
+
     def reset(self):
         self.conversation_history = []
+
+def _with_cache_breakpoint(message: Any) -> Dict[str, Any]:
+    """Return a copy of ``message`` whose last content block is a cache breakpoint."""
+    content = message["content"]
+    if isinstance(content, str):
+        blocks: List[Any] = [{"type": "text", "text": content}]
+    else:
+        blocks = list(content)
+    if not blocks:
+        return message
+
+    last = blocks[-1]
+    if hasattr(last, "model_dump"):
+        last = last.model_dump(exclude_none=True)
+    blocks[-1] = {**last, "cache_control": CACHE_CONTROL}
+    return {**message, "content": blocks}
@@ -0,0 +1,104 @@
+
+import hashlib
+import os
+import re
+import shutil
+import tempfile
+from typing import Any, Dict, Optional
+
+READ_RESULT_PAGE = "read_result_page"
+
+_HANDLE_RE = re.compile(r"^result-[0-9a-f]{16}$")
+
+class BlobStore:
+    """Content-addressed local store for tool results too large for the context.
+
+    Results are written once under ``root`` and addressed by a short handle
+    derived from their hash, so the same oversized output spilled twice is
+    stored once. Without a root, a fresh temp directory is used, which dies
+    with the process; journaled sessions store results next to the journal
+    (``SessionJournal.blob_root``) so their handles still resolve on resume.
+    """
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = root
+
+    def _path(self, handle: str) -> str:
+        if not _HANDLE_RE.match(handle):
+            raise ValueError(f"Invalid result handle: {handle}")
+        return os.path.join(self.root, f"{handle}.txt")
+
+    def put(self, text: str) -> str:
+        if self.root is None:
+            self.root = tempfile.mkdtemp(prefix="interact-results-")
+        os.makedirs(self.root, exist_ok=True)
+        handle = "result-" + hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+        path = self._path(handle)
+        if not os.path.exists(path):
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(text)
+            os.replace(tmp_path, path)
+        return handle
+
+    def read(self, handle: str, offset: int = 0, limit: Optional[int] = None) -> str:
+        if self.root is None:
+            raise KeyError(f"Unknown result handle: {handle}")
+        path = self._path(handle)
+        if not os.path.exists(path):
+            raise KeyError(f"Unknown result handle: {handle}")
+        with open(path, "r", encoding="utf-8") as f:
+            # Offsets count characters, which text-mode seek() cannot address
+            if offset:
+                f.read(offset)
+            return f.read() if limit is None else f.read(limit)
+
+    def size(self, handle: str) -> int:
+        return len(self.read(handle))
+
+    def clear(self):
+        if self.root and os.path.isdir(self.root):
+            shutil.rmtree(self.root)
+
+def spill_result(store: BlobStore, content: str, max_chars: int) -> str:
+    """Return ``content`` unchanged, or a head/tail preview plus a handle if it is over budget."""
+    if len(content) <= max_chars:
+        return content
+    handle = store.put(content)
+    preview = max(max_chars // 2 - 200, 0)
+    return (
+        f"[Result too large: {len(content)} chars stored as {handle}. Showing the first and last "
+        f"{preview} chars. Call {READ_RESULT_PAGE} with this handle and an offset to read more.]\n"
+        f"{content[:preview]}\n"
+        f"[... {len(content) - 2 * preview} chars omitted ...]\n"
+        f"{content[-preview:] if preview else ''}"
+    )
+
+def create_read_result_page_tool(store: BlobStore, max_chars: int) -> Dict[str, Any]:
+    async def handler(input_data: Any) -> str:
+        offset = max(int(input_data.get("offset", 0)), 0)
+        limit = min(int(input_data.get("limit", max_chars)), max_chars)
+        page = store.read(input_data["handle"], offset, limit)
+        total = store.size(input_data["handle"])
+        end = offset + len(page)
+        header = f"[{input_data['handle']}: chars {offset}-{end} of {total}"
+        header += f"; next offset {end}]" if end < total else "; end of result]"
+        return f"{header}\n{page}"
+
+    return {
+        "name": READ_RESULT_PAGE,
+        "description": "Read a page of a tool result that was too large to include in full",
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "handle": {"type": "string", "description": "Handle from the truncated result, e.g. result-0123456789abcdef"},
+                "offset": {"type": "integer", "description": "Character offset to start reading from", "default": 0},
+                "limit": {"type": "integer", "description": f"Characters to read (at most {max_chars})", "default": max_chars}
+            },
+            "required": ["handle"]
+        },
+        "handler": handler
+    }
+
+# Shared by every Agent in the process unless one is configured with its own
+shared_blob_store = BlobStore()
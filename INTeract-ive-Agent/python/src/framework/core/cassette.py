@@ -0,0 +1,133 @@
+
+import asyncio
+import hashlib
+import json
+import os
+from collections import deque
+from types import SimpleNamespace
+from typing import Any, AsyncIterator, Deque, Dict, Optional
+from anthropic.types import Message
+from src.framework.core.serialization import to_json
+
+class CassetteMiss(Exception):
+    """Raised in replay mode when a request was never recorded."""
+
+def request_hash(request: Dict[str, Any]) -> str:
+    """Stable hash of a messages.create request, independent of dict order."""
+    payload = json.dumps(request, sort_keys=True, default=to_json)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class Cassette:
+    """Records messages.create request/response pairs and serves them offline.
+
+    In ``record`` mode every exchange is appended to a JSONL file as it
+    completes. In ``replay`` mode responses are looked up by request hash;
+    identical requests are served in the order they were recorded. Replayed
+    calls sleep for ``latency_scale`` times the recorded latency (0 disables
+    the delay). ``run`` and ``stream`` share the same cassette format.
+    """
+
+    def __init__(self, path: str, mode: str = "replay", latency_scale: float = 0.0):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        self.path = path
+        self.mode = mode
+        self.latency_scale = latency_scale
+        self.entries: Dict[str, Deque[Dict[str, Any]]] = {}
+        self.recorded = 0
+        self.replayed = 0
+
+        if mode == "replay":
+            self._load()
+        else:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            # Start a fresh cassette for each recording session
+            open(path, "w", encoding="utf-8").close()
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == "replay"
+
+    def _load(self):
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self.entries.setdefault(entry["request_hash"], deque()).append(entry)
+
+    def record(self, request: Dict[str, Any], response: Any, latency: float):
+        entry = {
+            "request_hash": request_hash(request),
+            "request": json.loads(json.dumps(request, default=to_json)),
+            "response": response.model_dump(mode="json"),
+            "latency": latency
+        }
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+        self.recorded += 1
+
+    async def replay(self, request: Dict[str, Any]) -> Message:
+        key = request_hash(request)
+        queue = self.entries.get(key)
+        if not queue:
+            raise CassetteMiss(
+                f"No recorded response for request {key[:12]} (model {request.get('model')}, "
+                f"{len(request.get('messages', []))} messages) in {self.path}"
+            )
+        entry = queue.popleft()
+        if self.latency_scale > 0:
+            await asyncio.sleep(entry["latency"] * self.latency_scale)
+        self.replayed += 1
+        return Message.model_validate(entry["response"])
+
+    def replay_stream(self, request: Dict[str, Any]) -> "ReplayStream":
+        return ReplayStream(self, request)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "recorded": self.recorded,
+            "replayed": self.replayed,
+            "remaining": sum(len(q) for q in self.entries.values())
+        }
+
+class ReplayStream:
+    """Stands in for ``messages.stream`` using a recorded response.
+
+    Emits the subset of stream events the Agent consumes: one ``text`` event
+    per text block and a ``content_block_stop`` per block.
+    """
+
+    def __init__(self, cassette: Cassette, request: Dict[str, Any]):
+        self.cassette = cassette
+        self.request = request
+        self.message: Optional[Message] = None
+        self.response = SimpleNamespace(headers={})
+
+    async def __aenter__(self) -> "ReplayStream":
+        self.message = await self.cassette.replay(self.request)
+        return self
+
+    async def __aexit__(self, *exc_info: Any):
+        return None
+
+    def __aiter__(self) -> AsyncIterator[Any]:
+        return self._events()
+
+    async def _events(self) -> AsyncIterator[Any]:
+        for block in self.message.content:
+            if block.type == "text":
+                yield SimpleNamespace(type="text", text=block.text)
+            yield SimpleNamespace(type="content_block_stop", content_block=block)
+
+    async def get_final_message(self) -> Message:
+        return self.message
+
+_active_cassette: Optional[Cassette] = None
+
+def use_cassette(cassette: Optional[Cassette]):
+    """Route every Agent in the process through ``cassette`` (None to stop)."""
+    global _active_cassette
+    _active_cassette = cassette
+
+def get_active_cassette() -> Optional[Cassette]:
+    return _active_cassette
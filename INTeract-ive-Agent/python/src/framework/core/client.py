@@ -0,0 +1,102 @@
+
+import asyncio
+import importlib.util
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional, TypedDict
+from anthropic import AsyncAnthropic, DefaultAsyncHttpxClient, DEFAULT_CONNECTION_LIMITS
+
+class ClientConfig(TypedDict):
+    max_connections: int
+    max_keepalive_connections: int
+    keepalive_expiry: float # seconds an idle connection is kept open
+    http2: bool # only used when the h2 package is installed
+    max_in_flight: Optional[int] # process-wide cap on concurrent API requests
+    max_retries: int # SDK-level retries; agents retry calls themselves
+
+DEFAULT_CLIENT_CONFIG: ClientConfig = {
+    "max_connections": 64,
+    "max_keepalive_connections": 32,
+    "keepalive_expiry": 60.0,
+    "http2": True,
+    "max_in_flight": None,
+    "max_retries": 0
+}
+
+class ClientRegistry:
+    """Process-wide Anthropic client with one tuned connection pool.
+
+    Every Agent in the process shares the same client, so the master agent
+    and all subagent workers reuse warm keep-alive connections instead of
+    each opening their own pool. The registry also counts in-flight requests
+    and can cap them globally.
+    """
+
+    def __init__(self, config: Optional[ClientConfig] = None):
+        self.config: ClientConfig = {**DEFAULT_CLIENT_CONFIG, **(config or {})}
+        self._client: Optional[AsyncAnthropic] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.total_requests = 0
+
+    async def configure(self, config: ClientConfig):
+        """Change pool settings, closing the current client's connections.
+
+        Agents resolve the shared client per request, so the next call of
+        every agent uses the new settings. Refused while requests are in
+        flight: they hold the old client and the in-flight semaphore.
+        """
+        if self.in_flight:
+            raise RuntimeError(f"Cannot reconfigure the client while {self.in_flight} requests are in flight")
+        self.config = {**self.config, **config}
+        await self.aclose()
+        self._semaphore = None
+
+    def get_client(self) -> AsyncAnthropic:
+        if self._client is None:
+            # Use the Limits type of whichever httpx build the SDK depends on
+            limits = type(DEFAULT_CONNECTION_LIMITS)(
+                max_connections=self.config["max_connections"],
+                max_keepalive_connections=self.config["max_keepalive_connections"],
+                keepalive_expiry=self.config["keepalive_expiry"]
+            )
+            http2 = self.config["http2"] and importlib.util.find_spec("h2") is not None
+            self._client = AsyncAnthropic(
+                http_client=DefaultAsyncHttpxClient(limits=limits, http2=http2),
+                max_retries=self.config["max_retries"]
+            )
+        return self._client
+
+    @asynccontextmanager
+    async def track(self) -> AsyncIterator[None]:
+        """Account for one API request for the duration of the block."""
+        if self._semaphore is None and self.config["max_in_flight"]:
+            self._semaphore = asyncio.Semaphore(self.config["max_in_flight"])
+        if self._semaphore:
+            await self._semaphore.acquire()
+        self.in_flight += 1
+        self.total_requests += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            if self._semaphore:
+                self._semaphore.release()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+            "total_requests": self.total_requests
+        }
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+
+client_registry = ClientRegistry()
+
+def get_shared_client() -> AsyncAnthropic:
+    return client_registry.get_client()
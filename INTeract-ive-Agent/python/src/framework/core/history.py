@@ -0,0 +1,104 @@
+
+import json
+from typing import Any, Dict, List, Optional, TypedDict
+
+class HistoryConfig(TypedDict):
+    max_tokens: int # budget for the whole conversation_history
+    keep_recent_messages: int # newest messages that are never compacted
+    stub_chars: int # characters of an elided tool payload kept as a preview
+
+DEFAULT_HISTORY_CONFIG: HistoryConfig = {
+    "max_tokens": 100000,
+    "keep_recent_messages": 6,
+    "stub_chars": 200
+}
+
+# Rough chars-per-token ratio for English text and code
+CHARS_PER_TOKEN = 4
+
+def estimate_tokens(value: Any) -> int:
+    """Cheap token estimate for a message or content block."""
+    if hasattr(value, "model_dump"):
+        value = value.model_dump(exclude_none=True)
+    if isinstance(value, str):
+        return len(value) // CHARS_PER_TOKEN + 1
+    return len(json.dumps(value, default=str)) // CHARS_PER_TOKEN + 1
+
+class HistoryManager:
+    """Keeps a conversation history under a token budget.
+
+    Compaction only runs once the estimate exceeds ``max_tokens``, so requests
+    below the budget keep a stable prefix for prompt caching. It first replaces
+    large, old tool payloads (tool_result content and tool_use inputs) with
+    short stubs, oldest first. If that is not enough, it drops the oldest
+    assistant/user turn pairs after the first message, which keeps every
+    tool_use together with its tool_result.
+    """
+
+    def __init__(self, config: Optional[HistoryConfig] = None):
+        self.config: HistoryConfig = {**DEFAULT_HISTORY_CONFIG, **(config or {})}
+
+    def compact(self, history: List[Any]) -> int:
+        """Compact ``history`` in place and return the estimated tokens saved."""
+        sizes = [estimate_tokens(m) for m in history]
+        before = total = sum(sizes)
+        if total <= self.config["max_tokens"]:
+            return 0
+
+        protected = max(len(history) - self.config["keep_recent_messages"], 0)
+
+        for i in range(protected):
+            if total <= self.config["max_tokens"]:
+                break
+            compacted = self._stub_message(history[i])
+            if compacted is not None:
+                history[i] = compacted
+                new_size = estimate_tokens(compacted)
+                total -= sizes[i] - new_size
+                sizes[i] = new_size
+
+        # Drop whole assistant/user pairs right after the opening user message
+        while total > self.config["max_tokens"] and len(history) - 2 >= self.config["keep_recent_messages"] + 1:
+            if history[1]["role"] != "assistant" or history[2]["role"] != "user":
+                break
+            total -= sizes[1] + sizes[2]
+            del history[1:3]
+            del sizes[1:3]
+
+        return before - total
+
+    def _stub(self, text: str) -> Optional[str]:
+        limit = self.config["stub_chars"]
+        if len(text) <= limit * 2:
+            return None
+        return f"[Elided {len(text)} chars of earlier output. Preview: {text[:limit]}...]"
+
+    def _stub_message(self, message: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        content = message["content"]
+        if isinstance(content, str):
+            return None
+
+        changed = False
+        blocks: List[Any] = []
+        for block in content:
+            if hasattr(block, "model_dump"):
+                block_dict = block.model_dump(exclude_none=True)
+            else:
+                block_dict = block
+
+            if block_dict.get("type") == "tool_result" and isinstance(block_dict.get("content"), str):
+                stub = self._stub(block_dict["content"])
+                if stub is not None:
+                    block = {**block_dict, "content": stub}
+                    changed = True
+            elif block_dict.get("type") == "tool_use" and isinstance(block_dict.get("input"), dict):
+                new_input = {}
+                for key, value in block_dict["input"].items():
+                    stub = self._stub(value) if isinstance(value, str) else None
+                    new_input[key] = value if stub is None else stub
+                if new_input != block_dict["input"]:
+                    block = {**block_dict, "input": new_input}
+                    changed = True
+            blocks.append(block)
+
+        return {**message, "content": blocks} if changed else None
@@ -0,0 +1,105 @@
+
+import json
+import os
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional, TypedDict
+from anthropic.types import Message
+from src.framework.core.serialization import to_json
+
+DEFAULT_SESSIONS_DIR = os.path.join(".interact", "sessions")
+
+class JournalState(TypedDict):
+    history: List[Any]
+    usage: Dict[str, int]
+    iterations: int
+    tools_used: List[str]
+    pending_response: Optional[Message] # answered, but its tools have not finished
+    result: Optional[Dict[str, Any]] # set once the run completed
+
+def new_session_id() -> str:
+    return datetime.now().strftime("%Y%m%d-%H%M%S-") + uuid.uuid4().hex[:6]
+
+class SessionJournal:
+    """Append-only JSONL record of one agent conversation.
+
+    Each line is one event, flushed and fsynced before the run moves on:
+    ``user`` (the prompt), ``response`` (an API response plus the running
+    counters), ``tool_results`` (the results of that response's tools) and
+    ``done`` (the final AgentResult). A torn last line from a crash is
+    skipped, so ``restore`` always returns the last consistent point.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._tail_checked = False
+
+    @classmethod
+    def for_session(cls, session_id: str, root: str = DEFAULT_SESSIONS_DIR) -> "SessionJournal":
+        return cls(os.path.join(root, f"{session_id}.jsonl"))
+
+    def append(self, event: str, **data: Any):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        line = json.dumps({"event": event, **data}, default=to_json)
+        if not self._tail_checked:
+            # Terminate a line torn by a crash so new events start cleanly
+            self._tail_checked = True
+            if self.exists() and os.path.getsize(self.path) > 0:
+                with open(self.path, "rb") as f:
+                    f.seek(-1, os.SEEK_END)
+                    if f.read(1) != b"\n":
+                        line = "\n" + line
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    @property
+    def blob_root(self) -> str:
+        """Where this session's spilled tool results are kept, so resume can read them."""
+        return os.path.splitext(self.path)[0] + "-results"
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    def restore(self) -> Optional[JournalState]:
+        if not self.exists():
+            return None
+
+        state: JournalState = {
+            "history": [],
+            "usage": {"input": 0, "output": 0, "cache_read": 0, "cache_creation": 0},
+            "iterations": 0,
+            "tools_used": [],
+            "pending_response": None,
+            "result": None
+        }
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+
+                event = record["event"]
+                if event == "user":
+                    # Counters are per run, like Agent.run's
+                    state["history"].append({"role": "user", "content": record["content"]})
+                    state["usage"] = {"input": 0, "output": 0, "cache_read": 0, "cache_creation": 0}
+                    state["iterations"] = 0
+                    state["tools_used"] = []
+                    state["result"] = None
+                elif event == "response":
+                    state["pending_response"] = Message.model_validate(record["message"])
+                    state["usage"] = record["usage"]
+                elif event == "tool_results" and state["pending_response"] is not None:
+                    state["history"].append({"role": "assistant", "content": state["pending_response"].content})
+                    state["history"].append({"role": "user", "content": record["results"]})
+                    state["pending_response"] = None
+                    state["iterations"] = record["iterations"]
+                    state["tools_used"] = record["tools_used"]
+                elif event == "done" and state["pending_response"] is not None:
+                    state["history"].append({"role": "assistant", "content": state["pending_response"].content})
+                    state["pending_response"] = None
+                    state["result"] = record["result"]
+        return state
@@ -0,0 +1,8 @@
+
+from typing import Any
+
+def to_json(value: Any) -> Any:
+    """``json.dumps`` default for SDK objects: pydantic models as plain dicts, anything else as a string."""
+    if hasattr(value, "model_dump"):
+        return value.model_dump(mode="json", exclude_none=True)
+    return str(value)
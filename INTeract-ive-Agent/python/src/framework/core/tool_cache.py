@@ -0,0 +1,97 @@
+
+import asyncio
+import json
+import os
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+Fingerprint = Tuple[Tuple[str, Optional[int], Optional[int]], ...]
+
+# Resolves a shared call whose owner was cancelled; its waiters run the handler again
+_ABANDONED = object()
+
+def path_dependencies(*keys: str) -> Callable[[Any], List[str]]:
+    """Build a ``depends_on`` function that reads file paths from tool input keys."""
+    def depends_on(tool_input: Any) -> List[str]:
+        return [tool_input[key] for key in keys if tool_input.get(key)]
+    return depends_on
+
+def fingerprint(paths: List[str]) -> Fingerprint:
+    """Identify the current state of files/directories by (mtime_ns, size)."""
+    state = []
+    for path in paths:
+        abs_path = os.path.abspath(path)
+        try:
+            st = os.stat(abs_path)
+            state.append((abs_path, st.st_mtime_ns, st.st_size))
+        except OSError:
+            state.append((abs_path, None, None))
+    return tuple(state)
+
+class ToolResultCache:
+    """Memoizes results of pure tools.
+
+    A tool opts in with ``"cacheable": True`` and may declare the files its
+    result depends on with ``depends_on``. Entries are keyed on the tool name,
+    its input and the fingerprint of those files, so any write to a dependency
+    makes the old entry unreachable. Concurrent identical calls share a single
+    handler invocation; if the caller running it is cancelled, the others run
+    it again rather than being cancelled with it. Results are only stored if
+    the dependencies did not change while the handler ran.
+    """
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[Tuple[str, str, Fingerprint], Any]" = OrderedDict()
+        self.in_flight: Dict[Tuple[str, str, Fingerprint], asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+
+    async def call(self, tool: Dict[str, Any], tool_input: Any, handler: Callable[[Any], Awaitable[Any]]) -> Any:
+        depends_on = tool.get('depends_on')
+        paths = depends_on(tool_input) if depends_on else []
+        before = fingerprint(paths)
+        key = (tool['name'], json.dumps(tool_input, sort_keys=True, default=str), before)
+
+        if key in self.entries:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return self.entries[key]
+        while key in self.in_flight:
+            result = await asyncio.shield(self.in_flight[key])
+            if result is not _ABANDONED:
+                self.hits += 1
+                return result
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self.in_flight[key] = future
+        try:
+            result = await handler(tool_input)
+        except asyncio.CancelledError:
+            future.set_result(_ABANDONED)
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Nobody may be waiting on the shared future
+            future.exception()
+            raise
+        finally:
+            del self.in_flight[key]
+
+        future.set_result(result)
+        if fingerprint(paths) == before:
+            self.entries[key] = result
+            if len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return result
+
+    def clear(self):
+        self.entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self.entries)}
+
+# Shared by every Agent in the process (master and subagent workers) unless
+# an agent is configured with its own cache.
+shared_tool_cache = ToolResultCache()
@@ -0,0 +1,46 @@
+
+import asyncio
+from typing import Any, Awaitable, Callable, List, Optional
+
+class ToolScheduler:
+    """Runs the tool calls of one turn concurrently.
+
+    Calls start in submission order, at most ``max_concurrency`` at a time.
+    A serial call (one that mutates shared state) waits for every call
+    submitted before it and blocks every call submitted after it, so reads
+    never observe a half-applied write. Results come back in submission order.
+    """
+
+    def __init__(self, max_concurrency: int):
+        self._semaphore = asyncio.Semaphore(max(1, max_concurrency))
+        self._tasks: List[asyncio.Task] = []
+        self._since_barrier: List[asyncio.Task] = []
+        self._barrier: Optional[asyncio.Task] = None
+
+    def submit(self, call: Callable[[], Awaitable[Any]], serial: bool = False) -> asyncio.Task:
+        if serial:
+            waits = list(self._since_barrier)
+            if self._barrier:
+                waits.append(self._barrier)
+            task = asyncio.ensure_future(self._run(call, waits))
+            self._barrier = task
+            self._since_barrier = []
+        else:
+            waits = [self._barrier] if self._barrier else []
+            task = asyncio.ensure_future(self._run(call, waits))
+            self._since_barrier.append(task)
+        self._tasks.append(task)
+        return task
+
+    async def _run(self, call: Callable[[], Awaitable[Any]], waits: List[asyncio.Task]) -> Any:
+        if waits:
+            await asyncio.gather(*waits, return_exceptions=True)
+        async with self._semaphore:
+            return await call()
+
+    async def results(self) -> List[Any]:
+        return await asyncio.gather(*self._tasks)
+
+    def cancel(self):
+        for task in self._tasks:
+            task.cancel()
@@ -0,0 +1,128 @@
+
+import asyncio
+import itertools
+import json
+import os
+from types import SimpleNamespace
+from functools import partial
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, TypedDict
+from src.framework.resilience.retry import RetryConfig, with_retry
+
+class BatchConfig(TypedDict):
+    checkpoint_path: Optional[str] # JSON file that lets a restarted process resume
+    max_batch_size: int # requests per Message Batches submission
+    poll_interval: float # seconds before the first status poll
+    max_poll_interval: float
+    poll_backoff: float # multiplier applied to the interval after each poll
+    retry: Optional[RetryConfig] # for create/retrieve/results calls (the shared client has max_retries 0)
+
+DEFAULT_BATCH_CONFIG: BatchConfig = {
+    "checkpoint_path": None,
+    "max_batch_size": 10000,
+    "poll_interval": 5.0,
+    "max_poll_interval": 300.0,
+    "poll_backoff": 1.5,
+    "retry": None
+}
+
+class BatchCheckpoint:
+    """Submitted batch IDs and finished task outcomes, persisted as JSON.
+
+    ``batches`` maps each batch ID to its ``custom_id -> task id`` mapping and
+    ``finished`` maps task IDs to their final status, result and error. The
+    file is rewritten atomically after every change. Without a path the
+    checkpoint only lives in memory.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.batches: Dict[str, Dict[str, str]] = {}
+        self.finished: Dict[str, Dict[str, Any]] = {}
+        if path and os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.batches = data.get("batches", {})
+            self.finished = data.get("finished", {})
+
+    def submitted_task_ids(self) -> set:
+        return {task_id for mapping in self.batches.values() for task_id in mapping.values()}
+
+    def add_batch(self, batch_id: str, mapping: Dict[str, str]):
+        self.batches[batch_id] = mapping
+        self.save()
+
+    def finish(self, task_id: str, status: str, result: Any, error: Optional[str]):
+        self.finished[task_id] = {"status": status, "result": result, "error": error}
+        self.save()
+
+    def forget(self, task_ids: List[str]):
+        """Drop outcomes that have been handed back, so a reused path starts clean."""
+        for task_id in task_ids:
+            self.finished.pop(task_id, None)
+        self.save()
+
+    def remove_batch(self, batch_id: str):
+        self.batches.pop(batch_id, None)
+        self.save()
+
+    def save(self):
+        if not self.path:
+            return
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"batches": self.batches, "finished": self.finished}, f, indent=2, default=str)
+        os.replace(tmp_path, self.path)
+
+async def wait_for_batch(batches: Any, batch_id: str, config: BatchConfig) -> Any:
+    """Poll a batch with exponential backoff until processing has ended."""
+    interval = config["poll_interval"]
+    while True:
+        batch = await with_retry(partial(batches.retrieve, batch_id), config.get("retry"))
+        if batch.processing_status == "ended":
+            return batch
+        await asyncio.sleep(interval)
+        interval = min(interval * config["poll_backoff"], config["max_poll_interval"])
+
+class LocalBatchEndpoint:
+    """In-process stand-in for the Message Batches API.
+
+    Exposes ``messages.batches.create/retrieve/results`` like AsyncAnthropic
+    and answers each request with ``create_message(params)``, e.g. an Agent
+    backed by a replay cassette or a fake model. Useful for exercising batch
+    mode offline.
+    """
+
+    def __init__(self, create_message: Callable[[Dict[str, Any]], Awaitable[Any]], max_concurrency: int = 8):
+        self.create_message = create_message
+        self.messages = SimpleNamespace(batches=self)
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._ids = itertools.count(1)
+        self._jobs: Dict[str, asyncio.Task] = {}
+        self._results: Dict[str, Dict[str, Any]] = {}
+
+    async def create(self, requests: Any) -> Any:
+        batch_id = f"msgbatch_local_{next(self._ids)}"
+        self._results[batch_id] = {}
+        self._jobs[batch_id] = asyncio.ensure_future(
+            asyncio.gather(*(self._process(batch_id, r["custom_id"], r["params"]) for r in requests))
+        )
+        return SimpleNamespace(id=batch_id, processing_status="in_progress")
+
+    async def _process(self, batch_id: str, custom_id: str, params: Dict[str, Any]):
+        async with self._semaphore:
+            try:
+                message = await self.create_message(params)
+                result = SimpleNamespace(type="succeeded", message=message)
+            except Exception as e:
+                result = SimpleNamespace(type="errored", error=str(e))
+        self._results[batch_id][custom_id] = result
+
+    async def retrieve(self, batch_id: str) -> Any:
+        status = "ended" if self._jobs[batch_id].done() else "in_progress"
+        return SimpleNamespace(id=batch_id, processing_status=status)
+
+    async def results(self, batch_id: str) -> AsyncIterator[Any]:
+        async def entries():
+            for custom_id, result in self._results[batch_id].items():
+                yield SimpleNamespace(custom_id=custom_id, result=result)
+        return entries()
@@ -0,0 +1,32 @@
+
+from collections import deque
+from typing import Deque, Dict, Optional, TypedDict
+
+class HedgeConfig(TypedDict):
+    percentile: float # hedge once a run outlasts this quantile of its capability's latency
+    min_samples: int # completed runs of a capability needed before it is hedged
+    window: int # recent runs per capability the percentile is taken over
+
+DEFAULT_HEDGE_CONFIG: HedgeConfig = {
+    "percentile": 0.95,
+    "min_samples": 20,
+    "window": 200
+}
+
+class LatencyTracker:
+    """Recent task run times per capability."""
+
+    def __init__(self, window: int = 200):
+        self.window = window
+        self._samples: Dict[str, Deque[float]] = {}
+
+    def record(self, task_type: str, seconds: float):
+        self._samples.setdefault(task_type, deque(maxlen=self.window)).append(seconds)
+
+    def percentile(self, task_type: str, q: float, min_samples: int = 1) -> Optional[float]:
+        """The ``q`` quantile of recent run times, or None with too few samples."""
+        samples = self._samples.get(task_type)
+        if not samples or len(samples) < max(min_samples, 1):
+            return None
+        ordered = sorted(samples)
+        return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
@@ -0,0 +1,218 @@
+
+import asyncio
+import bisect
+from functools import partial
+from typing import Any, Dict, List, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; covers quick tool calls up to runs that hit a long task timeout
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+COUNTERS = {
+    "interact_tasks_submitted_total": "Tasks submitted to the supervisor.",
+    "interact_tasks_finished_total": "Tasks that reached a final status.",
+    "interact_task_retries_total": "Run attempts that were queued again, by reason (failed or worker_lost).",
+    "interact_task_hedges_total": "Speculative duplicates started for straggling tasks.",
+    "interact_task_leases_lost_total": "Finished runs whose queue lease had been reclaimed; outcome not stored.",
+    "interact_worker_runs_total": "Run attempts per worker, by outcome.",
+    "interact_worker_busy_seconds_total": "Seconds workers spent running tasks."
+}
+
+HISTOGRAMS = {
+    "interact_task_wait_seconds": "Time from submission to first dispatch.",
+    "interact_task_run_seconds": "Duration of each run attempt."
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+
+class Histogram:
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1) # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        total = 0
+        out = []
+        for bound, count in zip([*map(_format_value, self.buckets), "+Inf"], self.counts):
+            total += count
+            out.append((bound, total))
+        return out
+
+class SupervisorMetrics:
+    """Counters and histograms for one SupervisorAgent.
+
+    Series are labelled by ``capability`` (the task type) and, for worker
+    series, by ``worker``. Pooled sessions come and go, so they report
+    under their pool's ID. Queue depth, active tasks and worker occupancy
+    are read from the supervisor when a snapshot or scrape is taken; for a
+    queue that can block (``executor`` set, e.g. SQLite) depths come from the
+    last ``refresh()``, which ``serve`` runs before every scrape. ``render``
+    produces the Prometheus text format, which ``serve`` exposes on
+    ``/metrics``.
+    """
+
+    def __init__(self, supervisor: Any, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.supervisor = supervisor
+        self.buckets = buckets
+        self.counters: Dict[str, Dict[Labels, float]] = {name: {} for name in COUNTERS}
+        self.histograms: Dict[str, Dict[Labels, Histogram]] = {name: {} for name in HISTOGRAMS}
+        self.queue_depths: Dict[str, int] = {}
+
+    def inc(self, name: str, amount: float = 1.0, **labels: str):
+        series = self.counters[name]
+        key = tuple(sorted(labels.items()))
+        series[key] = series.get(key, 0.0) + amount
+
+    def observe(self, name: str, value: float, **labels: str):
+        series = self.histograms[name]
+        key = tuple(sorted(labels.items()))
+        if key not in series:
+            series[key] = Histogram(self.buckets)
+        series[key].observe(value)
+
+    def record_run(self, task: Dict[str, Any], worker: Dict[str, Any], seconds: float, outcome: str):
+        """One run attempt of ``task`` on ``worker`` ended with ``outcome``."""
+        worker_label = worker["pool"] or worker["id"]
+        self.observe("interact_task_run_seconds", seconds, capability=task["type"], outcome=outcome)
+        self.inc("interact_worker_runs_total", worker=worker_label, outcome=outcome)
+        self.inc("interact_worker_busy_seconds_total", seconds, worker=worker_label)
+        if outcome in ("retried", "lost"):
+            # Lost remote nodes are told apart from tasks that failed on their own
+            reason = "worker_lost" if outcome == "lost" else "failed"
+            self.inc("interact_task_retries_total", capability=task["type"], reason=reason)
+
+    def _capabilities(self) -> List[str]:
+        return sorted(
+            {c for w in self.supervisor.workers.values() for c in w["capabilities"]} |
+            {c for p in self.supervisor.pools.values() for c in p.capabilities}
+        )
+
+    async def refresh(self):
+        """Read queue depths on the queue's executor, so a blocking queue never stalls the loop."""
+        queue = self.supervisor.task_queue
+        if queue.executor is None:
+            return
+        read = partial(_read_depths, queue, self._capabilities())
+        self.queue_depths = await asyncio.get_running_loop().run_in_executor(queue.executor, read)
+
+    def gauges(self) -> Dict[str, Tuple[str, Dict[Labels, float]]]:
+        supervisor = self.supervisor
+        capabilities = self._capabilities()
+        queue = supervisor.task_queue
+        depths = _read_depths(queue, capabilities) if queue.executor is None else self.queue_depths
+        workers: Dict[Labels, float] = {}
+        busy: Dict[Labels, float] = {}
+        for capability in capabilities:
+            serving = [w for w in supervisor.workers.values() if w["healthy"] and capability in w["capabilities"]]
+            workers[(("capability", capability),)] = len(serving)
+            busy[(("capability", capability),)] = sum(w["current_task"] is not None for w in serving)
+        return {
+            "interact_queue_depth": ("Tasks queued and ready to run.", {
+                (("capability", c),): depths.get(c, 0) for c in capabilities
+            }),
+            "interact_blocked_tasks": ("Tasks waiting on dependencies.", {(): len(supervisor.blocked_tasks)}),
+            "interact_active_tasks": ("Tasks currently running.", {(): len(supervisor.active_tasks)}),
+            "interact_max_concurrent_tasks": ("Configured task concurrency limit.", {
+                (): supervisor.config["max_concurrent_tasks"]
+            }),
+            "interact_workers": ("Healthy workers serving each capability.", workers),
+            "interact_workers_busy": ("Healthy workers running a task, per capability.", busy),
+            "interact_pool_size": ("Sessions in each worker pool.", {
+                (("pool", p.id),): len(p.worker_ids) for p in supervisor.pools.values()
+            }),
+            "interact_pool_max_size": ("Configured maximum size of each worker pool.", {
+                (("pool", p.id),): p.config["max_size"] for p in supervisor.pools.values()
+            })
+        }
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current values as plain data, for logging or in-process tuning."""
+        return {
+            "counters": {
+                name: [{"labels": dict(key), "value": value} for key, value in series.items()]
+                for name, series in self.counters.items()
+            },
+            "histograms": {
+                name: [
+                    {
+                        "labels": dict(key),
+                        "count": h.count,
+                        "sum": h.sum,
+                        "mean": h.sum / h.count if h.count else 0.0,
+                        "buckets": dict(h.cumulative())
+                    }
+                    for key, h in series.items()
+                ]
+                for name, series in self.histograms.items()
+            },
+            "gauges": {
+                name: [{"labels": dict(key), "value": value} for key, value in series.items()]
+                for name, (_, series) in self.gauges().items()
+            }
+        }
+
+    def render(self) -> str:
+        """Prometheus text exposition format."""
+        lines: List[str] = []
+        for name, (help_text, series) in self.gauges().items():
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge"]
+            lines += [f"{name}{_format_labels(key)} {_format_value(value)}" for key, value in series.items()]
+        for name, series in self.counters.items():
+            lines += [f"# HELP {name} {COUNTERS[name]}", f"# TYPE {name} counter"]
+            lines += [f"{name}{_format_labels(key)} {_format_value(value)}" for key, value in series.items()]
+        for name, series in self.histograms.items():
+            lines += [f"# HELP {name} {HISTOGRAMS[name]}", f"# TYPE {name} histogram"]
+            for key, h in series.items():
+                for bound, count in h.cumulative():
+                    lines.append(f"{name}_bucket{_format_labels(key + (('le', bound),))} {count}")
+                lines.append(f"{name}_sum{_format_labels(key)} {_format_value(h.sum)}")
+                lines.append(f"{name}_count{_format_labels(key)} {h.count}")
+        return "\n".join(lines) + "\n"
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 9464) -> asyncio.AbstractServer:
+        """Answer ``GET /metrics`` over HTTP until the returned server is closed."""
+        return await asyncio.start_server(self._handle, host, port)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request = (await reader.readline()).decode("latin-1").split()
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass
+            if len(request) >= 2 and request[0] == "GET" and request[1].split("?")[0] in ("/", "/metrics"):
+                await self.refresh()
+                status, body = "200 OK", self.render().encode("utf-8")
+            else:
+                status, body = "404 Not Found", b"Not found\n"
+            writer.write(
+                f"HTTP/1.1 {status}\r\nContent-Type: {CONTENT_TYPE}\r\n"
+                f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode("latin-1") + body
+            )
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+def _read_depths(queue: Any, capabilities: List[str]) -> Dict[str, int]:
+    return {c: queue.depth(c) for c in capabilities}
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels) + "}"
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_value(value: float) -> str:
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
@@ -0,0 +1,274 @@
+
+import asyncio
+import itertools
+import json
+import os
+import socket
+import struct
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+from src.framework.core.agent import Agent, AgentConfig
+from src.framework.orchestration.router import ModelRouter
+
+# Frames are a 4-byte big-endian length followed by a UTF-8 JSON object.
+#   node -> supervisor: hello {node_id, capabilities, slots}, heartbeat {active},
+#                       result {task_id, result | error}
+#   supervisor -> node: task {task_id, task_type, input, prompt}, cancel {task_id}
+MAX_FRAME_BYTES = 64 * 1024 * 1024
+
+class WorkerLost(Exception):
+    """The remote node running a task disconnected or stopped heartbeating."""
+
+class RemoteTaskError(Exception):
+    """A task raised on the remote node."""
+
+async def send_frame(writer: asyncio.StreamWriter, message: Dict[str, Any]):
+    data = json.dumps(message, default=str).encode("utf-8")
+    writer.write(struct.pack(">I", len(data)) + data)
+    await writer.drain()
+
+async def read_frame(reader: asyncio.StreamReader) -> Optional[Dict[str, Any]]:
+    """Next message, or None once the peer closed the connection."""
+    try:
+        header = await reader.readexactly(4)
+        (length,) = struct.unpack(">I", header)
+        if length > MAX_FRAME_BYTES:
+            raise ValueError(f"Frame of {length} bytes exceeds the {MAX_FRAME_BYTES} byte limit")
+        return json.loads(await reader.readexactly(length))
+    except (asyncio.IncompleteReadError, ConnectionError):
+        return None
+
+class RemoteNode:
+    """Supervisor-side state of one connected worker node."""
+
+    def __init__(self, node_id: str, capabilities: List[str], slots: int, writer: asyncio.StreamWriter):
+        self.node_id = node_id
+        self.capabilities = capabilities
+        self.slots = slots
+        self.writer = writer
+        self.worker_ids = [f"{node_id}/{i}" for i in range(slots)]
+        self.last_seen = time.time()
+        self.pending: Dict[str, asyncio.Future] = {}
+        self._ids = itertools.count(1)
+        self.alive = True
+
+    def fail_pending(self, reason: str):
+        self.alive = False
+        for future in self.pending.values():
+            if not future.done():
+                future.set_exception(WorkerLost(f"Worker node {self.node_id} lost: {reason}"))
+        self.pending.clear()
+
+class RemoteAgent:
+    """Stands in for an Agent whose tasks run on a remote node."""
+
+    remote = True
+
+    def __init__(self, node: RemoteNode):
+        self.node = node
+        self.config: Dict[str, Any] = {}
+
+    async def run_task(self, task: Dict[str, Any], prompt: str) -> Dict[str, Any]:
+        node = self.node
+        if not node.alive:
+            raise WorkerLost(f"Worker node {node.node_id} is gone")
+        task_id = f"{node.node_id}:{next(node._ids)}"
+        future = asyncio.get_running_loop().create_future()
+        node.pending[task_id] = future
+        try:
+            await send_frame(node.writer, {
+                "type": "task",
+                "task_id": task_id,
+                "task_type": task["type"],
+                "input": task["input"],
+                "prompt": prompt
+            })
+            return await future
+        except asyncio.CancelledError:
+            # The supervisor timed out or was cancelled; stop the remote run too
+            if node.alive:
+                asyncio.ensure_future(send_frame(node.writer, {"type": "cancel", "task_id": task_id}))
+            raise
+        except ConnectionError as e:
+            raise WorkerLost(f"Worker node {node.node_id} lost: {e}") from e
+        finally:
+            node.pending.pop(task_id, None)
+
+    def reset(self):
+        pass
+
+class RemoteWorkerServer:
+    """Accepts worker nodes and exposes their slots as supervisor workers.
+
+    Each node contributes one worker per slot, so the supervisor's own
+    dispatcher hands a queued task to whichever node has a free slot first:
+    idle nodes keep pulling work from the shared queue and no node holds a
+    backlog. Nodes heartbeat every few seconds, which refreshes
+    ``last_health_check``. A node that disconnects or misses heartbeats for
+    ``heartbeat_timeout`` seconds is removed and its in-flight tasks are
+    re-queued for other nodes.
+    """
+
+    def __init__(self, supervisor: Any, heartbeat_timeout: float = 15.0):
+        self.supervisor = supervisor
+        self.heartbeat_timeout = heartbeat_timeout
+        self.nodes: Dict[str, RemoteNode] = {}
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._monitor: Optional[asyncio.Task] = None
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0, path: Optional[str] = None) -> Any:
+        """Listen on TCP ``host:port`` or a Unix socket ``path``; returns the bound address."""
+        if path:
+            self._server = await asyncio.start_unix_server(self._handle, path=path)
+        else:
+            self._server = await asyncio.start_server(self._handle, host, port)
+        self._monitor = asyncio.ensure_future(self._watch_heartbeats())
+        return self._server.sockets[0].getsockname()
+
+    async def close(self):
+        if self._monitor:
+            self._monitor.cancel()
+        for node in list(self.nodes.values()):
+            self._drop(node, "server shutting down")
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        hello = await read_frame(reader)
+        if not hello or hello.get("type") != "hello":
+            writer.close()
+            return
+
+        node = RemoteNode(hello["node_id"], hello["capabilities"], max(1, int(hello.get("slots", 1))), writer)
+        if node.node_id in self.nodes:
+            self._drop(self.nodes[node.node_id], "replaced by a new connection")
+        self.nodes[node.node_id] = node
+        agent = RemoteAgent(node)
+        for worker_id in node.worker_ids:
+            self.supervisor.workers[worker_id] = {
+                "id": worker_id,
+                "agent": agent,
+                "capabilities": node.capabilities,
+                "current_task": None,
+                "healthy": True,
+                "last_health_check": node.last_seen,
+                "pool": None
+            }
+        self.supervisor._notify()
+
+        try:
+            while True:
+                frame = await read_frame(reader)
+                if frame is None:
+                    break
+                node.last_seen = time.time()
+                if frame["type"] == "heartbeat":
+                    for worker_id in node.worker_ids:
+                        worker = self.supervisor.workers.get(worker_id)
+                        if worker:
+                            worker["last_health_check"] = node.last_seen
+                elif frame["type"] == "result":
+                    future = node.pending.get(frame["task_id"])
+                    if future and not future.done():
+                        if frame.get("error") is not None:
+                            future.set_exception(RemoteTaskError(frame["error"]))
+                        else:
+                            future.set_result(frame["result"])
+        finally:
+            self._drop(node, "connection closed")
+
+    def _drop(self, node: RemoteNode, reason: str):
+        if self.nodes.get(node.node_id) is node:
+            del self.nodes[node.node_id]
+        for worker_id in node.worker_ids:
+            worker = self.supervisor.workers.get(worker_id)
+            if worker and worker["agent"].node is node:
+                worker["healthy"] = False
+                del self.supervisor.workers[worker_id]
+        node.fail_pending(reason)
+        node.writer.close()
+
+    async def _watch_heartbeats(self):
+        while True:
+            await asyncio.sleep(self.heartbeat_timeout / 3)
+            now = time.time()
+            for node in list(self.nodes.values()):
+                if now - node.last_seen > self.heartbeat_timeout:
+                    self._drop(node, f"no heartbeat for {now - node.last_seen:.1f}s")
+
+class RemoteWorkerNode:
+    """Worker process that runs supervisor tasks sent over the wire.
+
+    Every task runs on a fresh Agent built from the config registered for
+    its task type, at most ``slots`` at a time; with a ``router`` the task
+    is cascaded through its model tiers as it would be in the supervisor.
+    """
+
+    def __init__(self, agent_configs: Dict[str, AgentConfig], slots: int = 4,
+                 node_id: Optional[str] = None, heartbeat_interval: float = 5.0,
+                 router: Optional[ModelRouter] = None):
+        self.agent_configs = agent_configs
+        self.slots = slots
+        self.router = router
+        self.node_id = node_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self.heartbeat_interval = heartbeat_interval
+        self.running: Dict[str, asyncio.Task] = {}
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    async def run(self, host: str = "127.0.0.1", port: Optional[int] = None, path: Optional[str] = None):
+        """Serve tasks until the supervisor closes the connection."""
+        self._slots = asyncio.Semaphore(self.slots)
+        if path:
+            reader, writer = await asyncio.open_unix_connection(path)
+        else:
+            reader, writer = await asyncio.open_connection(host, port)
+
+        await send_frame(writer, {
+            "type": "hello",
+            "node_id": self.node_id,
+            "capabilities": list(self.agent_configs),
+            "slots": self.slots
+        })
+        heartbeat = asyncio.ensure_future(self._heartbeat(writer))
+        try:
+            while True:
+                frame = await read_frame(reader)
+                if frame is None:
+                    break
+                if frame["type"] == "task":
+                    task = asyncio.ensure_future(self._execute(writer, frame))
+                    self.running[frame["task_id"]] = task
+                    task.add_done_callback(lambda _, task_id=frame["task_id"]: self.running.pop(task_id, None))
+                elif frame["type"] == "cancel" and frame["task_id"] in self.running:
+                    self.running[frame["task_id"]].cancel()
+        finally:
+            heartbeat.cancel()
+            for task in list(self.running.values()):
+                task.cancel()
+            writer.close()
+
+    async def _heartbeat(self, writer: asyncio.StreamWriter):
+        while True:
+            await send_frame(writer, {"type": "heartbeat", "active": len(self.running)})
+            await asyncio.sleep(self.heartbeat_interval)
+
+    async def _execute(self, writer: asyncio.StreamWriter, frame: Dict[str, Any]):
+        try:
+            async with self._slots:
+                agent = Agent({**self.agent_configs[frame["task_type"]]})
+                if self.router:
+                    task = {"id": frame["task_id"], "type": frame["task_type"], "input": frame.get("input")}
+                    result = await self.router.run(task, agent, frame["prompt"])
+                else:
+                    result = await agent.run(frame["prompt"])
+            message = {"type": "result", "task_id": frame["task_id"], "result": result}
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            message = {"type": "result", "task_id": frame["task_id"], "error": str(e) or type(e).__name__}
+        try:
+            await send_frame(writer, message)
+        except ConnectionError:
+            pass
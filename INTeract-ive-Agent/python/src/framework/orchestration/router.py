@@ -0,0 +1,127 @@
+
+import os
+import time
+from typing import Any, Callable, Dict, List, Optional, TypedDict
+from src.framework.core.agent import Agent, AgentResult
+
+class ModelTier(TypedDict):
+    name: str
+    model: str
+    max_input_chars: Optional[int] # tasks with larger inputs start at a later tier
+    task_types: Optional[List[str]] # task types this tier may handle (None: any)
+
+class TierStats(TypedDict):
+    attempts: int
+    accepted: int
+    escalated: int
+    total_seconds: float
+    input_tokens: int
+    output_tokens: int
+
+# Returns True if a tier's result is good enough to keep
+Validator = Callable[[Dict[str, Any], AgentResult], bool]
+
+def default_validator(task: Dict[str, Any], result: AgentResult) -> bool:
+    """Reject empty answers and runs cut off by max_iterations or max_tokens."""
+    return bool(result["response"].strip()) and result.get("stop_reason") not in ("tool_use", "max_tokens")
+
+def task_input_size(task: Dict[str, Any]) -> int:
+    """Characters of task input, counting the contents of any files it names."""
+    size = 0
+    values = list(task["input"].values()) if isinstance(task["input"], dict) else [task["input"]]
+    while values:
+        value = values.pop()
+        if isinstance(value, dict):
+            values.extend(value.values())
+        elif isinstance(value, list):
+            values.extend(value)
+        elif isinstance(value, str):
+            size += len(value)
+            if len(value) < 4096 and os.path.isfile(value):
+                size += os.path.getsize(value)
+        else:
+            size += len(str(value))
+    return size
+
+class ModelRouter:
+    """Cascades subagent tasks from cheaper to larger models.
+
+    ``tiers`` are ordered cheapest first. A task starts at the first tier that
+    accepts its type and input size, runs on a copy of the worker's agent with
+    that tier's model, and escalates to the next tier whenever the result
+    fails validation (by default: empty, or cut off by ``max_iterations`` or
+    ``max_tokens``). Per-tier attempts, acceptances and latency are tracked
+    so the cascade can be tuned.
+    """
+
+    def __init__(self, tiers: List[ModelTier], validators: Optional[Dict[str, Validator]] = None):
+        if not tiers:
+            raise ValueError("ModelRouter needs at least one tier")
+        self.tiers = tiers
+        self.validators = validators or {}
+        self.tier_stats: Dict[str, TierStats] = {
+            tier["name"]: {
+                "attempts": 0,
+                "accepted": 0,
+                "escalated": 0,
+                "total_seconds": 0.0,
+                "input_tokens": 0,
+                "output_tokens": 0
+            }
+            for tier in tiers
+        }
+
+    def route(self, task: Dict[str, Any]) -> int:
+        """Index of the cheapest tier eligible for ``task``."""
+        size = task_input_size(task)
+        for i, tier in enumerate(self.tiers):
+            if tier.get("task_types") is not None and task["type"] not in tier["task_types"]:
+                continue
+            if tier.get("max_input_chars") is not None and size > tier["max_input_chars"]:
+                continue
+            return i
+        return len(self.tiers) - 1
+
+    def agent_for(self, base: Agent, tier_index: int) -> Agent:
+        # A fresh conversation per attempt; tools, prompt and limits are shared
+        return Agent({**base.config, "model": self.tiers[tier_index]["model"]})
+
+    async def run(self, task: Dict[str, Any], base: Agent, prompt: str, first_response: Optional[Any] = None) -> AgentResult:
+        """Run ``task`` from its routed tier, escalating until a result validates.
+
+        ``first_response`` answers the first request of the routed tier, as
+        in batch mode where it was built with ``agent_for(base, route(task))``.
+        """
+        validate = self.validators.get(task["type"], default_validator)
+        start = self.route(task)
+        result: Optional[AgentResult] = None
+
+        for i in range(start, len(self.tiers)):
+            stats = self.tier_stats[self.tiers[i]["name"]]
+            stats["attempts"] += 1
+            started = time.monotonic()
+            try:
+                result = await self.agent_for(base, i).run(prompt, first_response if i == start else None)
+            finally:
+                stats["total_seconds"] += time.monotonic() - started
+            stats["input_tokens"] += result["total_tokens"]["input"]
+            stats["output_tokens"] += result["total_tokens"]["output"]
+
+            if validate(task, result):
+                stats["accepted"] += 1
+                return result
+            if i < len(self.tiers) - 1:
+                stats["escalated"] += 1
+
+        # Nothing validated; the largest model's answer is the best we have
+        return result
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        return {
+            name: {
+                **stats,
+                "hit_rate": stats["accepted"] / stats["attempts"] if stats["attempts"] else 0.0,
+                "avg_seconds": stats["total_seconds"] / stats["attempts"] if stats["attempts"] else 0.0
+            }
+            for name, stats in self.tier_stats.items()
+        }
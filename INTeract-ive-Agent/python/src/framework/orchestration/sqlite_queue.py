@@ -0,0 +1,257 @@
+
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id TEXT PRIMARY KEY,
+    type TEXT NOT NULL,
+    priority INTEGER NOT NULL,
+    seq INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    data TEXT NOT NULL,
+    lease_owner TEXT,
+    lease_expires REAL,
+    result TEXT,
+    error TEXT,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS tasks_ready ON tasks (status, type, priority DESC, seq);
+CREATE INDEX IF NOT EXISTS tasks_leases ON tasks (status, lease_expires);
+"""
+
+# Pending tasks, plus leased ones whose holder let the lease expire. Only for
+# lookups by ID and whole-queue reads; per-type queries use one state at a
+# time so they stay on tasks_ready.
+CLAIMABLE = "(status = 'pending' OR (status = 'leased' AND lease_expires < ?))"
+
+# Each distinct pending type via one index seek per type, instead of a DISTINCT
+# over every pending row
+PENDING_TYPES = """
+WITH RECURSIVE types(type) AS (
+    SELECT MIN(type) FROM tasks WHERE status = 'pending'
+    UNION ALL
+    SELECT (SELECT MIN(type) FROM tasks WHERE status = 'pending' AND type > types.type)
+    FROM types WHERE types.type IS NOT NULL
+)
+SELECT type FROM types WHERE type IS NOT NULL
+"""
+
+class SQLiteTaskQueue:
+    """Durable supervisor task queue shared through a SQLite file.
+
+    A drop-in replacement for ``TaskQueue``. Tasks are claimed with a lease:
+    a claimed task is invisible to other processes until it completes or its
+    lease expires (``lease_seconds``, which should exceed the supervisor's
+    task timeout), after which any process may claim it again. Completed and
+    failed tasks keep their result, so a restarted supervisor resumes with
+    the remaining work and the finished results. The database runs in WAL
+    mode so many processes on one host can share it.
+
+    Write transactions can wait up to ``busy_timeout`` for another process,
+    so the supervisor runs them on ``executor``, a single thread, instead of
+    the event loop. A running task's lease is renewed by the supervisor
+    while it works, and tasks finished by other processes are picked up
+    every ``poll_interval`` seconds.
+    """
+
+    def __init__(self, path: str, lease_seconds: float = 600.0, owner: Optional[str] = None,
+                 poll_interval: float = 1.0):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.owner = owner or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite-task-queue")
+        # One connection per thread; sqlite3 connections must not be shared mid-transaction
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self._db.executescript(SCHEMA)
+
+    @property
+    def _db(self) -> sqlite3.Connection:
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute("PRAGMA busy_timeout=5000")
+            self._local.db = db
+            with self._lock:
+                self._connections.append(db)
+        return db
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        # IMMEDIATE takes the write lock up front, so two processes can never
+        # claim the same task
+        db = self._db
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            yield db
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        db.execute("COMMIT")
+
+    def push(self, task: Dict[str, Any], front: bool = False):
+        self.push_many([task], front)
+
+    def push_many(self, tasks: List[Dict[str, Any]], front: bool = False):
+        """Insert (or re-queue) tasks in one transaction."""
+        now = time.time()
+        base = time.time_ns()
+        rows = [
+            (
+                task["id"], task["type"], task["priority"],
+                -(base + i) if front else base + i,
+                json.dumps(task, default=str), now
+            )
+            for i, task in enumerate(tasks)
+        ]
+        with self._transaction() as db:
+            db.executemany(
+                "INSERT OR REPLACE INTO tasks (id, type, priority, seq, status, data, updated_at) "
+                "VALUES (?, ?, ?, ?, 'pending', ?, ?)",
+                rows
+            )
+
+    def _reclaim_expired(self, db: sqlite3.Connection, now: float):
+        # Leases whose holder stopped renewing go back to pending, so claims
+        # only ever read pending rows
+        db.execute(
+            "UPDATE tasks SET status = 'pending', lease_owner = NULL, lease_expires = NULL, updated_at = ? "
+            "WHERE status = 'leased' AND lease_expires < ?",
+            (now, now)
+        )
+
+    def pop_ready(self, can_run: Callable[[str], bool]) -> Optional[Dict[str, Any]]:
+        """Lease the best claimable task among the types ``can_run`` accepts."""
+        now = time.time()
+        with self._transaction() as db:
+            self._reclaim_expired(db, now)
+            best = None
+            for (task_type,) in db.execute(PENDING_TYPES).fetchall():
+                if not can_run(task_type):
+                    continue
+                # The head of each type's index range; no sort needed
+                row = db.execute(
+                    "SELECT priority, seq, id, data FROM tasks WHERE status = 'pending' AND type = ? "
+                    "ORDER BY priority DESC, seq LIMIT 1",
+                    (task_type,)
+                ).fetchone()
+                if row and (best is None or (-row[0], row[1]) < (-best[0], best[1])):
+                    best = row
+            if best is None:
+                return None
+            db.execute(
+                "UPDATE tasks SET status = 'leased', lease_owner = ?, lease_expires = ?, updated_at = ? WHERE id = ?",
+                (self.owner, now + self.lease_seconds, now, best[2])
+            )
+        return json.loads(best[3])
+
+    def complete(self, task: Dict[str, Any]) -> bool:
+        """Store the outcome of a task this process leased and release the lease.
+
+        False if the lease was lost (it expired and the task was reclaimed),
+        in which case the outcome is not stored.
+        """
+        with self._transaction() as db:
+            cursor = db.execute(
+                "UPDATE tasks SET status = ?, data = ?, result = ?, error = ?, lease_owner = NULL, "
+                "lease_expires = NULL, updated_at = ? WHERE id = ? AND status = 'leased' AND lease_owner = ?",
+                (
+                    task["status"], json.dumps(task, default=str), json.dumps(task.get("result"), default=str),
+                    task.get("error"), time.time(), task["id"], self.owner
+                )
+            )
+        return cursor.rowcount == 1
+
+    def renew(self, task_id: str) -> bool:
+        """Extend this process's lease on a running task; False if it was lost."""
+        now = time.time()
+        with self._transaction() as db:
+            cursor = db.execute(
+                "UPDATE tasks SET lease_expires = ?, updated_at = ? "
+                "WHERE id = ? AND status = 'leased' AND lease_owner = ?",
+                (now + self.lease_seconds, now, task_id, self.owner)
+            )
+        return cursor.rowcount == 1
+
+    def completed(self) -> Dict[str, Dict[str, Any]]:
+        """Every finished task, for a restarted supervisor."""
+        rows = self._db.execute("SELECT id, data FROM tasks WHERE status IN ('completed', 'failed')")
+        return {task_id: json.loads(data) for task_id, data in rows}
+
+    def finished(self, task_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Those of ``task_ids`` that finished, including in other processes."""
+        found: Dict[str, Dict[str, Any]] = {}
+        # Stay well below SQLite's bound-parameter limit
+        for start in range(0, len(task_ids), 500):
+            chunk = task_ids[start:start + 500]
+            rows = self._db.execute(
+                f"SELECT id, data FROM tasks WHERE status IN ('completed', 'failed') "
+                f"AND id IN ({','.join('?' * len(chunk))})",
+                chunk
+            )
+            found.update((task_id, json.loads(data)) for task_id, data in rows)
+        return found
+
+    def depth(self, task_type: str) -> int:
+        pending, expired = self._db.execute(
+            "SELECT (SELECT COUNT(*) FROM tasks WHERE status = 'pending' AND type = ?), "
+            "(SELECT COUNT(*) FROM tasks WHERE status = 'leased' AND type = ? AND lease_expires < ?)",
+            (task_type, task_type, time.time())
+        ).fetchone()
+        return pending + expired
+
+    def get(self, task_id: str) -> Optional[Dict[str, Any]]:
+        row = self._db.execute(
+            f"SELECT data FROM tasks WHERE id = ? AND {CLAIMABLE}", (task_id, time.time())
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def drain(self) -> List[Dict[str, Any]]:
+        """Lease and return every claimable task, best first."""
+        now = time.time()
+        with self._transaction() as db:
+            self._reclaim_expired(db, now)
+            rows = db.execute(
+                "SELECT id, data FROM tasks WHERE status = 'pending' ORDER BY priority DESC, seq"
+            ).fetchall()
+            db.executemany(
+                "UPDATE tasks SET status = 'leased', lease_owner = ?, lease_expires = ?, updated_at = ? WHERE id = ?",
+                [(self.owner, now + self.lease_seconds, now, task_id) for task_id, _ in rows]
+            )
+        return [json.loads(data) for _, data in rows]
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+        with self._lock:
+            for db in self._connections:
+                db.close()
+            self._connections.clear()
+        self._local = threading.local()
+
+    def __contains__(self, task_id: str) -> bool:
+        """Whether ``task_id`` is queued or running anywhere."""
+        row = self._db.execute(
+            "SELECT 1 FROM tasks WHERE id = ? AND status IN ('pending', 'leased')", (task_id,)
+        ).fetchone()
+        return row is not None
+
+    def __len__(self) -> int:
+        return self._db.execute(f"SELECT COUNT(*) FROM tasks WHERE {CLAIMABLE}", (time.time(),)).fetchone()[0]
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        rows = self._db.execute(f"SELECT data FROM tasks WHERE {CLAIMABLE}", (time.time(),)).fetchall()
+        return iter([json.loads(data) for (data,) in rows])
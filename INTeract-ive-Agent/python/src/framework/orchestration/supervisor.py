@@ -2,8 +2,19 @@
 import asyncio
 import time
 import json
+from functools import partial
 from typing import TypedDict, Optional, Dict, List, Any
-from src.framework.core.agent import Agent
+from src.framework.core.agent import Agent, AgentConfig
+from src.framework.core.client import get_shared_client
+from src.framework.orchestration.router import ModelRouter
+from src.framework.orchestration.metrics import SupervisorMetrics
+from src.framework.orchestration.hedging import DEFAULT_HEDGE_CONFIG, HedgeConfig, LatencyTracker
+from src.framework.orchestration.task_queue import TaskQueue
+from src.framework.orchestration.worker_pool import PoolConfig, WorkerPool
+from src.framework.orchestration.remote import RemoteWorkerServer, WorkerLost
+from src.framework.orchestration.batch import BatchCheckpoint, BatchConfig, DEFAULT_BATCH_CONFIG, wait_for_batch
+from src.framework.resilience.rate_limiter import request_priority
+from src.framework.resilience.retry import task_deadline, with_retry
 
 # Type definitions
 TaskStatus = str # 'pending' | 'running' | 'completed' | 'failed' | 'cancelled';
@@ -20,6 +31,8 @@ class Task(TypedDict):
     started_at: Optional[float]
     completed_at: Optional[float]
     retry_count: int
+    depends_on: List[str] # IDs of tasks whose results this task needs
+    upstream_results: Dict[str, Any] # results of depends_on, filled in when they finish
 
 class WorkerAgent(TypedDict):
     id: str
@@ -28,6 +41,7 @@ class WorkerAgent(TypedDict):
     current_task: Optional[Task]
     healthy: bool
     last_health_check: float
+    pool: Optional[str] # owning WorkerPool, if the worker is a pooled session
 
 class SupervisorConfig(TypedDict):
     max_concurrent_tasks: int
@@ -35,17 +49,36 @@ class SupervisorConfig(TypedDict):
     max_retries: int
 
 class SupervisorAgent:
-    def __init__(self, config: Optional[SupervisorConfig] = None):
+    def __init__(self, config: Optional[SupervisorConfig] = None, router: Optional[ModelRouter] = None,
+                 task_queue: Optional[Any] = None, hedging: Optional[HedgeConfig] = None):
         self.config = config or {
             "max_concurrent_tasks": 5,
             "task_timeout_ms": 30000,
             "max_retries": 3
         }
         self.workers: Dict[str, WorkerAgent] = {}
-        self.task_queue: List[Task] = []
+        self.pools: Dict[str, WorkerPool] = {}
+        # TaskQueue in memory, or a durable SQLiteTaskQueue shared across processes
+        self.task_queue = task_queue if task_queue is not None else TaskQueue()
         self.active_tasks: Dict[str, Task] = {}
-        self.completed_tasks: Dict[str, Task] = {}
+        self.completed_tasks: Dict[str, Task] = dict(self.task_queue.completed())
+        # Tasks waiting for dependencies, and the reverse edges that release them
+        self.blocked_tasks: Dict[str, Task] = {}
+        self.dependents: Dict[str, List[str]] = {}
+        # Resolved with the task once it completes or fails
+        self._waiters: Dict[str, asyncio.Future] = {}
+        self._last_poll = 0.0
         self.is_running = False
+        # Wakes the dispatch loop on submit, completion and worker changes
+        self._changed = asyncio.Condition()
+        self._background: set = set()
+        # Picks a model tier per task and escalates failed cheap attempts
+        self.router = router
+        # Speculative duplicates for stragglers; off unless a HedgeConfig is given
+        self.hedging: Optional[HedgeConfig] = {**DEFAULT_HEDGE_CONFIG, **hedging} if hedging is not None else None
+        self.latency = LatencyTracker((self.hedging or DEFAULT_HEDGE_CONFIG)["window"])
+        self.hedge_stats = {"hedged": 0, "won": 0}
+        self.metrics = SupervisorMetrics(self)
 
     def register_worker(self, id: str, agent: Agent, capabilities: List[str]):
         self.workers[id] = {
@@ -54,10 +87,56 @@ class SupervisorAgent:
             "capabilities": capabilities,
             "current_task": None,
             "healthy": True,
-            "last_health_check": time.time()
+            "last_health_check": time.time(),
+            "pool": None
         }
+        self._notify()
+
+    def register_pool(self, id: str, agent_config: AgentConfig, capabilities: List[str], config: Optional[PoolConfig] = None):
+        """Serve ``capabilities`` from an elastic pool of isolated agent sessions."""
+        pool = WorkerPool(id, agent_config, capabilities, config)
+        self.pools[id] = pool
+        for _ in range(pool.config["min_size"]):
+            self._add_pool_worker(pool)
+        self._notify()
+
+    async def accept_remote_workers(self, host: str = "127.0.0.1", port: int = 0, path: Optional[str] = None,
+                                    heartbeat_timeout: float = 15.0) -> RemoteWorkerServer:
+        """Let RemoteWorkerNode processes connect over TCP or a Unix socket and take tasks."""
+        server = RemoteWorkerServer(self, heartbeat_timeout)
+        await server.start(host, port, path)
+        return server
+
+    def _add_pool_worker(self, pool: WorkerPool) -> WorkerAgent:
+        worker_id, agent = pool.new_session()
+        self.workers[worker_id] = {
+            "id": worker_id,
+            "agent": agent,
+            "capabilities": pool.capabilities,
+            "current_task": None,
+            "healthy": True,
+            "last_health_check": time.time(),
+            "pool": pool.id
+        }
+        return self.workers[worker_id]
 
     async def submit_task(self, task_input: Dict[str, Any]) -> str:
+        return (await self.submit_tasks([task_input]))[0]
+
+    async def submit_tasks(self, task_inputs: List[Dict[str, Any]]) -> List[str]:
+        """Submit several tasks; ready ones are queued in a single batch."""
+        ready: List[Task] = []
+        for task_input in task_inputs:
+            task = self._new_task(task_input)
+            self.metrics.inc("interact_tasks_submitted_total", capability=task["type"])
+            if await self._resolve_dependencies(task):
+                ready.append(task)
+        if ready:
+            await self._queue("push_many", ready)
+            await self._wake()
+        return [task_input["id"] for task_input in task_inputs]
+
+    def _new_task(self, task_input: Dict[str, Any]) -> Task:
         task: Task = {
             "id": task_input["id"],
             "type": task_input["type"],
@@ -69,19 +148,176 @@ class SupervisorAgent:
             "created_at": time.time(),
             "started_at": None,
             "completed_at": None,
-            "retry_count": 0
+            "retry_count": 0,
+            "depends_on": list(task_input.get("depends_on", [])),
+            "upstream_results": {}
         }
-        
-        inserted = False
-        for i, t in enumerate(self.task_queue):
-            if t["priority"] < task["priority"]:
-                self.task_queue.insert(i, task)
-                inserted = True
-                break
-        if not inserted:
-            self.task_queue.append(task)
-            
-        return task["id"]
+        # A re-submitted ID replaces the previous run's outcome
+        self.completed_tasks.pop(task["id"], None)
+        return task
+
+    async def _resolve_dependencies(self, task: Task) -> bool:
+        """True if ``task`` can be queued now; otherwise it is blocked or failed."""
+        waiting = False
+        for dep_id in task["depends_on"]:
+            dep = self.completed_tasks.get(dep_id)
+            if dep is None:
+                self.dependents.setdefault(dep_id, []).append(task["id"])
+                waiting = True
+            elif dep["status"] == "completed":
+                task["upstream_results"][dep_id] = dep["result"]
+            else:
+                await self._fail_task(task, f"Upstream task {dep_id} failed")
+                return False
+
+        if waiting:
+            self.blocked_tasks[task["id"]] = task
+            return False
+        return True
+
+    async def submit_graph(self, nodes: List[Dict[str, Any]]) -> List[str]:
+        """Submit a task graph; each node may list ``depends_on`` task IDs.
+
+        A node becomes ready as soon as all of its dependencies completed and
+        receives their results as ``upstream_results``. If a dependency fails,
+        everything downstream of it fails without running. Dependencies must
+        be nodes of the graph or tasks already submitted, and may not form a
+        cycle.
+        """
+        ids = [node["id"] for node in nodes]
+        if len(set(ids)) != len(ids):
+            raise ValueError("Task graph has duplicate task IDs")
+        graph_ids = set(ids)
+        known = set(self.completed_tasks) | set(self.active_tasks) | set(self.blocked_tasks)
+
+        indegree = {node["id"]: 0 for node in nodes}
+        edges: Dict[str, List[str]] = {}
+        for node in nodes:
+            for dep_id in node.get("depends_on", []):
+                if dep_id in graph_ids:
+                    indegree[node["id"]] += 1
+                    edges.setdefault(dep_id, []).append(node["id"])
+                elif (dep_id not in known and dep_id not in self.task_queue and
+                      not await self._queue("finished", [dep_id])):
+                    raise ValueError(f"Task {node['id']} depends on unknown task {dep_id}")
+
+        # Kahn's algorithm: anything never reaching indegree 0 is on a cycle
+        ready = [node_id for node_id, degree in indegree.items() if degree == 0]
+        order: List[str] = []
+        while ready:
+            node_id = ready.pop()
+            order.append(node_id)
+            for child in edges.get(node_id, []):
+                indegree[child] -= 1
+                if indegree[child] == 0:
+                    ready.append(child)
+        if len(order) != len(nodes):
+            raise ValueError("Task graph contains a cycle")
+
+        by_id = {node["id"]: node for node in nodes}
+        return [await self.submit_task(by_id[node_id]) for node_id in order]
+
+    async def run_graph(self, nodes: List[Dict[str, Any]]) -> Dict[str, Task]:
+        """Submit a task graph, run it to completion and return its tasks."""
+        self._reject_unserviceable(nodes)
+        ids = await self.submit_graph(nodes)
+        return await self._wait_all(ids)
+
+    async def run_tasks(self, task_inputs: List[Dict[str, Any]]) -> Dict[str, Task]:
+        """Submit independent tasks together and wait for all of them.
+
+        Safe to call concurrently: every caller waits on its own tasks'
+        futures while a single dispatch loop serves them all.
+        """
+        self._reject_unserviceable(task_inputs)
+        ids = await self.submit_tasks(task_inputs)
+        return await self._wait_all(ids)
+
+    async def wait_for_task(self, task_id: str) -> Task:
+        """Wait until ``task_id`` completed or failed, dispatching as needed."""
+        pending = (task_id in self.active_tasks or task_id in self.blocked_tasks or
+                   task_id in self.task_queue)
+        if not pending:
+            if task_id in self.completed_tasks:
+                return self.completed_tasks[task_id]
+            # A shared queue may hold tasks that other processes finished
+            finished = (await self._queue("finished", [task_id])).get(task_id)
+            if finished is None:
+                raise KeyError(f"Unknown task {task_id}")
+            self.completed_tasks[task_id] = finished
+            return finished
+        future = self._waiters.get(task_id)
+        if future is None:
+            future = self._waiters[task_id] = asyncio.get_running_loop().create_future()
+        if not self.is_running:
+            self._spawn(self.orchestrate())
+        return await asyncio.shield(future)
+
+    async def _wait_all(self, ids: List[str]) -> Dict[str, Task]:
+        tasks = await asyncio.gather(*(self.wait_for_task(task_id) for task_id in ids))
+        return dict(zip(ids, tasks))
+
+    def _reject_unserviceable(self, task_inputs: List[Dict[str, Any]]):
+        # Such tasks would never be dispatched, so their futures would never resolve
+        capabilities = {c for w in self.workers.values() for c in w["capabilities"]}
+        capabilities |= {c for p in self.pools.values() for c in p.capabilities}
+        missing = sorted({t["type"] for t in task_inputs} - capabilities)
+        if missing:
+            raise ValueError(f"No worker registered for task type(s): {', '.join(missing)}")
+
+    async def _finish_task(self, task: Task):
+        if not await self._queue("complete", task) and task["started_at"] is not None:
+            # The lease ran out mid-run and another process reclaimed the task;
+            # its outcome is the one stored, ours still answers local waiters
+            self.metrics.inc("interact_task_leases_lost_total", capability=task["type"])
+        self.metrics.inc("interact_tasks_finished_total", capability=task["type"], status=task["status"])
+        await self._settle_task(task)
+
+    async def _settle_task(self, task: Task):
+        """Record a finished task, release its dependents and resolve its waiter."""
+        self.completed_tasks[task["id"]] = task
+        await self._release_dependents(task)
+        future = self._waiters.pop(task["id"], None)
+        if future is not None and not future.done():
+            future.set_result(task)
+
+    async def _collect_finished(self):
+        """Adopt awaited tasks that another process sharing the queue finished."""
+        self._last_poll = time.monotonic()
+        local = self.active_tasks.keys() | self.blocked_tasks.keys() | self.completed_tasks.keys()
+        awaited = [task_id for task_id in {*self._waiters, *self.dependents} if task_id not in local]
+        if not awaited:
+            return
+        for task in (await self._queue("finished", awaited)).values():
+            await self._settle_task(task)
+
+    async def _queue(self, method: str, *args: Any) -> Any:
+        """Call a task queue method, off the event loop if the queue can block."""
+        fn = getattr(self.task_queue, method)
+        if self.task_queue.executor is None:
+            return fn(*args)
+        return await asyncio.get_running_loop().run_in_executor(self.task_queue.executor, partial(fn, *args))
+
+    async def _release_dependents(self, task: Task):
+        """Queue (or fail) the tasks that were waiting on ``task``."""
+        for dependent_id in self.dependents.pop(task["id"], []):
+            dependent = self.blocked_tasks.get(dependent_id)
+            if dependent is None:
+                continue
+            if task["status"] != "completed":
+                del self.blocked_tasks[dependent_id]
+                await self._fail_task(dependent, f"Upstream task {task['id']} failed")
+                continue
+            dependent["upstream_results"][task["id"]] = task["result"]
+            if all(dep_id in dependent["upstream_results"] for dep_id in dependent["depends_on"]):
+                del self.blocked_tasks[dependent_id]
+                await self._queue("push", dependent)
+
+    async def _fail_task(self, task: Task, error: str):
+        task["status"] = "failed"
+        task["error"] = error
+        task["completed_at"] = time.time()
+        await self._finish_task(task)
 
     async def orchestrate(self):
         if self.is_running:
@@ -89,27 +325,111 @@ class SupervisorAgent:
         
         self.is_running = True
         try:
-            while self.task_queue or self.active_tasks:
-                
-                while self.task_queue and len(self.active_tasks) < self.config["max_concurrent_tasks"]:
-                    task = self.task_queue[0]
-                    worker = self._select_worker(task)
-                    
-                    if not worker:
+            async with self._changed:
+                while True:
+                    await self._dispatch()
+                    if not self.active_tasks and not self._waiters:
+                        # Nothing running and nobody waiting on what is left
                         break
-                    
-                    self.task_queue.pop(0)
-                    asyncio.create_task(self._start_task(task, worker))
-                    
-                if self.active_tasks:
-                    # Yield control to let tasks run
-                    await asyncio.sleep(0.1)
-                else:
-                    break
+                    await self._wait_for_change()
 
         finally:
             self.is_running = False
 
+    async def serve(self, poll_interval: float = 1.0, stop: Optional[asyncio.Event] = None):
+        """Keep pulling work from a queue that other processes also feed.
+
+        ``orchestrate`` only wakes for tasks submitted in this process; with a
+        shared SQLiteTaskQueue this polls for new or lease-expired tasks
+        whenever the supervisor is idle.
+        """
+        stop = stop or asyncio.Event()
+        while not stop.is_set():
+            await self.orchestrate()
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _wait_for_change(self):
+        """Wait for a wake-up; shared queues are also polled for outside changes."""
+        poll = self.task_queue.poll_interval
+        if poll is None:
+            await self._changed.wait()
+            return
+        try:
+            await asyncio.wait_for(self._changed.wait(), timeout=poll)
+        except asyncio.TimeoutError:
+            pass
+        if time.monotonic() - self._last_poll >= poll:
+            await self._collect_finished()
+
+    async def _wake(self):
+        async with self._changed:
+            self._changed.notify_all()
+
+    def _notify(self):
+        """Wake the dispatch loop from sync code."""
+        if self.is_running:
+            self._spawn(self._wake())
+
+    def _spawn(self, coro: Any) -> asyncio.Task:
+        # Keep a reference so pending tasks are not garbage collected
+        task = asyncio.ensure_future(coro)
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+        return task
+
+    async def _dispatch(self):
+        while len(self.active_tasks) < self.config["max_concurrent_tasks"]:
+            idle = {
+                capability
+                for worker in self.workers.values()
+                if worker["healthy"] and worker["current_task"] is None
+                for capability in worker["capabilities"]
+            }
+            growable = {
+                capability
+                for pool in self.pools.values() if pool.can_grow()
+                for capability in pool.capabilities
+            }
+            task = await self._queue("pop_ready", lambda task_type: task_type in idle or task_type in growable)
+            if task is None:
+                break
+
+            worker = self._select_worker(task) or self._grow_pool(task["type"])
+            if worker is None:
+                # A hedge took the last free worker while the queue was being read
+                await self._queue("push", task, True)
+                break
+            if task["started_at"] is None:
+                self.metrics.observe("interact_task_wait_seconds", time.time() - task["created_at"], capability=task["type"])
+            task["status"] = "running"
+            task["started_at"] = time.time()
+            worker["current_task"] = task
+            self.active_tasks[task["id"]] = task
+            self._spawn(self._start_task(task, worker))
+
+        await self._shrink_pools()
+
+    def _grow_pool(self, task_type: str) -> Optional[WorkerAgent]:
+        pool = next((p for p in self.pools.values() if task_type in p.capabilities and p.can_grow()), None)
+        return self._add_pool_worker(pool) if pool else None
+
+    async def _shrink_pools(self):
+        for pool in list(self.pools.values()):
+            if not pool.surplus_idle(self._idle_pool_workers(pool), time.monotonic()):
+                continue
+            if any([await self._queue("depth", c) for c in pool.capabilities]):
+                continue
+            # Workers may have been handed tasks while the queue was read
+            for worker_id in pool.surplus_idle(self._idle_pool_workers(pool), time.monotonic()):
+                pool.remove(worker_id)
+                del self.workers[worker_id]
+
+    def _idle_pool_workers(self, pool: WorkerPool) -> List[str]:
+        return [w for w in pool.worker_ids if self.workers[w]["current_task"] is None]
+
     def _select_worker(self, task: Task) -> Optional[WorkerAgent]:
         for worker in self.workers.values():
             if (worker["healthy"] and 
@@ -119,43 +439,285 @@ class SupervisorAgent:
         return None
 
     async def _start_task(self, task: Task, worker: WorkerAgent):
-        task["status"] = "running"
-        task["started_at"] = time.time()
-        worker["current_task"] = task
-        self.active_tasks[task["id"]] = task
+        # Worker API calls are admitted by the rate limiter at the task's priority
+        # and only retried while the task timeout leaves room for it
+        request_priority.set(task["priority"])
+        task_deadline.set(time.monotonic() + self.config["task_timeout_ms"] / 1000.0)
 
+        started = time.monotonic()
+        outcome = "completed"
+        lease = self.task_queue.lease_seconds
+        renewer = self._spawn(self._renew_lease(task, lease)) if lease else None
         try:
-            # Prepare prompt for subagent
-            if isinstance(task["input"], dict):
-                prompt = json.dumps(task["input"])
-            else:
-                prompt = str(task["input"])
-
             result = await asyncio.wait_for(
-                worker["agent"].run(prompt),
+                self._run_hedged(task, worker),
                 timeout=self.config["task_timeout_ms"] / 1000.0
             )
             task["status"] = "completed"
             task["result"] = result["response"] # Use the text response
             task["completed_at"] = time.time()
+            self.latency.record(task["type"], time.monotonic() - started)
+        except asyncio.CancelledError:
+            if asyncio.current_task().cancelling():
+                raise
+            # A worker leaked a cancellation that was not aimed at this run;
+            # fail the task rather than let it vanish from every table
+            outcome = "failed"
+            task["status"] = "failed"
+            task["error"] = "Task run was cancelled"
+            task["completed_at"] = time.time()
         except Exception as e:
             error_msg = str(e)
+            # A lost node's tasks go to other nodes, but that spends a retry
+            # too, so a task that keeps taking nodes down eventually fails
             if task["retry_count"] < self.config["max_retries"]:
+                outcome = "lost" if isinstance(e, WorkerLost) else "retried"
                 task["retry_count"] += 1
                 task["status"] = "pending"
-                self.task_queue.insert(0, task)
+                await self._queue("push", task, True)
             else:
+                outcome = "failed"
                 task["status"] = "failed"
                 task["error"] = error_msg
                 task["completed_at"] = time.time()
         finally:
-            worker["current_task"] = None
+            if renewer:
+                renewer.cancel()
+            self.metrics.record_run(task, worker, time.monotonic() - started, outcome)
+            self._release_worker(worker)
             if task["status"] in ["completed", "failed"]:
-                self.completed_tasks[task["id"]] = task
+                await self._finish_task(task)
             if task["id"] in self.active_tasks:
                 del self.active_tasks[task["id"]]
+            await self._wake()
     
+    async def _renew_lease(self, task: Task, lease_seconds: float):
+        """Keep a shared queue from handing a long-running task to another process."""
+        while True:
+            await asyncio.sleep(lease_seconds / 3)
+            await self._queue("renew", task["id"])
+
+    def _release_worker(self, worker: WorkerAgent):
+        worker["current_task"] = None
+        pool = self.pools.get(worker["pool"] or "")
+        if pool and worker["id"] in pool.idle_since:
+            # Pooled sessions start every task with a clean conversation
+            worker["agent"].reset()
+            pool.idle_since[worker["id"]] = time.monotonic()
+            if pool.config["min_size"] < len(pool.worker_ids):
+                asyncio.get_running_loop().call_later(pool.config["idle_timeout"], self._notify)
+
+    async def _run_hedged(self, task: Task, worker: WorkerAgent) -> Any:
+        """Run a task, duplicating it on a second worker if it straggles.
+
+        Once the run outlasts the configured percentile of its capability's
+        recent run times, a copy starts on another idle worker. The first
+        attempt to succeed wins and the other is cancelled. Duplicates do
+        not count toward ``max_concurrent_tasks``.
+        """
+        delay = None
+        if self.hedging:
+            delay = self.latency.percentile(task["type"], self.hedging["percentile"], self.hedging["min_samples"])
+        if delay is None:
+            return await self._run_agent(task, worker["agent"])
+
+        primary = asyncio.ensure_future(self._run_agent(task, worker["agent"]))
+        attempts = {primary}
+        backup: Optional[WorkerAgent] = None
+        try:
+            # Look again every ``delay`` while no worker can take the duplicate
+            while not backup and not (await asyncio.wait(attempts, timeout=delay))[0]:
+                backup = await self._hedge_worker(task)
+            if backup:
+                backup["current_task"] = task
+                hedged_at = time.monotonic()
+                self.hedge_stats["hedged"] += 1
+                self.metrics.inc("interact_task_hedges_total", capability=task["type"])
+                attempts.add(asyncio.ensure_future(self._run_agent(task, backup["agent"])))
+
+            error: Optional[BaseException] = None
+            while attempts:
+                done, attempts = await asyncio.wait(attempts, return_when=asyncio.FIRST_COMPLETED)
+                for attempt in done:
+                    if attempt.exception() is None:
+                        if attempt is not primary:
+                            self.hedge_stats["won"] += 1
+                        return attempt.result()
+                    error = attempt.exception()
+            raise error
+        finally:
+            for attempt in attempts:
+                attempt.cancel()
+            if backup:
+                self.metrics.record_run(task, backup, time.monotonic() - hedged_at, "hedge")
+                self._release_worker(backup)
+
+    async def _hedge_worker(self, task: Task) -> Optional[WorkerAgent]:
+        if (len(self.active_tasks) < self.config["max_concurrent_tasks"] and
+                await self._queue("depth", task["type"])):
+            # Queued tasks of the same type get free workers before duplicates do
+            return None
+        worker = self._select_worker(task)
+        if worker is None and any(task["type"] in p.capabilities and p.can_grow() for p in self.pools.values()):
+            worker = self._grow_pool(task["type"])
+        return worker
+
+    def _task_prompt(self, task: Task) -> str:
+        # Prepare prompt for subagent
+        upstream = task.get("upstream_results")
+        if isinstance(task["input"], dict):
+            return json.dumps({**task["input"], "upstream_results": upstream} if upstream else task["input"])
+        if upstream:
+            return f"{task['input']}\n\nResults of the tasks this one depends on:\n{json.dumps(upstream, indent=2)}"
+        return str(task["input"])
+
+    async def _run_agent(self, task: Task, agent: Agent, first_response: Optional[Any] = None) -> Any:
+        if getattr(agent, "remote", False):
+            # The node builds the agent from its own config, and routes the
+            # task if it was started with a ModelRouter
+            return await agent.run_task(task, self._task_prompt(task))
+        if self.router:
+            return await self.router.run(task, agent, self._task_prompt(task), first_response)
+        return await agent.run(self._task_prompt(task), first_response)
+
+    async def run_batch(self, batch_client: Any = None, config: Optional[BatchConfig] = None) -> Dict[str, Task]:
+        """Run every queued task through the Message Batches API.
+
+        The first request of each task is submitted in bulk; once a batch has
+        ended, each task's tool loop resumes from its batch response on a
+        fresh copy of a capable worker's agent. Items that errored or expired
+        fall back to an interactive run. Dependents released by finished
+        tasks go out in a further batch round. With a ``checkpoint_path``,
+        submitted batch IDs and finished tasks are saved, so re-submitting
+        the same tasks after a restart resumes the outstanding batches
+        instead of paying for them again; finished tasks are dropped from the
+        checkpoint once returned. Tasks with no capable worker stay queued.
+        """
+        config = {**DEFAULT_BATCH_CONFIG, **(config or {})}
+        batches = (batch_client or get_shared_client()).messages.batches
+        checkpoint = BatchCheckpoint(config["checkpoint_path"])
+
+        delivered: List[str] = []
+        while True:
+            finished = await self._run_batch_round(batches, checkpoint, config)
+            if not finished:
+                break
+            delivered += finished
+        checkpoint.forget(delivered)
+        return {task_id: self.completed_tasks[task_id] for task_id in delivered}
+
+    async def _run_batch_round(self, batches: Any, checkpoint: BatchCheckpoint, config: BatchConfig) -> List[str]:
+        """Batch the tasks queued right now; returns the IDs it finished."""
+        tasks: Dict[str, Task] = {}
+        restored: List[str] = []
+        for task in await self._queue("drain"):
+            record = checkpoint.finished.get(task["id"])
+            if record:
+                task.update(record)
+                await self._finish_task(task)
+                restored.append(task["id"])
+            elif self._batch_config(task):
+                tasks[task["id"]] = task
+            else:
+                await self._queue("push", task)
+
+        try:
+            submitted = checkpoint.submitted_task_ids()
+            to_submit = [task for task in tasks.values() if task["id"] not in submitted]
+            for start in range(0, len(to_submit), config["max_batch_size"]):
+                chunk = to_submit[start:start + config["max_batch_size"]]
+                # custom_id only allows [a-zA-Z0-9_-]{1,64}, so map it back to task IDs
+                mapping = {f"task-{i}": task["id"] for i, task in enumerate(chunk)}
+                requests = [
+                    {
+                        "custom_id": custom_id,
+                        "params": self._batch_agent(tasks[task_id]).first_request(self._task_prompt(tasks[task_id]))
+                    }
+                    for custom_id, task_id in mapping.items()
+                ]
+                batch = await with_retry(partial(batches.create, requests=requests), config.get("retry"))
+                checkpoint.add_batch(batch.id, mapping)
+        except BaseException:
+            # The drained tasks would otherwise be lost; batches that did go
+            # out are in the checkpoint and are resumed by the next run
+            await self._queue("push_many", list(tasks.values()), True)
+            raise
+
+        for task in tasks.values():
+            task["status"] = "running"
+            task["started_at"] = time.time()
+            self.active_tasks[task["id"]] = task
+
+        semaphore = asyncio.Semaphore(self.config["max_concurrent_tasks"])
+        await asyncio.gather(*(
+            self._collect_batch(batches, batch_id, mapping, tasks, checkpoint, semaphore, config)
+            for batch_id, mapping in list(checkpoint.batches.items())
+            if any(task_id in tasks for task_id in mapping.values())
+        ))
+        return [*restored, *tasks]
+
+    async def _collect_batch(self, batches: Any, batch_id: str, mapping: Dict[str, str], tasks: Dict[str, Task],
+                             checkpoint: BatchCheckpoint, semaphore: asyncio.Semaphore, config: BatchConfig):
+        await wait_for_batch(batches, batch_id, config)
+        responses: Dict[str, Any] = {}
+        async for entry in await with_retry(partial(batches.results, batch_id), config.get("retry")):
+            if entry.result.type == "succeeded":
+                responses[mapping[entry.custom_id]] = entry.result.message
+
+        async def resume(task: Task):
+            async with semaphore:
+                await self._finish_batch_task(task, responses.get(task["id"]), checkpoint)
+
+        await asyncio.gather(*(resume(tasks[task_id]) for task_id in mapping.values() if task_id in tasks))
+        if all(task_id in checkpoint.finished for task_id in mapping.values()):
+            checkpoint.remove_batch(batch_id)
+
+    async def _finish_batch_task(self, task: Task, first_response: Optional[Any], checkpoint: BatchCheckpoint):
+        request_priority.set(task["priority"])
+        while True:
+            task_deadline.set(time.monotonic() + self.config["task_timeout_ms"] / 1000.0)
+            try:
+                result = await asyncio.wait_for(
+                    self._run_agent(task, Agent(self._batch_config(task)), first_response),
+                    timeout=self.config["task_timeout_ms"] / 1000.0
+                )
+                task["status"] = "completed"
+                task["result"] = result["response"]
+                break
+            except Exception as e:
+                if task["retry_count"] < self.config["max_retries"]:
+                    task["retry_count"] += 1
+                    first_response = None
+                    continue
+                task["status"] = "failed"
+                task["error"] = str(e)
+                break
+
+        task["completed_at"] = time.time()
+        self.active_tasks.pop(task["id"], None)
+        checkpoint.finish(task["id"], task["status"], task["result"], task["error"])
+        await self._finish_task(task)
+
+    def _batch_config(self, task: Task) -> Optional[AgentConfig]:
+        pool = next((p for p in self.pools.values() if task["type"] in p.capabilities), None)
+        if pool:
+            return pool.agent_config
+        worker = next(
+            (w for w in self.workers.values()
+             if w["healthy"] and task["type"] in w["capabilities"] and not getattr(w["agent"], "remote", False)),
+            None
+        )
+        return worker["agent"].config if worker else None
+
+    def _batch_agent(self, task: Task) -> Agent:
+        # Batch tasks run side by side, so each gets its own conversation
+        base = Agent(self._batch_config(task))
+        if self.router:
+            return self.router.agent_for(base, self.router.route(task))
+        return base
+
     def get_task_status(self, task_id: str) -> Optional[Task]:
         return (self.completed_tasks.get(task_id) or 
                 self.active_tasks.get(task_id) or 
-                next((t for t in self.task_queue if t["id"] == task_id), None))
+                self.task_queue.get(task_id) or
+                self.blocked_tasks.get(task_id))
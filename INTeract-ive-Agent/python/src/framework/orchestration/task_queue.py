@@ -0,0 +1,81 @@
+
+import heapq
+import itertools
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+class TaskQueue:
+    """Priority queue of pending supervisor tasks.
+
+    Keeps one heap per task type, ordered by priority (highest first) and
+    then submission order, so a task waiting for a busy capability never
+    blocks tasks of another type. Push and pop are O(log n); lookups by
+    task ID are O(1).
+    """
+
+    # Nothing here blocks and nothing finishes outside this process
+    executor = None
+    poll_interval = None
+    lease_seconds = None
+
+    def __init__(self):
+        self._heaps: Dict[str, List[Any]] = {}
+        self._by_id: Dict[str, Dict[str, Any]] = {}
+        self._seq = itertools.count()
+        # Retried tasks jump ahead of their priority level
+        self._front_seq = itertools.count(-1, -1)
+
+    def push(self, task: Dict[str, Any], front: bool = False):
+        seq = next(self._front_seq) if front else next(self._seq)
+        heapq.heappush(self._heaps.setdefault(task["type"], []), (-task["priority"], seq, task))
+        self._by_id[task["id"]] = task
+
+    def push_many(self, tasks: List[Dict[str, Any]], front: bool = False):
+        for task in tasks:
+            self.push(task, front)
+
+    def pop_ready(self, can_run: Callable[[str], bool]) -> Optional[Dict[str, Any]]:
+        """Pop the best task among the types ``can_run`` accepts."""
+        best: Optional[List[Any]] = None
+        for task_type, heap in self._heaps.items():
+            if heap and (best is None or heap[0] < best[0]) and can_run(task_type):
+                best = [heap[0], heap]
+        if best is None:
+            return None
+        _, _, task = heapq.heappop(best[1])
+        del self._by_id[task["id"]]
+        return task
+
+    def complete(self, task: Dict[str, Any]) -> bool:
+        """Outcomes are only kept by the supervisor for in-memory queues."""
+        return True
+
+    def renew(self, task_id: str) -> bool:
+        return True
+
+    def completed(self) -> Dict[str, Dict[str, Any]]:
+        return {}
+
+    def finished(self, task_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        return {}
+
+    def depth(self, task_type: str) -> int:
+        return len(self._heaps.get(task_type, ()))
+
+    def get(self, task_id: str) -> Optional[Dict[str, Any]]:
+        return self._by_id.get(task_id)
+
+    def drain(self) -> List[Dict[str, Any]]:
+        """Remove and return every task, best first."""
+        entries = sorted(entry for heap in self._heaps.values() for entry in heap)
+        self._heaps = {}
+        self._by_id = {}
+        return [task for _, _, task in entries]
+
+    def __contains__(self, task_id: str) -> bool:
+        return task_id in self._by_id
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return iter(list(self._by_id.values()))
@@ -0,0 +1,57 @@
+
+import itertools
+import time
+from typing import Dict, List, Optional, Tuple, TypedDict
+from src.framework.core.agent import Agent, AgentConfig
+
+class PoolConfig(TypedDict):
+    min_size: int # workers kept alive even when the queue is empty
+    max_size: int
+    idle_timeout: float # seconds a surplus worker may sit idle before it is removed
+
+DEFAULT_POOL_CONFIG: PoolConfig = {
+    "min_size": 1,
+    "max_size": 8,
+    "idle_timeout": 30.0
+}
+
+class WorkerPool:
+    """Capability-keyed pool of isolated agent sessions.
+
+    Every worker gets its own Agent built from a copy of the shared
+    ``agent_config``, so concurrent tasks never share a conversation. The
+    supervisor grows the pool while tasks for its capabilities are queued
+    and no worker is free, up to ``max_size``, and removes workers that have
+    been idle for ``idle_timeout`` seconds down to ``min_size``.
+    """
+
+    def __init__(self, id: str, agent_config: AgentConfig, capabilities: List[str], config: Optional[PoolConfig] = None):
+        self.id = id
+        self.agent_config = agent_config
+        self.capabilities = capabilities
+        self.config: PoolConfig = {**DEFAULT_POOL_CONFIG, **(config or {})}
+        self.worker_ids: List[str] = []
+        self.idle_since: Dict[str, float] = {}
+        self._ids = itertools.count(1)
+
+    def can_grow(self) -> bool:
+        return len(self.worker_ids) < self.config["max_size"]
+
+    def new_session(self) -> Tuple[str, Agent]:
+        worker_id = f"{self.id}-{next(self._ids)}"
+        self.worker_ids.append(worker_id)
+        self.idle_since[worker_id] = time.monotonic()
+        return worker_id, Agent({**self.agent_config, "tools": list(self.agent_config["tools"])})
+
+    def surplus_idle(self, idle_ids: List[str], now: float) -> List[str]:
+        """Idle workers that may be removed without going below ``min_size``."""
+        removable = len(self.worker_ids) - self.config["min_size"]
+        expired = [
+            worker_id for worker_id in idle_ids
+            if now - self.idle_since.get(worker_id, now) >= self.config["idle_timeout"]
+        ]
+        return expired[:max(removable, 0)]
+
+    def remove(self, worker_id: str):
+        self.worker_ids.remove(worker_id)
+        self.idle_since.pop(worker_id, None)
@@ -0,0 +1,202 @@
+
+import asyncio
+import contextvars
+import heapq
+import itertools
+import time
+from typing import Any, List, Mapping, Optional, TypedDict
+from src.framework.resilience.retry import parse_retry_after
+
+# Priority of API calls made from the current task; the supervisor sets this
+# to the priority of the task a worker is running.
+request_priority: contextvars.ContextVar[Optional[int]] = contextvars.ContextVar("request_priority", default=None)
+
+class RateLimiterConfig(TypedDict):
+    requests_per_minute: Optional[int]
+    input_tokens_per_minute: Optional[int]
+    output_tokens_per_minute: Optional[int]
+
+class TokenBucket:
+    """Token bucket that refills continuously; ``capacity=None`` means unlimited."""
+
+    def __init__(self, per_minute: Optional[int] = None):
+        self.capacity: Optional[float] = None
+        self.rate = 0.0
+        self.tokens = 0.0
+        self.updated = time.monotonic()
+        if per_minute:
+            self.set_limit(per_minute)
+
+    def set_limit(self, per_minute: int):
+        if self.capacity is None:
+            self.tokens = float(per_minute)
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.tokens = min(self.tokens, self.capacity)
+
+    def _refill(self):
+        now = time.monotonic()
+        if self.capacity is not None:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def sync(self, remaining: float):
+        """Never be more optimistic than the server's view of the bucket."""
+        self._refill()
+        self.tokens = min(self.tokens, remaining)
+
+    def wait_time(self, amount: float) -> float:
+        if self.capacity is None:
+            return 0.0
+        self._refill()
+        # A request larger than the bucket waits for a full bucket instead of forever
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def consume(self, amount: float) -> float:
+        """Take ``amount`` from the bucket and return how much was charged."""
+        if self.capacity is None:
+            return 0.0
+        self._refill()
+        charged = min(amount, self.capacity)
+        self.tokens -= charged
+        return charged
+
+    def refund(self, amount: float):
+        """Return over-reserved tokens (negative amounts charge extra)."""
+        if self.capacity is None:
+            return
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+class Reservation(TypedDict):
+    input_tokens: float # tokens actually charged to each bucket at admission
+    output_tokens: float
+
+class RateLimiter:
+    """Shared async admission control for messages.create calls.
+
+    Tracks requests, input tokens and output tokens per minute as token
+    buckets. Callers wait in a priority queue (higher first, FIFO within a
+    priority) and are admitted once every bucket can cover their estimate.
+    Limits start from the config (unlimited by default) and follow the
+    ``anthropic-ratelimit-*`` response headers; a ``retry-after`` pauses all
+    admissions.
+    """
+
+    def __init__(self, config: Optional[RateLimiterConfig] = None):
+        config = config or {}
+        self.requests = TokenBucket(config.get("requests_per_minute"))
+        self.input_tokens = TokenBucket(config.get("input_tokens_per_minute"))
+        self.output_tokens = TokenBucket(config.get("output_tokens_per_minute"))
+        self.paused_until = 0.0
+        self._waiters: List[List[Any]] = []
+        self._seq = itertools.count()
+        # Created with the pump, inside the running loop; the shared limiter
+        # is built at import time and may serve several loops in turn
+        self._changed: Optional[asyncio.Event] = None
+        self._pump: Optional[asyncio.Task] = None
+
+    async def acquire(self, input_tokens: int, output_tokens: int, priority: int = 0) -> Reservation:
+        if not self._waiters and self._admissible(input_tokens, output_tokens):
+            return self._consume(input_tokens, output_tokens)
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, [-priority, next(self._seq), input_tokens, output_tokens, future])
+        self._notify()
+        try:
+            return await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Admitted just as the caller gave up; the request is never sent
+                self.requests.refund(1)
+                self.release(future.result())
+            raise
+
+    def settle(self, reservation: Reservation, input_tokens: int, output_tokens: int):
+        """Correct the buckets once a response reports the real usage."""
+        if reservation["input_tokens"]:
+            self.input_tokens.refund(reservation["input_tokens"] - input_tokens)
+        if reservation["output_tokens"]:
+            self.output_tokens.refund(reservation["output_tokens"] - output_tokens)
+
+    def release(self, reservation: Reservation):
+        """Refund the tokens of a request that failed before producing a response."""
+        self.settle(reservation, 0, 0)
+
+    def update_from_headers(self, headers: Mapping[str, str]):
+        for name, bucket in (
+            ("requests", self.requests),
+            ("input-tokens", self.input_tokens),
+            ("output-tokens", self.output_tokens)
+        ):
+            limit = _int_header(headers, f"anthropic-ratelimit-{name}-limit")
+            remaining = _int_header(headers, f"anthropic-ratelimit-{name}-remaining")
+            if limit:
+                bucket.set_limit(limit)
+            if remaining is not None and bucket.capacity is not None:
+                bucket.sync(remaining)
+
+        retry_after = headers.get("retry-after")
+        delay = parse_retry_after(retry_after) if retry_after else None
+        if delay is not None:
+            self.paused_until = max(self.paused_until, time.monotonic() + delay)
+        self._notify()
+
+    def _wait_time(self, input_tokens: int, output_tokens: int) -> float:
+        return max(
+            self.paused_until - time.monotonic(),
+            self.requests.wait_time(1),
+            self.input_tokens.wait_time(input_tokens),
+            self.output_tokens.wait_time(output_tokens)
+        )
+
+    def _admissible(self, input_tokens: int, output_tokens: int) -> bool:
+        return self._wait_time(input_tokens, output_tokens) <= 0
+
+    def _consume(self, input_tokens: int, output_tokens: int) -> Reservation:
+        self.requests.consume(1)
+        return {
+            "input_tokens": self.input_tokens.consume(input_tokens),
+            "output_tokens": self.output_tokens.consume(output_tokens)
+        }
+
+    def _notify(self):
+        if self._pump is not None and not self._pump.done():
+            self._changed.set()
+        elif self._waiters:
+            self._changed = asyncio.Event()
+            self._pump = asyncio.ensure_future(self._run())
+
+    async def _run(self):
+        while self._waiters:
+            head = self._waiters[0]
+            _, _, input_tokens, output_tokens, future = head
+            if future.done():
+                heapq.heappop(self._waiters)
+                continue
+
+            wait = self._wait_time(input_tokens, output_tokens)
+            if wait <= 0:
+                heapq.heappop(self._waiters)
+                future.set_result(self._consume(input_tokens, output_tokens))
+                continue
+
+            # Sleep until the head fits, waking early for new arrivals or headers
+            self._changed.clear()
+            try:
+                await asyncio.wait_for(self._changed.wait(), timeout=wait)
+            except asyncio.TimeoutError:
+                pass
+
+def _int_header(headers: Mapping[str, str], name: str) -> Optional[int]:
+    value = headers.get(name)
+    try:
+        return int(value) if value is not None else None
+    except ValueError:
+        return None
+
+# Shared by every Agent in the process unless one is configured with its own
+shared_rate_limiter = RateLimiter()
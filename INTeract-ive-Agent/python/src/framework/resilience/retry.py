@@ -0,0 +1,103 @@
+
+import asyncio
+import contextvars
+import random
+import time
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Optional, TypedDict, TypeVar
+from anthropic import APIConnectionError, APIStatusError
+
+T = TypeVar("T")
+
+class RetryConfig(TypedDict):
+    max_attempts: int
+    base_delay: float # seconds
+    max_delay: float
+
+DEFAULT_RETRY_CONFIG: RetryConfig = {
+    "max_attempts": 4,
+    "base_delay": 1.0,
+    "max_delay": 30.0
+}
+
+# Absolute time.monotonic() by which the current task must finish; the
+# supervisor sets this from the task timeout.
+task_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("task_deadline", default=None)
+
+def remaining_time() -> Optional[float]:
+    deadline = task_deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+def is_retryable(error: BaseException) -> bool:
+    """Connection errors, timeouts, 408/409/429 and 5xx (incl. 529 overloaded)."""
+    if isinstance(error, APIConnectionError):
+        return True
+    if isinstance(error, APIStatusError):
+        should_retry = error.response.headers.get("x-should-retry")
+        if should_retry in ("true", "false"):
+            return should_retry == "true"
+        return error.status_code in (408, 409, 429) or error.status_code >= 500
+    return False
+
+def parse_retry_after(value: str) -> Optional[float]:
+    """Seconds to wait for a ``retry-after`` value: delay-seconds or an HTTP-date."""
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        try:
+            when = datetime.fromisoformat(value)
+        except ValueError:
+            return None
+    return max(0.0, when.timestamp() - time.time())
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """Server-requested delay in seconds, if the error carries one."""
+    if not isinstance(error, APIStatusError):
+        return None
+    headers = error.response.headers
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return max(0.0, float(value) / 1000.0)
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    return parse_retry_after(value) if value else None
+
+async def with_retry(
+    fn: Callable[[], Awaitable[T]],
+    config: Optional[RetryConfig] = None,
+    retryable: Callable[[BaseException], bool] = is_retryable
+) -> T:
+    """Call ``fn`` until it succeeds, with exponential backoff and jitter.
+
+    A ``retry-after`` from the server replaces the computed delay. No retry
+    is scheduled if its delay would run past the task deadline; the last
+    error is raised instead.
+    """
+    config = {**DEFAULT_RETRY_CONFIG, **(config or {})}
+
+    attempts = max(1, config["max_attempts"])
+    for attempt in range(1, attempts + 1):
+        try:
+            return await fn()
+        except Exception as e:
+            if attempt == attempts or not retryable(e):
+                raise
+
+            delay = retry_after(e)
+            if delay is None:
+                delay = min(
+                    config["base_delay"] * 2 ** (attempt - 1) + random.uniform(0, config["base_delay"]),
+                    config["max_delay"]
+                )
+            remaining = remaining_time()
+            if remaining is not None and delay >= remaining:
+                raise
+
+            await asyncio.sleep(delay)
@@ -2,6 +2,7 @@
 import glob
 from typing import Any, List
 from src.framework.core.agent import Tool
+from src.framework.core.tool_cache import path_dependencies
 
 async def read_file_impl(args: Any) -> str:
     path = args.get('file_path')
@@ -30,7 +31,9 @@ read_file_tool: Tool = {
         },
         "required": ["file_path"]
     },
-    "handler": read_file_impl
+    "handler": read_file_impl,
+    "cacheable": True,
+    "depends_on": path_dependencies("file_path")
 }
 
 write_file_tool: Tool = {
@@ -44,7 +47,8 @@ write_file_tool: Tool = {
         },
         "required": ["file_path", "content"]
     },
-    "handler": write_file_impl
+    "handler": write_file_impl,
+    "serial": True
 }
 
 glob_tool: Tool = {
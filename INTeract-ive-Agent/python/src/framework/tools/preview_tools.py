@@ -1,9 +1,17 @@
 
+import asyncio
+import hashlib
+import io
 import json
+import os
+import shutil
+import tempfile
 from datetime import datetime
+from functools import partial
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Callable, Dict, Iterator, List, Set, TextIO, Tuple
 from src.framework.core.agent import Tool
+from src.framework.tools.diff_engine import unified_diff
 
 async def generate_diff_preview_impl(args: Any) -> Dict[str, Any]:
     file_path = args["file_path"]
@@ -11,101 +19,349 @@ async def generate_diff_preview_impl(args: Any) -> Dict[str, Any]:
     new_content = args["new_content"]
     context_lines = args.get("context_lines", 3)
 
-    original_lines = original_content.split("\n")
-    new_lines = new_content.split("\n")
+    result = unified_diff(original_content, new_content, file_path, context_lines)
 
-    changes: list[dict] = []
-    max_len = max(len(original_lines), len(new_lines))
+    return {
+        "file": file_path,
+        "additions": result["additions"],
+        "deletions": result["deletions"],
+        "hunks": result["hunks"],
+        "diff": result["diff"],
+        "summary": f"{result['additions']} additions, {result['deletions']} deletions",
+    }
 
-    for i in range(max_len):
-        orig_line = original_lines[i] if i < len(original_lines) else None
-        new_line = new_lines[i] if i < len(new_lines) else None
+# Upper bound on the combined patch text returned to the model.
+MAX_PATCH_CHARS = 100_000
 
-        if orig_line is None and new_line is not None:
-            changes.append({"type": "add", "line_num": i + 1, "content": new_line})
-        elif new_line is None and orig_line is not None:
-            changes.append({"type": "remove", "line_num": i + 1, "content": orig_line})
-        elif orig_line != new_line:
-            changes.append({"type": "remove", "line_num": i + 1, "content": orig_line or ""})
-            changes.append({"type": "add", "line_num": i + 1, "content": new_line or ""})
-        else:
-            changes.append({"type": "unchanged", "line_num": i + 1, "content": orig_line or ""})
+# Number of files read and diffed at the same time.
+MAX_PARALLEL_FILES = 8
+
+def _read_source(file_path: str) -> Tuple[str, str]:
+    """Read a file without newline translation and return (content, sha256)."""
+    data = Path(file_path).read_bytes()
+    return data.decode("utf-8"), hashlib.sha256(data).hexdigest()
 
-    # Create unified diff format
-    diff_output = f"--- a/{file_path}\n+++ b/{file_path}\n"
+def _apply_edits(content: str, edits: List[Dict[str, Any]]) -> str:
+    """Apply line-range and search/replace edits to file content.
 
-    added_count = sum(1 for c in changes if c["type"] == "add")
-    removed_count = sum(1 for c in changes if c["type"] == "remove")
+    Line ranges refer to the unmodified content and are applied first, bottom
+    up; search/replace edits are then applied in the order given.
+    """
+    ranges = sorted(
+        (e for e in edits if "start_line" in e),
+        key=lambda e: e["start_line"],
+        reverse=True,
+    )
+    if ranges:
+        lines = content.split("\n")
+        floor = len(lines) + 1
+        for edit in ranges:
+            start, end = edit["start_line"], edit.get("end_line", edit["start_line"])
+            if start < 1 or end < start - 1 or end > len(lines):
+                raise ValueError(f"Line range {start}-{end} is outside the file ({len(lines)} lines)")
+            if end >= floor:
+                raise ValueError(f"Line range {start}-{end} overlaps another edit")
+            replacement = edit.get("content", "")
+            lines[start - 1 : end] = replacement.split("\n") if replacement else []
+            floor = start
+        content = "\n".join(lines)
 
-    for change in changes:
-        if change["type"] == "add":
-            diff_output += f"+{change['content']}\n"
-        elif change["type"] == "remove":
-            diff_output += f"-{change['content']}\n"
+    for edit in edits:
+        if "search" not in edit:
+            continue
+        search, replace = edit["search"], edit.get("replace", "")
+        occurrences = content.count(search) if search else 0
+        if occurrences == 0:
+            raise ValueError(f"Search text not found: {search[:80]!r}")
+        if occurrences > 1 and not edit.get("replace_all", False):
+            raise ValueError(
+                f"Search text matches {occurrences} times; add context or set replace_all: {search[:80]!r}"
+            )
+        content = content.replace(search, replace)
 
+    return content
+
+def _preview_file_edits(entry: Dict[str, Any], context_lines: int) -> Dict[str, Any]:
+    """Apply one file's edits in memory and diff the result against disk."""
+    file_path = entry["file_path"]
+    try:
+        original, sha256 = _read_source(file_path)
+        updated = _apply_edits(original, entry.get("edits", []))
+    except (OSError, UnicodeDecodeError, ValueError, KeyError) as e:
+        return {"file": file_path, "error": str(e)}
+
+    result = unified_diff(original, updated, file_path, context_lines)
     return {
         "file": file_path,
-        "additions": added_count,
-        "deletions": removed_count,
-        "diff": diff_output,
-        "summary": f"{added_count} additions, {removed_count} deletions",
+        "sha256": sha256,
+        "additions": result["additions"],
+        "deletions": result["deletions"],
+        "hunks": result["hunks"],
+        "diff": result["diff"],
     }
 
-async def create_summary_report_impl(args: Any) -> Dict[str, Any]:
-    repository_path = args["repository_path"]
-    analysis_results = args["analysis_results"]
+async def generate_batch_diff_preview_impl(args: Any) -> Dict[str, Any]:
+    files = args["files"]
+    context_lines = args.get("context_lines", 3)
+    max_patch_chars = args.get("max_patch_chars", MAX_PATCH_CHARS)
     output_path = args.get("output_path")
 
+    semaphore = asyncio.Semaphore(MAX_PARALLEL_FILES)
+
+    async def preview(entry: Dict[str, Any]) -> Dict[str, Any]:
+        async with semaphore:
+            return await asyncio.to_thread(_preview_file_edits, entry, context_lines)
+
+    pending = [asyncio.ensure_future(preview(entry)) for entry in files]
+
+    patch = io.StringIO()
+    patch_file = open(output_path, "w", encoding="utf-8") if output_path else None
+    stats: List[Dict[str, Any]] = []
+    omitted: List[str] = []
     try:
-        results = json.loads(analysis_results)
-    except json.JSONDecodeError:
-        return {"error": "Invalid JSON in analysis_results"}
+        # Results are consumed in input order so the patch is deterministic,
+        # but later files are already being diffed while earlier ones stream out.
+        for future in pending:
+            result = await future
+            diff = result.pop("diff", "")
+            stats.append(result)
+            if not diff:
+                continue
+            if patch_file:
+                patch_file.write(diff)
+            if patch.tell() + len(diff) <= max_patch_chars:
+                patch.write(diff)
+            else:
+                omitted.append(result["file"])
+    finally:
+        if patch_file:
+            patch_file.close()
 
-    now = datetime.now().isoformat()
+    additions = sum(s.get("additions", 0) for s in stats)
+    deletions = sum(s.get("deletions", 0) for s in stats)
+
+    return {
+        "files": stats,
+        "files_changed": sum(1 for s in stats if s.get("hunks")),
+        "errors": sum(1 for s in stats if "error" in s),
+        "additions": additions,
+        "deletions": deletions,
+        "patch": patch.getvalue(),
+        "truncated": bool(omitted),
+        "omitted_files": omitted,
+        "saved_to": output_path or "Not saved",
+        "summary": f"{len(stats)} files, {additions} additions, {deletions} deletions",
+    }
+
+def _stage_file(file_path: str, content: str) -> str:
+    """Write content to a temp file next to ``file_path`` and return its path."""
+    target = Path(file_path)
+    fd, tmp_path = tempfile.mkstemp(dir=target.parent, prefix=f".{target.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(content.encode("utf-8"))
+            f.flush()
+            os.fsync(f.fileno())
+        shutil.copymode(target, tmp_path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return tmp_path
+
+def _apply_patch_set_sync(files: List[Dict[str, Any]], dry_run: bool) -> Dict[str, Any]:
+    """Validate every file edit, then swap all files in with atomic renames."""
+    paths = [entry["file_path"] for entry in files]
+    if len(set(map(os.path.realpath, paths))) != len(paths):
+        return {"applied": False, "errors": [{"error": "Each file may appear only once per patch set"}]}
+
+    # Phase 1: validate every file against its expected hash and build new contents.
+    planned: List[Dict[str, Any]] = []
+    errors: List[Dict[str, str]] = []
+    for entry in files:
+        file_path = entry["file_path"]
+        try:
+            original, sha256 = _read_source(file_path)
+            expected = entry.get("expected_sha256")
+            if expected and expected != sha256:
+                raise ValueError("File changed since it was previewed (sha256 mismatch)")
+            updated = _apply_edits(original, entry.get("edits", []))
+        except (OSError, UnicodeDecodeError, ValueError, KeyError) as e:
+            errors.append({"file": file_path, "error": str(e)})
+            continue
+        diff = unified_diff(original, updated, file_path, 0)
+        planned.append({
+            "file": file_path,
+            "original": original,
+            "original_sha256": sha256,
+            "updated": updated,
+            "additions": diff["additions"],
+            "deletions": diff["deletions"],
+        })
+
+    if errors or dry_run:
+        return {
+            "applied": False,
+            "errors": errors,
+            "files": [
+                {"file": p["file"], "additions": p["additions"], "deletions": p["deletions"]}
+                for p in planned
+            ],
+        }
+
+    changed = [p for p in planned if p["updated"] != p["original"]]
+    staged: List[Tuple[Dict[str, Any], str]] = []
+    committed: List[Dict[str, Any]] = []
+    try:
+        # Phase 2: stage every result as a temp file in the target's directory.
+        for plan in changed:
+            staged.append((plan, _stage_file(plan["file"], plan["updated"])))
+
+        # Phase 3: re-check hashes, then commit each file with an atomic rename.
+        for plan, _ in staged:
+            if _read_source(plan["file"])[1] != plan["original_sha256"]:
+                raise RuntimeError(f"{plan['file']} changed while the patch set was being staged")
+        for plan, tmp_path in staged:
+            os.replace(tmp_path, plan["file"])
+            committed.append(plan)
+    except Exception as e:
+        rollback_errors = []
+        for plan in reversed(committed):
+            try:
+                os.replace(_stage_file(plan["file"], plan["original"]), plan["file"])
+            except OSError as rollback_error:
+                rollback_errors.append({"file": plan["file"], "error": str(rollback_error)})
+        for _, tmp_path in staged[len(committed):]:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+        return {
+            "applied": False,
+            "errors": [{"error": f"Patch set rolled back: {e}"}] + rollback_errors,
+        }
+
+    return {
+        "applied": True,
+        "errors": [],
+        "files": [
+            {
+                "file": p["file"],
+                "sha256": hashlib.sha256(p["updated"].encode("utf-8")).hexdigest(),
+                "additions": p["additions"],
+                "deletions": p["deletions"],
+            }
+            for p in changed
+        ],
+        "unchanged_files": [p["file"] for p in planned if p["updated"] == p["original"]],
+    }
+
+async def apply_patch_set_impl(args: Any) -> Dict[str, Any]:
+    files = args["files"]
+    dry_run = args.get("dry_run", False)
+
+    result = await asyncio.to_thread(_apply_patch_set_sync, files, dry_run)
+    total = len(result.get("files", []))
+    if result["applied"]:
+        result["summary"] = f"Applied changes to {total} files"
+    elif dry_run and not result["errors"]:
+        result["summary"] = f"Dry run: {total} files would change"
+    else:
+        result["summary"] = "No files were modified"
+    return result
+
+REPORT_SECTIONS = [
+    ("complexity", "Code Complexity", "No complexity issues found"),
+    ("duplicates", "Code Duplication", "No significant duplication found"),
+    ("suggestions", "Refactoring Suggestions", "No suggestions"),
+]
+
+def _format_finding(category: str, item: Dict[str, Any]) -> str:
+    """Render a single finding as a Markdown list item."""
+    if category == "complexity":
+        return f"- {item.get('file', 'N/A')}: Complexity score {item.get('score', 'N/A')}"
+    if category == "duplicates":
+        return f"- {item.get('count', 'N/A')} occurrences: {item.get('description', 'N/A')}"
+    return f"- **{item.get('type', 'N/A')}** in {item.get('file', 'N/A')}: {item.get('description', 'N/A')}"
+
+def _iter_ndjson_findings(findings_path: str, skipped: Set[int]) -> Iterator[Dict[str, Any]]:
+    """Yield findings from an NDJSON file one line at a time."""
+    with open(findings_path, "r", encoding="utf-8") as f:
+        for line_num, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                skipped.add(line_num)
+                continue
+            if isinstance(record, dict):
+                yield record
+            else:
+                skipped.add(line_num)
+
+def _iter_json_findings(results: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """Yield findings from the legacy single-document analysis format."""
+    yield {"category": "summary", **{k: v for k, v in results.items() if not isinstance(v, list)}}
+    for category, _, _ in REPORT_SECTIONS:
+        for item in results.get(category) or []:
+            yield {"category": category, **item}
 
-    # Build complexity section
-    complexity_items = []
-    if results.get("complexity"):
-        for c in results["complexity"]:
-            complexity_items.append(f"- {c.get('file', 'N/A')}: Complexity score {c.get('score', 'N/A')}")
-    complexity_section = "\n".join(complexity_items) if complexity_items else "No complexity issues found"
-
-    # Build duplicates section
-    duplicate_items = []
-    if results.get("duplicates"):
-        for d in results["duplicates"]:
-            duplicate_items.append(f"- {d.get('count', 'N/A')} occurrences: {d.get('description', 'N/A')}")
-    duplicates_section = "\n".join(duplicate_items) if duplicate_items else "No significant duplication found"
-
-    # Build suggestions section
-    suggestion_items = []
-    if results.get("suggestions"):
-        for s in results["suggestions"]:
-            suggestion_items.append(f"- **{s.get('type', 'N/A')}** in {s.get('file', 'N/A')}: {s.get('description', 'N/A')}")
-    suggestions_section = "\n".join(suggestion_items) if suggestion_items else "No suggestions"
-
-    report = f"""# Refactoring Analysis Report
+def _write_report(
+    out: TextIO,
+    repository_path: str,
+    generated_at: str,
+    findings: Callable[[], Iterator[Dict[str, Any]]],
+) -> Dict[str, Any]:
+    """Stream a Markdown report to ``out``, one section at a time.
+
+    ``findings`` is called once per pass so large inputs are never held in
+    memory: one pass gathers the summary, then one pass per section.
+    """
+    counts = {category: 0 for category, _, _ in REPORT_SECTIONS}
+    summary: Dict[str, Any] = {}
+    critical = 0
+    files: Set[str] = set()
+    for record in findings():
+        category = record.get("category")
+        if category == "summary":
+            summary.update(record)
+        elif category in counts:
+            counts[category] += 1
+            if record.get("severity") == "critical":
+                critical += 1
+            if record.get("file"):
+                files.add(record["file"])
+
+    stats = {
+        "files_analyzed": summary.get("files_analyzed", len(files) or "N/A"),
+        "total_suggestions": summary.get("total_suggestions", counts["suggestions"]),
+        "critical_issues": summary.get("critical_issues", critical),
+        "findings": counts,
+    }
+
+    out.write(f"""# Refactoring Analysis Report
 
 ## Repository
 - **Path:** {repository_path}
-- **Generated:** {now}
+- **Generated:** {generated_at}
 
 ## Summary
-- **Files Analyzed:** {results.get('files_analyzed', 'N/A')}
-- **Total Suggestions:** {results.get('total_suggestions', 0)}
-- **Critical Issues:** {results.get('critical_issues', 0)}
+- **Files Analyzed:** {stats['files_analyzed']}
+- **Total Suggestions:** {stats['total_suggestions']}
+- **Critical Issues:** {stats['critical_issues']}
 
 ## Findings by Category
+""")
 
-### Code Complexity
-{complexity_section}
-
-### Code Duplication
-{duplicates_section}
-
-### Refactoring Suggestions
-{suggestions_section}
+    for category, title, empty_text in REPORT_SECTIONS:
+        out.write(f"\n### {title}\n")
+        if counts[category]:
+            for record in findings():
+                if record.get("category") == category:
+                    out.write(_format_finding(category, record) + "\n")
+        else:
+            out.write(empty_text + "\n")
+        out.flush()
 
+    out.write("""
 ## Recommended Actions
 
 1. Address critical issues first
@@ -114,14 +370,53 @@ async def create_summary_report_impl(args: Any) -> Dict[str, Any]:
 
 ---
 *Generated by INTeract-ive Agent*
-"""
+""")
+    return stats
+
+async def create_summary_report_impl(args: Any) -> Dict[str, Any]:
+    repository_path = args["repository_path"]
+    analysis_results = args.get("analysis_results")
+    findings_path = args.get("findings_path")
+    output_path = args.get("output_path")
+
+    # Findings come either from an NDJSON file (one finding per line with a
+    # "category" of complexity, duplicates, suggestions or summary) or from the
+    # analysis_results JSON document.
+    skipped: Set[int] = set()
+    if findings_path:
+        if not Path(findings_path).is_file():
+            return {"error": f"Findings file not found: {findings_path}"}
+        output_path = output_path or str(Path(findings_path).with_suffix(".report.md"))
+        findings = partial(_iter_ndjson_findings, findings_path, skipped)
+    elif analysis_results is not None:
+        try:
+            results = json.loads(analysis_results)
+        except json.JSONDecodeError:
+            return {"error": "Invalid JSON in analysis_results"}
+        findings = partial(_iter_json_findings, results)
+    else:
+        return {"error": "Provide findings_path or analysis_results"}
+
+    now = datetime.now().isoformat()
 
+    # Reports written to disk are streamed section by section and only a
+    # compact summary is returned to the model.
     if output_path:
-        Path(output_path).write_text(report, encoding="utf-8")
+        with open(output_path, "w", encoding="utf-8") as out:
+            stats = await asyncio.to_thread(_write_report, out, repository_path, now, findings)
+        return {
+            **stats,
+            "saved_to": output_path,
+            "report_bytes": Path(output_path).stat().st_size,
+            "skipped_lines": len(skipped),
+            "generated_at": now,
+        }
 
+    buffer = io.StringIO()
+    _write_report(buffer, repository_path, now, findings)
     return {
-        "report": report,
-        "saved_to": output_path or "Not saved",
+        "report": buffer.getvalue(),
+        "saved_to": "Not saved",
         "generated_at": now,
     }
 
@@ -141,17 +436,83 @@ generate_diff_preview_tool: Tool = {
     "handler": generate_diff_preview_impl
 }
 
+file_edits_schema = {
+    "type": "array",
+    "description": (
+        "Files to change. Each edit is either {search, replace, replace_all?} "
+        "or {start_line, end_line, content} with 1-based inclusive line numbers "
+        "of the file as it is on disk."
+    ),
+    "items": {
+        "type": "object",
+        "properties": {
+            "file_path": {"type": "string"},
+            "expected_sha256": {"type": "string"},
+            "edits": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "search": {"type": "string"},
+                        "replace": {"type": "string"},
+                        "replace_all": {"type": "boolean"},
+                        "start_line": {"type": "integer"},
+                        "end_line": {"type": "integer"},
+                        "content": {"type": "string"}
+                    }
+                }
+            }
+        },
+        "required": ["file_path", "edits"]
+    }
+}
+
+generate_batch_diff_preview_tool: Tool = {
+    "name": "generate_batch_diff_preview",
+    "description": "Preview edits to several files at once. Edits are applied to the files on disk in memory only and returned as one combined unified diff with per-file stats.",
+    "input_schema": {
+        "type": "object",
+        "properties": {
+            "files": file_edits_schema,
+            "context_lines": {"type": "integer"},
+            "max_patch_chars": {"type": "integer"},
+            "output_path": {"type": "string", "description": "Optional path to write the full, uncapped patch"}
+        },
+        "required": ["files"]
+    },
+    "handler": generate_batch_diff_preview_impl
+}
+
+apply_patch_set_tool: Tool = {
+    "name": "apply_patch_set",
+    "description": "Apply search/replace or line-range edits to many files in one atomic batch. Every file is validated against its expected_sha256 (from generate_batch_diff_preview) before anything is written; either all files are updated or none are.",
+    "input_schema": {
+        "type": "object",
+        "properties": {
+            "files": file_edits_schema,
+            "dry_run": {"type": "boolean", "description": "Validate the patch set without writing"}
+        },
+        "required": ["files"]
+    },
+    "handler": apply_patch_set_impl,
+    "serial": True
+}
+
 create_summary_report_tool: Tool = {
     "name": "create_summary_report",
-    "description": "Generate a comprehensive summary report of refactoring analysis",
+    "description": "Generate a comprehensive summary report of refactoring analysis. For large analyses, write findings to an NDJSON file and pass findings_path; the report is streamed to output_path and only a compact summary is returned.",
     "input_schema": {
         "type": "object",
         "properties": {
             "repository_path": {"type": "string"},
-            "analysis_results": {"type": "string"},
+            "analysis_results": {"type": "string", "description": "Analysis results as a JSON document"},
+            "findings_path": {
+                "type": "string",
+                "description": "NDJSON file with one finding per line and a 'category' of complexity, duplicates, suggestions or summary"
+            },
             "output_path": {"type": "string"}
         },
-        "required": ["repository_path", "analysis_results"]
+        "required": ["repository_path"]
     },
     "handler": create_summary_report_impl
 }
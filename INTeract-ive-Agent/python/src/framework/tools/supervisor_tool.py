@@ -1,22 +1,19 @@
 
-from typing import Any
+import json
+from typing import Any, Dict
 from src.framework.core.agent import Tool
 from src.framework.orchestration.supervisor import SupervisorAgent
 
 def create_supervisor_tool(supervisor: SupervisorAgent) -> Tool:
     async def handler(input_data: Any) -> str:
-        await supervisor.submit_task({
+        results = await supervisor.run_tasks([{
             "id": input_data["task_id"],
             "type": input_data["type"],
             "input": input_data["input"]
-        })
-        
-        await supervisor.orchestrate()
-        
-        result = supervisor.get_task_status(input_data["task_id"])
-        if result:
-            return result.get("result") or result.get("error") or "Task failed without error"
-        return "Task not found"
+        }])
+
+        result = results[input_data["task_id"]]
+        return result.get("result") or result.get("error") or "Task failed without error"
 
     return {
         "name": "delegate_task",
@@ -39,3 +36,107 @@ def create_supervisor_tool(supervisor: SupervisorAgent) -> Tool:
         },
         "handler": handler
     }
+
+def _format_results(results: Dict[str, Any]) -> str:
+    return json.dumps({
+        task_id: {
+            "status": task["status"],
+            "result": task.get("result"),
+            "error": task.get("error")
+        }
+        for task_id, task in results.items()
+    }, indent=2)
+
+def create_delegate_tasks_tool(supervisor: SupervisorAgent) -> Tool:
+    async def handler(input_data: Any) -> str:
+        results = await supervisor.run_tasks([
+            {
+                "id": item["task_id"],
+                "type": item["type"],
+                "input": item["input"],
+                "priority": item.get("priority", 0)
+            }
+            for item in input_data["tasks"]
+        ])
+        return _format_results(results)
+
+    return {
+        "name": "delegate_tasks",
+        "description": "Delegate several independent tasks to subagents at once. They run in parallel and all results come back together.",
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "tasks": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "task_id": {"type": "string", "description": "Unique identifier for the task"},
+                            "type": {
+                                "type": "string",
+                                "enum": ["detect-patterns", "analyze-structure", "generate-diff"],
+                                "description": "Type of capability needed"
+                            },
+                            "input": {
+                                "type": "object",
+                                "description": "Specific instructions or data for the subagent"
+                            },
+                            "priority": {"type": "integer", "description": "Higher runs first", "default": 0}
+                        },
+                        "required": ["task_id", "type", "input"]
+                    }
+                }
+            },
+            "required": ["tasks"]
+        },
+        "handler": handler
+    }
+
+def create_task_graph_tool(supervisor: SupervisorAgent) -> Tool:
+    async def handler(input_data: Any) -> str:
+        results = await supervisor.run_graph([
+            {
+                "id": node["task_id"],
+                "type": node["type"],
+                "input": node["input"],
+                "depends_on": node.get("depends_on", [])
+            }
+            for node in input_data["tasks"]
+        ])
+        return _format_results(results)
+
+    return {
+        "name": "delegate_task_graph",
+        "description": "Delegate a graph of dependent tasks to subagents in one call. Tasks run as soon as their dependencies finish and receive the dependencies' results automatically.",
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "tasks": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "task_id": {"type": "string", "description": "Unique identifier for the task"},
+                            "type": {
+                                "type": "string",
+                                "enum": ["detect-patterns", "analyze-structure", "generate-diff"],
+                                "description": "Type of capability needed"
+                            },
+                            "input": {
+                                "type": "object",
+                                "description": "Specific instructions or data for the subagent"
+                            },
+                            "depends_on": {
+                                "type": "array",
+                                "items": {"type": "string"},
+                                "description": "task_ids whose results this task needs"
+                            }
+                        },
+                        "required": ["task_id", "type", "input"]
+                    }
+                }
+            },
+            "required": ["tasks"]
+        },
+        "handler": handler
+    }
@@ -5,6 +5,10 @@ import asyncio
 import argparse
 from typing import List
 from src.agents.refactoring_agent import create_refactoring_orchestrator, create_master_agent
+from src.framework.core.blob_store import shared_blob_store
+from src.framework.core.cassette import Cassette, use_cassette
+from src.framework.core.client import client_registry
+from src.framework.core.journal import SessionJournal, new_session_id
 
 def parse_args():
     parser = argparse.ArgumentParser(description="INTeract-ive Agent - Refactoring Agent")
@@ -14,6 +18,12 @@ def parse_args():
     parser.add_argument("--auto-apply", action="store_true", help="Automatically apply suggested changes")
     parser.add_argument("--dry-run", action="store_true", help="Show what would be changed without applying")
     parser.add_argument("-o", "--output", choices=["detailed", "summary", "json"], default="detailed", help="Output format")
+    cassette = parser.add_mutually_exclusive_group()
+    cassette.add_argument("--record", metavar="CASSETTE", help="Record every API request/response to a cassette file")
+    cassette.add_argument("--replay", metavar="CASSETTE", help="Serve API responses from a cassette file instead of the API")
+    parser.add_argument("--replay-latency", type=float, default=0.0, metavar="SCALE", help="Sleep SCALE x the recorded latency per replayed call")
+    parser.add_argument("--resume", metavar="SESSION_ID", help="Continue an interrupted session from its journal")
+    parser.add_argument("--metrics-port", type=int, metavar="PORT", help="Serve supervisor metrics in Prometheus format on localhost:PORT/metrics")
     
     return parser.parse_args()
 
@@ -28,8 +38,13 @@ async def main():
     if not repos:
         repos = [os.getcwd()]
         
-    # Check for API key
-    if not os.environ.get("ANTHROPIC_API_KEY"):
+    if args.record:
+        use_cassette(Cassette(args.record, "record"))
+    elif args.replay:
+        use_cassette(Cassette(args.replay, "replay", args.replay_latency))
+
+    # Check for API key (not needed when replaying offline)
+    if not args.replay and not os.environ.get("ANTHROPIC_API_KEY"):
         print("Error: ANTHROPIC_API_KEY environment variable is required.")
         print("Get your API key from: https://console.anthropic.com/")
         sys.exit(1)
@@ -43,28 +58,65 @@ async def main():
         else:
             prompt = f"I have {len(repos)} repositories to refactor: {', '.join(repos)}. Help me analyze and improve them."
 
+    session_id = args.resume or new_session_id()
+    journal = SessionJournal.for_session(session_id)
+    if args.resume and not journal.exists():
+        print(f"Error: no journal found for session {args.resume} ({journal.path})")
+        sys.exit(1)
+    # Agents are built before the journal is attached, so point the shared
+    # store at the session; handles in the journal must outlive this process
+    shared_blob_store.root = journal.blob_root
+
     print("INTeract-ive Agent - Starting refactoring analysis...")
     print(f"Repositories: {', '.join(repos)}")
+    print(f"Session: {session_id} (resume with --resume {session_id})")
     print("---")
 
+    metrics_server = None
     try:
         supervisor = create_refactoring_orchestrator()
+        if args.metrics_port:
+            metrics_server = await supervisor.metrics.serve(port=args.metrics_port)
         master = create_master_agent(supervisor)
+        master.config['journal'] = journal
 
-        result = await master.run(prompt)
+        result = None
+        if args.resume:
+            result = await master.resume()
+            print(result["response"], end="")
+        else:
+            async for event in master.stream(prompt):
+                if event["type"] == "text":
+                    print(event["text"], end="", flush=True)
+                elif event["type"] == "tool_call":
+                    print(f"\n[tool] {event['name']}", flush=True)
+                elif event["type"] == "tool_result" and event["is_error"]:
+                    print(f"[tool] {event['name']} failed: {event['content']}", flush=True)
+                elif event["type"] == "done":
+                    result = event["result"]
 
         print("\n---")
         print("Analysis complete.")
-        print(result["response"])
         
         print("\nMetadata:")
         print(f"- Iterations: {result['iterations']}")
         print(f"- Tools Used: {', '.join(result['tools_used'])}")
         print(f"- Tokens: {result['total_tokens']['input']} in / {result['total_tokens']['output']} out")
+        print(f"- Cache: {result['total_tokens']['cache_read']} read / {result['total_tokens']['cache_creation']} written")
+        print(f"- History compacted: ~{sum(result['history_tokens_saved'])} tokens")
+        if supervisor.router:
+            tiers = supervisor.router.stats()
+            print("- Model tiers: " + ", ".join(
+                f"{name} {t['accepted']}/{t['attempts']} accepted" for name, t in tiers.items()
+            ))
 
     except Exception as e:
         print(f"Error running refactoring agent: {e}", file=sys.stderr)
         sys.exit(1)
+    finally:
+        if metrics_server:
+            metrics_server.close()
+        await client_registry.aclose()
 
 if __name__ == "__main__":
     asyncio.run(main())
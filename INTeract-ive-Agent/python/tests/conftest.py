@@ -0,0 +1,39 @@
+import asyncio
+from typing import Any, Optional
+from src.framework.orchestration.supervisor import SupervisorAgent
+
+# Shared by the supervisor tests; import what you need with ``from conftest import ...``
+
+AGENT_CONFIG = {"name": "w", "model": "m", "max_tokens": 10, "system_prompt": "s", "tools": []}
+
+class EchoAgent:
+    """Worker stand-in that answers with its prompt.
+
+    Waits ``delay`` seconds first, records every prompt, and raises for
+    prompts that contain any of ``failing``.
+    """
+
+    def __init__(self, delay: float = 0.0, failing=()):
+        self.delay = delay
+        self.failing = set(failing)
+        self.prompts = []
+        self.config = {}
+
+    async def run(self, prompt, first_response=None):
+        self.prompts.append(prompt)
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if any(name in prompt for name in self.failing):
+            raise RuntimeError("tool crashed")
+        return {"response": prompt}
+
+def make_supervisor(max_concurrent: int = 5, max_retries: int = 0, task_queue: Optional[Any] = None,
+                    hedging: Optional[Any] = None) -> SupervisorAgent:
+    return SupervisorAgent(
+        {"max_concurrent_tasks": max_concurrent, "task_timeout_ms": 30000, "max_retries": max_retries},
+        task_queue=task_queue,
+        hedging=hedging
+    )
+
+def task(task_id: str, task_type: str = "x", priority: int = 0):
+    return {"id": task_id, "type": task_type, "input": task_id, "priority": priority}
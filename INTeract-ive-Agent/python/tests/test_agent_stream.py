@@ -0,0 +1,164 @@
+import asyncio
+from types import SimpleNamespace
+import pytest
+from anthropic.types import Message
+from src.framework.core.agent import Agent
+from src.framework.resilience.rate_limiter import RateLimiter
+from conftest import AGENT_CONFIG
+
+# Slow refill, so bucket levels barely move while a test runs
+LIMITS = {"requests_per_minute": None, "input_tokens_per_minute": 600, "output_tokens_per_minute": 600}
+
+def message(*content, stop_reason="end_turn"):
+    return Message.model_validate({
+        "id": "msg_1", "type": "message", "role": "assistant", "model": "m",
+        "content": list(content), "stop_reason": stop_reason,
+        "usage": {"input_tokens": 30, "output_tokens": 20}
+    })
+
+def text(value):
+    return {"type": "text", "text": value}
+
+def tool_use(tool_id, name):
+    return {"type": "tool_use", "id": tool_id, "name": name, "input": {}}
+
+class FakeStream:
+    """The part of ``messages.stream`` the Agent reads; can break off after ``fail_after`` events."""
+
+    def __init__(self, log, reply, fail_after=None):
+        self.log = log
+        self.reply = reply
+        self.fail_after = fail_after
+        self.response = SimpleNamespace(headers={})
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return None
+
+    async def __aiter__(self):
+        events = []
+        for block in self.reply.content:
+            if block.type == "text":
+                events.append(SimpleNamespace(type="text", text=block.text))
+            events.append(SimpleNamespace(type="content_block_stop", content_block=block))
+        for i, event in enumerate(events):
+            if i == self.fail_after:
+                raise ConnectionError("stream dropped")
+            await asyncio.sleep(0.01)
+            self.log.append(f"event {i}")
+            yield event
+        self.log.append("stream end")
+
+    async def get_final_message(self):
+        return self.reply
+
+class FakeClient:
+    def __init__(self, *streams):
+        self.messages = self
+        self.streams = list(streams)
+        self.requests = []
+
+    def stream(self, **request):
+        self.requests.append(request)
+        return self.streams.pop(0)
+
+def make_agent(client, tools=(), **config):
+    return Agent({
+        **AGENT_CONFIG,
+        "max_tokens": 100,
+        "tools": list(tools),
+        "client": client,
+        "rate_limiter": RateLimiter(LIMITS),
+        "retry": {"max_attempts": 1, "base_delay": 0.0, "max_delay": 0.0},
+        **config
+    })
+
+def recording_tool(log, name="lookup"):
+    async def handler(args):
+        log.append(f"run {name}")
+        return f"{name} result"
+    return {"name": name, "description": name, "input_schema": {"type": "object"}, "handler": handler}
+
+async def collect(agent, prompt):
+    return [event async for event in agent.stream(prompt)]
+
+@pytest.mark.asyncio
+async def test_stream_yields_text_tool_calls_and_result():
+    log = []
+    client = FakeClient(
+        FakeStream(log, message(text("Checking."), tool_use("t1", "lookup"), stop_reason="tool_use")),
+        FakeStream(log, message(text("All done.")))
+    )
+    agent = make_agent(client, [recording_tool(log)])
+
+    events = await collect(agent, "hello")
+
+    assert [e["type"] for e in events] == ["text", "tool_call", "tool_result", "text", "done"]
+    assert events[1] == {"type": "tool_call", "id": "t1", "name": "lookup", "input": {}}
+    assert events[2]["content"] == "lookup result" and not events[2]["is_error"]
+    result = events[-1]["result"]
+    assert result["response"] == "All done."
+    assert result["iterations"] == 1
+    assert result["tools_used"] == ["lookup"]
+    assert result["total_tokens"]["input"] == 60
+    # The second request carries the tool result
+    assert client.requests[1]["messages"][-1]["content"][0]["tool_use_id"] == "t1"
+
+@pytest.mark.asyncio
+async def test_tools_start_before_the_message_finishes():
+    log = []
+    client = FakeClient(
+        FakeStream(log, message(tool_use("t1", "lookup"), text("still talking"), text("more"), stop_reason="tool_use")),
+        FakeStream(log, message(text("done")))
+    )
+    agent = make_agent(client, [recording_tool(log)])
+
+    await collect(agent, "hello")
+
+    assert log.index("run lookup") < log.index("stream end")
+
+@pytest.mark.asyncio
+async def test_no_tools_run_past_max_iterations():
+    log = []
+    client = FakeClient(FakeStream(log, message(tool_use("t1", "lookup"), stop_reason="tool_use")))
+    agent = make_agent(client, [recording_tool(log)], max_iterations=0)
+
+    events = await collect(agent, "hello")
+
+    assert "run lookup" not in log
+    assert events[-1]["result"]["stop_reason"] == "tool_use"
+
+@pytest.mark.asyncio
+async def test_completed_stream_settles_reservation():
+    client = FakeClient(FakeStream([], message(text("hi"))))
+    agent = make_agent(client)
+
+    await collect(agent, "hello")
+
+    # Charged the reported usage instead of the estimate
+    assert agent.rate_limiter.input_tokens.tokens == pytest.approx(600 - 30, abs=1)
+    assert agent.rate_limiter.output_tokens.tokens == pytest.approx(600 - 20, abs=1)
+
+@pytest.mark.asyncio
+async def test_broken_stream_releases_reservation():
+    client = FakeClient(FakeStream([], message(text("a"), text("b")), fail_after=2))
+    agent = make_agent(client)
+
+    with pytest.raises(ConnectionError):
+        await collect(agent, "hello")
+
+    assert agent.rate_limiter.input_tokens.tokens == pytest.approx(600, abs=1)
+    assert agent.rate_limiter.output_tokens.tokens == pytest.approx(600, abs=1)
+
+@pytest.mark.asyncio
+async def test_abandoned_stream_releases_reservation():
+    client = FakeClient(FakeStream([], message(text("a"), text("b"))))
+    agent = make_agent(client)
+
+    events = agent.stream("hello")
+    assert (await events.__anext__())["type"] == "text"
+    await events.aclose()
+
+    assert agent.rate_limiter.output_tokens.tokens == pytest.approx(600, abs=1)
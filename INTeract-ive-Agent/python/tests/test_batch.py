@@ -0,0 +1,173 @@
+import json
+import pytest
+from anthropic import APIConnectionError
+from anthropic.types import Message
+from src.framework.core.agent import Agent
+from src.framework.orchestration.batch import LocalBatchEndpoint
+from conftest import AGENT_CONFIG, make_supervisor
+
+FAST = {"poll_interval": 0.01, "max_batch_size": 2}
+
+def message(text):
+    return Message.model_validate({
+        "id": "msg_1", "type": "message", "role": "assistant", "model": "m",
+        "content": [{"type": "text", "text": text}], "stop_reason": "end_turn",
+        "usage": {"input_tokens": 3, "output_tokens": 2}
+    })
+
+class Model:
+    """Answers every request with a tag and the prompt it was given."""
+
+    def __init__(self, tag="v1"):
+        self.tag = tag
+        self.calls = 0
+
+    async def __call__(self, params):
+        self.calls += 1
+        content = params["messages"][-1]["content"]
+        prompt = content if isinstance(content, str) else content[-1]["text"]
+        return message(f"{self.tag}:{prompt}")
+
+class CountingEndpoint(LocalBatchEndpoint):
+    def __init__(self, model, fail_creates=0):
+        super().__init__(model)
+        self.creates = 0
+        self.fail_creates = fail_creates
+
+    async def create(self, requests):
+        self.creates += 1
+        if self.fail_creates:
+            self.fail_creates -= 1
+            raise RuntimeError("batch API unavailable")
+        return await super().create(requests)
+
+@pytest.fixture
+def model(monkeypatch):
+    model = Model()
+
+    async def create_message(self, request):
+        return await model(request)
+
+    monkeypatch.setattr(Agent, "_create_message", create_message)
+    return model
+
+def make_batch_supervisor():
+    supervisor = make_supervisor(max_retries=3)
+    supervisor.register_worker("w", Agent({**AGENT_CONFIG, "max_tokens": 100}), ["x"])
+    return supervisor
+
+@pytest.mark.asyncio
+async def test_run_batch_completes_tasks(model):
+    supervisor = make_batch_supervisor()
+    await supervisor.submit_tasks([{"id": f"t{i}", "type": "x", "input": f"p{i}"} for i in range(5)])
+    await supervisor.submit_task({"id": "other", "type": "y", "input": "q"})
+    endpoint = CountingEndpoint(model)
+
+    results = await supervisor.run_batch(endpoint, FAST)
+
+    assert {task_id: task["result"] for task_id, task in results.items()} == {
+        f"t{i}": f"v1:p{i}" for i in range(5)
+    }
+    assert endpoint.creates == 3
+    # No worker serves "y", so it stays queued
+    assert [task["id"] for task in supervisor.task_queue] == ["other"]
+
+@pytest.mark.asyncio
+async def test_failed_submission_requeues_tasks(model):
+    supervisor = make_batch_supervisor()
+    await supervisor.submit_tasks([{"id": f"t{i}", "type": "x", "input": f"p{i}"} for i in range(3)])
+    endpoint = CountingEndpoint(model, fail_creates=1)
+
+    with pytest.raises(RuntimeError):
+        await supervisor.run_batch(endpoint, FAST)
+    assert sorted(task["id"] for task in supervisor.task_queue) == ["t0", "t1", "t2"]
+
+    results = await supervisor.run_batch(endpoint, FAST)
+    assert sorted(results) == ["t0", "t1", "t2"]
+    assert all(task["status"] == "completed" for task in results.values())
+
+@pytest.mark.asyncio
+async def test_reused_checkpoint_does_not_return_stale_results(model, tmp_path):
+    config = {**FAST, "checkpoint_path": str(tmp_path / "batch.json")}
+    first = make_batch_supervisor()
+    await first.submit_task({"id": "nightly", "type": "x", "input": "p"})
+    assert (await first.run_batch(CountingEndpoint(model), config))["nightly"]["result"] == "v1:p"
+    assert json.loads((tmp_path / "batch.json").read_text()) == {"batches": {}, "finished": {}}
+
+    model.tag = "v2"
+    second = make_batch_supervisor()
+    await second.submit_task({"id": "nightly", "type": "x", "input": "p"})
+    assert (await second.run_batch(CountingEndpoint(model), config))["nightly"]["result"] == "v2:p"
+
+@pytest.mark.asyncio
+async def test_restart_resumes_submitted_batches(model, tmp_path):
+    config = {**FAST, "checkpoint_path": str(tmp_path / "batch.json")}
+    endpoint = CountingEndpoint(model)
+    crashed = make_batch_supervisor()
+    await crashed.submit_tasks([{"id": f"t{i}", "type": "x", "input": f"p{i}"} for i in range(4)])
+
+    async def crash(*args, **kwargs):
+        raise RuntimeError("process died")
+
+    crashed._collect_batch = crash
+    with pytest.raises(RuntimeError):
+        await crashed.run_batch(endpoint, config)
+    assert endpoint.creates == 2
+
+    restarted = make_batch_supervisor()
+    await restarted.submit_tasks([{"id": f"t{i}", "type": "x", "input": f"p{i}"} for i in range(4)])
+    results = await restarted.run_batch(endpoint, config)
+
+    assert endpoint.creates == 2
+    assert all(task["status"] == "completed" for task in results.values())
+
+@pytest.mark.asyncio
+async def test_run_batch_dispatches_released_dependents(model):
+    supervisor = make_batch_supervisor()
+    await supervisor.submit_graph([
+        {"id": "a", "type": "x", "input": "first"},
+        {"id": "b", "type": "x", "input": "second", "depends_on": ["a"]},
+        {"id": "c", "type": "x", "input": "third", "depends_on": ["b"]}
+    ])
+
+    results = await supervisor.run_batch(CountingEndpoint(model), FAST)
+
+    assert [task_id for task_id in results] == ["a", "b", "c"]
+    assert all(task["status"] == "completed" for task in results.values())
+    assert "v1:first" in results["b"]["result"]
+    assert len(supervisor.task_queue) == 0
+
+class FlakyEndpoint(LocalBatchEndpoint):
+    """Drops the connection on the first call of every batch API method."""
+
+    def __init__(self, model):
+        super().__init__(model)
+        self.failed = set()
+
+    def _flake(self, method):
+        if method not in self.failed:
+            self.failed.add(method)
+            raise APIConnectionError(request=None)
+
+    async def create(self, requests):
+        self._flake("create")
+        return await super().create(requests)
+
+    async def retrieve(self, batch_id):
+        self._flake("retrieve")
+        return await super().retrieve(batch_id)
+
+    async def results(self, batch_id):
+        self._flake("results")
+        return await super().results(batch_id)
+
+@pytest.mark.asyncio
+async def test_batch_api_calls_are_retried(model):
+    supervisor = make_batch_supervisor()
+    await supervisor.submit_tasks([{"id": f"t{i}", "type": "x", "input": f"p{i}"} for i in range(2)])
+    endpoint = FlakyEndpoint(model)
+
+    results = await supervisor.run_batch(endpoint, {**FAST, "retry": {"base_delay": 0.0, "max_delay": 0.0}})
+
+    assert {task_id: task["result"] for task_id, task in results.items()} == {"t0": "v1:p0", "t1": "v1:p1"}
+    assert endpoint.failed == {"create", "retrieve", "results"}
@@ -0,0 +1,120 @@
+import re
+from types import SimpleNamespace
+import pytest
+from anthropic.types import Message
+from src.framework.core.agent import Agent
+from src.framework.core.blob_store import BlobStore, create_read_result_page_tool, spill_result
+from src.framework.core.journal import SessionJournal
+from conftest import AGENT_CONFIG
+
+BIG = "".join(f"line {i}\n" for i in range(2000))
+
+def test_put_and_read_are_content_addressed(tmp_path):
+    store = BlobStore(str(tmp_path))
+
+    handle = store.put(BIG)
+
+    assert re.fullmatch(r"result-[0-9a-f]{16}", handle)
+    assert store.put(BIG) == handle
+    assert len(list(tmp_path.iterdir())) == 1
+    assert store.read(handle) == BIG
+    assert store.read(handle, 5, 6) == BIG[5:11]
+    assert store.size(handle) == len(BIG)
+
+def test_unknown_and_malformed_handles_are_rejected(tmp_path):
+    store = BlobStore(str(tmp_path))
+
+    with pytest.raises(KeyError):
+        store.read("result-0000000000000000")
+    with pytest.raises(ValueError, match="Invalid result handle"):
+        store.read("../../etc/passwd")
+
+def test_handles_outlive_the_store_that_wrote_them(tmp_path):
+    handle = BlobStore(str(tmp_path)).put(BIG)
+
+    assert BlobStore(str(tmp_path)).read(handle) == BIG
+
+def test_spill_keeps_small_results_and_previews_large_ones(tmp_path):
+    store = BlobStore(str(tmp_path))
+
+    assert spill_result(store, "short", 1000) == "short"
+    preview = spill_result(store, BIG, 1000)
+
+    handle = re.search(r"stored as (result-\w+)", preview).group(1)
+    assert store.read(handle) == BIG
+    assert len(preview) < 1500
+    assert preview.splitlines()[1] == "line 0"
+    assert preview.rstrip().endswith("line 1999")
+
+@pytest.mark.asyncio
+async def test_read_result_page_walks_the_result(tmp_path):
+    store = BlobStore(str(tmp_path))
+    handle = store.put(BIG)
+    tool = create_read_result_page_tool(store, 5000)
+
+    first = await tool["handler"]({"handle": handle})
+    last = await tool["handler"]({"handle": handle, "offset": 15000, "limit": 99999})
+
+    assert first.startswith(f"[{handle}: chars 0-5000 of {len(BIG)}; next offset 5000]\n")
+    assert first.split("\n", 1)[1] == BIG[:5000]
+    assert last.startswith(f"[{handle}: chars 15000-{len(BIG)} of {len(BIG)}; end of result]")
+    assert last.split("\n", 1)[1] == BIG[15000:]
+
+def message(*content, stop_reason="end_turn"):
+    return Message.model_validate({
+        "id": "msg_1", "type": "message", "role": "assistant", "model": "m",
+        "content": list(content), "stop_reason": stop_reason,
+        "usage": {"input_tokens": 3, "output_tokens": 2}
+    })
+
+def tool_use(name, tool_input):
+    return {"type": "tool_use", "id": f"use-{name}", "name": name, "input": tool_input}
+
+class ScriptedClient:
+    """Answers messages.create from a script; a callable entry builds the reply from the request."""
+
+    def __init__(self, *replies):
+        self.messages = self
+        self.with_raw_response = self
+        self.replies = list(replies)
+
+    async def create(self, **request):
+        reply = self.replies.pop(0)
+        if isinstance(reply, Exception):
+            raise reply
+        if callable(reply):
+            reply = reply(request)
+        return SimpleNamespace(headers={}, parse=lambda: reply)
+
+def dump_tool():
+    async def handler(args):
+        return BIG
+    return {"name": "dump", "description": "dump", "input_schema": {"type": "object"}, "handler": handler}
+
+def make_agent(client, journal):
+    return Agent({**AGENT_CONFIG, "tools": [dump_tool()], "client": client, "journal": journal,
+                  "max_tool_result_chars": 2000, "retry": {"max_attempts": 1}})
+
+@pytest.mark.asyncio
+async def test_spilled_results_are_readable_after_resume(tmp_path):
+    journal = SessionJournal.for_session("s1", str(tmp_path))
+    crashed = make_agent(ScriptedClient(message(tool_use("dump", {}), stop_reason="tool_use"),
+                                        ConnectionError("process died")), journal)
+    with pytest.raises(ConnectionError):
+        await crashed.run("dump it")
+    assert crashed.blob_store.root == journal.blob_root
+
+    def read_spilled(request):
+        handle = re.search(r"stored as (result-\w+)", str(request["messages"][-1]["content"])).group(1)
+        return message(tool_use("read_result_page", {"handle": handle, "offset": 100, "limit": 50}),
+                       stop_reason="tool_use")
+
+    # A new process: nothing shared with the crashed agent but the session directory
+    resumed = make_agent(ScriptedClient(read_spilled, message({"type": "text", "text": "done"})),
+                         SessionJournal.for_session("s1", str(tmp_path)))
+    result = await resumed.resume()
+
+    assert result["response"] == "done"
+    page = resumed.conversation_history[-2]["content"][0]
+    assert not page.get("is_error")
+    assert page["content"].split("\n", 1)[1] == BIG[100:150]
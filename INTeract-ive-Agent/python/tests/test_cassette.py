@@ -0,0 +1,119 @@
+from types import SimpleNamespace
+import pytest
+from anthropic.types import Message
+from src.framework.core.agent import Agent
+from src.framework.core.cassette import Cassette, CassetteMiss, request_hash
+from conftest import AGENT_CONFIG
+
+def message(text, stop_reason="end_turn", tool=None):
+    content = [{"type": "text", "text": text}]
+    if tool:
+        content.append({"type": "tool_use", "id": "t1", "name": tool, "input": {"q": text}})
+    return Message.model_validate({
+        "id": "msg_1", "type": "message", "role": "assistant", "model": "m",
+        "content": content, "stop_reason": stop_reason,
+        "usage": {"input_tokens": 3, "output_tokens": 2}
+    })
+
+class LiveClient:
+    """Answers messages.create with scripted replies, like the API would."""
+
+    def __init__(self, *replies):
+        self.messages = self
+        self.with_raw_response = self
+        self.replies = list(replies)
+        self.calls = 0
+
+    async def create(self, **request):
+        self.calls += 1
+        reply = self.replies.pop(0)
+        return SimpleNamespace(headers={}, parse=lambda: reply)
+
+class OfflineClient:
+    """Fails the test if a replaying agent reaches the network."""
+
+    def __init__(self):
+        self.messages = self
+        self.with_raw_response = self
+
+    async def create(self, **request):
+        raise AssertionError("replay went to the API")
+
+    def stream(self, **request):
+        raise AssertionError("replay went to the API")
+
+def lookup_tool():
+    async def handler(args):
+        return f"found {args['q']}"
+    return {"name": "lookup", "description": "lookup", "input_schema": {"type": "object"}, "handler": handler}
+
+def make_agent(client, cassette):
+    return Agent({**AGENT_CONFIG, "tools": [lookup_tool()], "client": client, "cassette": cassette,
+                  "max_tool_result_chars": 0})
+
+async def record(path):
+    cassette = Cassette(path, mode="record")
+    client = LiveClient(message("checking", "tool_use", tool="lookup"), message("answer"))
+    result = await make_agent(client, cassette).run("question")
+    return cassette, client, result
+
+def test_request_hash_ignores_key_order():
+    assert request_hash({"a": 1, "b": [1, {"c": 2, "d": 3}]}) == request_hash({"b": [1, {"d": 3, "c": 2}], "a": 1})
+    assert request_hash({"a": 1}) != request_hash({"a": 2})
+
+@pytest.mark.asyncio
+async def test_recorded_run_replays_offline(tmp_path):
+    path = str(tmp_path / "session.jsonl")
+    recorder, client, recorded = await record(path)
+    assert recorder.recorded == 2 and client.calls == 2
+
+    cassette = Cassette(path)
+    replayed = await make_agent(OfflineClient(), cassette).run("question")
+
+    assert replayed == recorded
+    assert cassette.stats() == {"recorded": 0, "replayed": 2, "remaining": 0}
+
+@pytest.mark.asyncio
+async def test_run_recording_replays_through_stream(tmp_path):
+    path = str(tmp_path / "session.jsonl")
+    _, _, recorded = await record(path)
+
+    events = [e async for e in make_agent(OfflineClient(), Cassette(path)).stream("question")]
+
+    assert [e["type"] for e in events] == ["text", "tool_call", "tool_result", "text", "done"]
+    assert events[2]["content"] == "found checking"
+    assert events[-1]["result"]["response"] == recorded["response"]
+
+@pytest.mark.asyncio
+async def test_identical_requests_replay_in_recorded_order(tmp_path):
+    path = str(tmp_path / "session.jsonl")
+    recorder = Cassette(path, mode="record")
+    request = {"model": "m", "messages": [{"role": "user", "content": "same"}]}
+    recorder.record(request, message("first"), 0.0)
+    recorder.record(request, message("second"), 0.0)
+
+    cassette = Cassette(path)
+
+    assert (await cassette.replay(request)).content[0].text == "first"
+    assert (await cassette.replay(request)).content[0].text == "second"
+    with pytest.raises(CassetteMiss):
+        await cassette.replay(request)
+
+@pytest.mark.asyncio
+async def test_changed_prompt_is_a_replay_miss(tmp_path):
+    path = str(tmp_path / "session.jsonl")
+    await record(path)
+
+    with pytest.raises(CassetteMiss, match="No recorded response"):
+        await make_agent(OfflineClient(), Cassette(path)).run("a different question")
+
+def test_recording_starts_a_fresh_file(tmp_path):
+    path = tmp_path / "nested" / "session.jsonl"
+    path.parent.mkdir()
+    path.write_text("stale\n")
+
+    Cassette(str(path), mode="record")
+
+    assert path.read_text() == ""
+    with pytest.raises(ValueError, match="Unknown cassette mode"):
+        Cassette(str(path), mode="rewind")
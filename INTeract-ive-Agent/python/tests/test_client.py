@@ -0,0 +1,94 @@
+import asyncio
+import pytest
+import src.framework.core.client as client_module
+from src.framework.core.agent import Agent
+from src.framework.core.client import ClientRegistry
+from conftest import AGENT_CONFIG
+
+@pytest.fixture(autouse=True)
+def api_key(monkeypatch):
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "test-key")
+
+@pytest.fixture
+def registry(monkeypatch):
+    registry = ClientRegistry()
+    monkeypatch.setattr(client_module, "client_registry", registry)
+    return registry
+
+def test_client_is_shared_and_configured():
+    registry = ClientRegistry({"max_retries": 2})
+
+    client = registry.get_client()
+
+    assert registry.get_client() is client
+    assert client.max_retries == 2
+
+@pytest.mark.asyncio
+async def test_configure_closes_the_old_client():
+    registry = ClientRegistry()
+    old = registry.get_client()
+
+    await registry.configure({"max_retries": 4})
+    new = registry.get_client()
+
+    assert old.is_closed()
+    assert new is not old and not new.is_closed()
+    assert new.max_retries == 4
+    await registry.aclose()
+
+@pytest.mark.asyncio
+async def test_configure_is_refused_while_requests_are_in_flight():
+    registry = ClientRegistry({"max_in_flight": 1})
+    client = registry.get_client()
+    entered = asyncio.Event()
+    release = asyncio.Event()
+
+    async def request():
+        async with registry.track():
+            entered.set()
+            await release.wait()
+
+    running = asyncio.ensure_future(request())
+    await entered.wait()
+    semaphore = registry._semaphore
+
+    with pytest.raises(RuntimeError, match="1 requests are in flight"):
+        await registry.configure({"max_in_flight": 4})
+    assert registry.get_client() is client
+    assert registry._semaphore is semaphore
+
+    release.set()
+    await running
+    assert semaphore._value == 1
+    await registry.configure({"max_in_flight": 4})
+    assert registry.config["max_in_flight"] == 4
+    await registry.aclose()
+
+@pytest.mark.asyncio
+async def test_max_in_flight_caps_concurrent_requests():
+    registry = ClientRegistry({"max_in_flight": 2})
+
+    async def request():
+        async with registry.track():
+            await asyncio.sleep(0.01)
+
+    await asyncio.gather(*(request() for _ in range(6)))
+
+    assert registry.stats() == {"in_flight": 0, "peak_in_flight": 2, "total_requests": 6}
+
+@pytest.mark.asyncio
+async def test_agents_built_earlier_follow_configure(registry):
+    agent = Agent({**AGENT_CONFIG})
+    before = agent.client
+
+    await registry.configure({"max_retries": 5})
+
+    assert agent.client is not before
+    assert agent.client is registry.get_client()
+    assert agent.client.max_retries == 5
+    await registry.aclose()
+
+def test_agent_keeps_an_explicit_client(registry):
+    explicit = object()
+
+    assert Agent({**AGENT_CONFIG, "client": explicit}).client is explicit
@@ -0,0 +1,83 @@
+import asyncio
+import time
+import pytest
+from src.framework.orchestration.hedging import LatencyTracker
+from conftest import make_supervisor
+
+class StragglerAgent:
+    """Answers quickly, except that the first run of a "straggle" prompt hangs."""
+
+    def __init__(self, calls):
+        self.calls = calls
+        self.config = {}
+
+    async def run(self, prompt, first_response=None):
+        self.calls.append(prompt)
+        delay = 10.0 if prompt == "straggle" and self.calls.count(prompt) == 1 else 0.01
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            self.calls.append(f"cancelled:{prompt}")
+            raise
+        return {"response": f"{prompt}:{delay}"}
+
+def make_hedged_supervisor(hedging):
+    supervisor = make_supervisor(max_concurrent=4, hedging=hedging)
+    calls = []
+    for i in range(2):
+        supervisor.register_worker(f"w{i}", StragglerAgent(calls), ["x"])
+    return supervisor, calls
+
+async def warm_up(supervisor, count):
+    await supervisor.run_tasks([{"id": f"warm{i}", "type": "x", "input": "warm"} for i in range(count)])
+
+def test_percentile_needs_min_samples():
+    tracker = LatencyTracker()
+    for seconds in range(4):
+        tracker.record("x", seconds)
+
+    assert tracker.percentile("x", 0.5, min_samples=5) is None
+    assert tracker.percentile("y", 0.5) is None
+    tracker.record("x", 4)
+    assert tracker.percentile("x", 0.5, min_samples=5) == 2
+
+def test_percentile_of_recent_window():
+    tracker = LatencyTracker(window=100)
+    for seconds in range(1, 101):
+        tracker.record("x", seconds)
+
+    assert tracker.percentile("x", 0.95) == 96
+    assert tracker.percentile("x", 1.0) == 100
+    assert tracker.percentile("x", 0.0) == 1
+    for _ in range(100):
+        tracker.record("x", 0.5)
+    # The older, slower runs have left the window
+    assert tracker.percentile("x", 0.95) == 0.5
+
+@pytest.mark.asyncio
+async def test_straggler_is_hedged_and_loser_cancelled():
+    supervisor, calls = make_hedged_supervisor({"percentile": 0.9, "min_samples": 5})
+    await warm_up(supervisor, 10)
+
+    started = time.monotonic()
+    results = await supervisor.run_tasks([{"id": "s", "type": "x", "input": "straggle"}])
+
+    assert results["s"]["status"] == "completed"
+    assert results["s"]["result"] == "straggle:0.01"
+    assert time.monotonic() - started < 2
+    assert supervisor.hedge_stats == {"hedged": 1, "won": 1}
+    assert "cancelled:straggle" in calls
+    assert all(w["current_task"] is None for w in supervisor.workers.values())
+
+@pytest.mark.asyncio
+async def test_no_hedging_until_enough_samples():
+    supervisor, calls = make_hedged_supervisor({"percentile": 0.9, "min_samples": 50})
+    await warm_up(supervisor, 10)
+
+    task = asyncio.ensure_future(supervisor.run_tasks([{"id": "s", "type": "x", "input": "straggle"}]))
+    await asyncio.sleep(0.5)
+
+    assert not task.done()
+    assert supervisor.hedge_stats == {"hedged": 0, "won": 0}
+    assert calls.count("straggle") == 1
+    task.cancel()
@@ -0,0 +1,89 @@
+from anthropic.types import ToolUseBlock
+from src.framework.core.history import HistoryManager, estimate_tokens
+
+def turn(i, payload_chars=0, input_chars=0):
+    """An assistant tool_use and the user tool_result answering it."""
+    return [
+        {"role": "assistant", "content": [
+            ToolUseBlock(type="tool_use", id=f"t{i}", name="write_file", input={"content": "w" * input_chars, "path": f"f{i}"})
+        ]},
+        {"role": "user", "content": [
+            {"type": "tool_result", "tool_use_id": f"t{i}", "content": f"result {i} " + "r" * payload_chars}
+        ]}
+    ]
+
+def conversation(turns, **sizes):
+    history = [{"role": "user", "content": "task"}]
+    for i in range(turns):
+        history += turn(i, **sizes)
+    return history
+
+def total(history):
+    return sum(estimate_tokens(m) for m in history)
+
+def tool_ids(history, block_type):
+    ids = []
+    for message in history:
+        if isinstance(message["content"], str):
+            continue
+        for block in message["content"]:
+            block = block.model_dump() if hasattr(block, "model_dump") else block
+            if block["type"] == block_type:
+                ids.append(block["id"] if block_type == "tool_use" else block["tool_use_id"])
+    return ids
+
+def test_history_under_budget_is_untouched():
+    history = conversation(3, payload_chars=1000)
+    snapshot = list(history)
+
+    assert HistoryManager({"max_tokens": 10000}).compact(history) == 0
+    assert history == snapshot
+
+def test_old_tool_payloads_are_stubbed_oldest_first():
+    history = conversation(6, payload_chars=4000)
+    before = total(history)
+    manager = HistoryManager({"max_tokens": before - 1500, "keep_recent_messages": 2, "stub_chars": 50})
+
+    saved = manager.compact(history)
+
+    assert saved == before - total(history) > 1500
+    results = [m["content"][0]["content"] for m in history[2::2]]
+    # Two stubs are enough to get under budget; later results are kept whole
+    assert [r.startswith("[Elided") for r in results] == [True, True, False, False, False, False]
+    assert "Preview: result 0 rrr" in results[0]
+    assert len(history) == 13
+
+def test_large_tool_inputs_are_stubbed_too():
+    history = conversation(4, input_chars=4000)
+    manager = HistoryManager({"max_tokens": total(history) - 500, "keep_recent_messages": 2, "stub_chars": 50})
+
+    manager.compact(history)
+
+    first_input = history[1]["content"][0]["input"]
+    assert first_input["content"].startswith("[Elided 4000 chars")
+    assert first_input["path"] == "f0"
+
+def test_recent_messages_are_never_compacted():
+    history = conversation(3, payload_chars=4000)
+    recent = history[-4:]
+
+    HistoryManager({"max_tokens": 10, "keep_recent_messages": 4, "stub_chars": 50}).compact(history)
+
+    assert history[-4:] == recent
+    assert history[0] == {"role": "user", "content": "task"}
+
+def test_dropping_turns_keeps_tool_use_and_result_together():
+    history = conversation(10, payload_chars=300)
+    manager = HistoryManager({"max_tokens": total(history) // 3, "keep_recent_messages": 4, "stub_chars": 1000})
+
+    saved = manager.compact(history)
+
+    assert saved > 0
+    assert total(history) <= manager.config["max_tokens"]
+    assert history[0] == {"role": "user", "content": "task"}
+    # Whole turns went, oldest first, so every result still follows its call
+    assert [m["role"] for m in history] == ["user"] + ["assistant", "user"] * ((len(history) - 1) // 2)
+    assert tool_ids(history, "tool_use") == tool_ids(history, "tool_result")
+    assert tool_ids(history, "tool_use")[-2:] == ["t8", "t9"]
+    for call, result in zip(history[1::2], history[2::2]):
+        assert call["content"][0].id == result["content"][0]["tool_use_id"]
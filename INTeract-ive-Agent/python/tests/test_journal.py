@@ -0,0 +1,130 @@
+from types import SimpleNamespace
+import pytest
+from anthropic.types import Message
+from src.framework.core.agent import Agent
+from src.framework.core.journal import SessionJournal
+from conftest import AGENT_CONFIG
+
+USAGE = {"input": 3, "output": 2, "cache_read": 0, "cache_creation": 0}
+
+def message(*content, stop_reason="end_turn"):
+    return Message.model_validate({
+        "id": "msg_1", "type": "message", "role": "assistant", "model": "m",
+        "content": list(content), "stop_reason": stop_reason,
+        "usage": {"input_tokens": 3, "output_tokens": 2}
+    })
+
+def text(value):
+    return {"type": "text", "text": value}
+
+def tool_use(tool_id="t1"):
+    return {"type": "tool_use", "id": tool_id, "name": "lookup", "input": {}}
+
+def tool_result(tool_id="t1"):
+    return {"type": "tool_result", "tool_use_id": tool_id, "content": "found"}
+
+class ScriptedClient:
+    def __init__(self, *replies):
+        self.messages = self
+        self.with_raw_response = self
+        self.replies = list(replies)
+        self.requests = []
+
+    async def create(self, **request):
+        self.requests.append(request)
+        reply = self.replies.pop(0)
+        if isinstance(reply, Exception):
+            raise reply
+        return SimpleNamespace(headers={}, parse=lambda: reply)
+
+def lookup_tool(calls):
+    async def handler(args):
+        calls.append(args)
+        return "found"
+    return {"name": "lookup", "description": "lookup", "input_schema": {"type": "object"}, "handler": handler}
+
+def make_agent(client, journal, calls=None):
+    return Agent({**AGENT_CONFIG, "tools": [lookup_tool([] if calls is None else calls)], "client": client,
+                  "journal": journal, "retry": {"max_attempts": 1}})
+
+def test_restore_replays_events_into_history(tmp_path):
+    journal = SessionJournal.for_session("s", str(tmp_path))
+    journal.append("user", content="question")
+    journal.append("response", message=message(tool_use(), stop_reason="tool_use"), usage=USAGE)
+    journal.append("tool_results", results=[tool_result()], iterations=1, tools_used=["lookup"])
+    journal.append("response", message=message(text("answer")), usage={**USAGE, "input": 6})
+
+    state = SessionJournal(journal.path).restore()
+
+    assert [m["role"] for m in state["history"]] == ["user", "assistant", "user"]
+    assert state["history"][1]["content"][0].name == "lookup"
+    assert state["history"][2]["content"] == [tool_result()]
+    assert state["pending_response"].content[0].text == "answer"
+    assert state["usage"]["input"] == 6
+    assert (state["iterations"], state["tools_used"], state["result"]) == (1, ["lookup"], None)
+
+def test_torn_last_line_is_skipped_and_terminated(tmp_path):
+    journal = SessionJournal.for_session("s", str(tmp_path))
+    journal.append("user", content="question")
+    with open(journal.path, "a") as f:
+        f.write('{"event": "response", "mess')
+
+    assert SessionJournal(journal.path).restore()["pending_response"] is None
+
+    reopened = SessionJournal(journal.path)
+    reopened.append("user", content="again")
+    assert [m["content"] for m in reopened.restore()["history"]] == ["question", "again"]
+
+def test_missing_journal_restores_nothing(tmp_path):
+    assert SessionJournal.for_session("nope", str(tmp_path)).restore() is None
+
+@pytest.mark.asyncio
+async def test_resume_runs_pending_tools_without_asking_again(tmp_path):
+    journal = SessionJournal.for_session("s", str(tmp_path))
+    journal.append("user", content="question")
+    # The process died after this response arrived, before its tool finished
+    journal.append("response", message=message(tool_use(), stop_reason="tool_use"), usage=USAGE)
+    calls = []
+    client = ScriptedClient(message(text("answer")))
+
+    result = await make_agent(client, SessionJournal(journal.path), calls).resume()
+
+    assert len(calls) == 1
+    assert len(client.requests) == 1
+    assert client.requests[0]["messages"][-1]["content"][0]["tool_use_id"] == "t1"
+    assert result["response"] == "answer"
+    assert result["iterations"] == 1
+    assert result["total_tokens"]["input"] == 6
+
+@pytest.mark.asyncio
+async def test_resume_after_tool_results_asks_for_the_next_response(tmp_path):
+    journal = SessionJournal.for_session("s", str(tmp_path))
+    calls = []
+    crashed = make_agent(ScriptedClient(message(tool_use(), stop_reason="tool_use"), ConnectionError("down")),
+                         journal, calls)
+    with pytest.raises(ConnectionError):
+        await crashed.run("question")
+
+    client = ScriptedClient(message(text("answer")))
+    result = await make_agent(client, SessionJournal(journal.path), calls).resume()
+
+    assert len(calls) == 1
+    assert [m["role"] for m in client.requests[0]["messages"]] == ["user", "assistant", "user"]
+    assert result["response"] == "answer" and result["tools_used"] == ["lookup"]
+
+@pytest.mark.asyncio
+async def test_finished_run_returns_its_recorded_result(tmp_path):
+    journal = SessionJournal.for_session("s", str(tmp_path))
+    recorded = await make_agent(ScriptedClient(message(text("answer"))), journal).run("question")
+
+    agent = make_agent(ScriptedClient(), SessionJournal(journal.path))
+
+    assert await agent.resume() == recorded
+    assert [m["role"] for m in agent.conversation_history] == ["user", "assistant"]
+
+@pytest.mark.asyncio
+async def test_resume_without_a_journal_is_an_error(tmp_path):
+    with pytest.raises(ValueError, match="No journaled session"):
+        await Agent({**AGENT_CONFIG, "client": ScriptedClient()}).resume()
+    with pytest.raises(ValueError, match="No journaled session"):
+        await make_agent(ScriptedClient(), SessionJournal.for_session("nope", str(tmp_path))).resume()
@@ -0,0 +1,94 @@
+import pytest
+from src.framework.orchestration.metrics import SupervisorMetrics
+from src.framework.orchestration.remote import WorkerLost
+from conftest import EchoAgent, make_supervisor
+
+EXPECTED = """\
+# HELP interact_queue_depth Tasks queued and ready to run.
+# TYPE interact_queue_depth gauge
+interact_queue_depth{capability="x"} 0
+# HELP interact_blocked_tasks Tasks waiting on dependencies.
+# TYPE interact_blocked_tasks gauge
+interact_blocked_tasks 0
+# HELP interact_active_tasks Tasks currently running.
+# TYPE interact_active_tasks gauge
+interact_active_tasks 0
+# HELP interact_max_concurrent_tasks Configured task concurrency limit.
+# TYPE interact_max_concurrent_tasks gauge
+interact_max_concurrent_tasks 3
+# HELP interact_workers Healthy workers serving each capability.
+# TYPE interact_workers gauge
+interact_workers{capability="x"} 1
+# HELP interact_workers_busy Healthy workers running a task, per capability.
+# TYPE interact_workers_busy gauge
+interact_workers_busy{capability="x"} 0
+# HELP interact_pool_size Sessions in each worker pool.
+# TYPE interact_pool_size gauge
+# HELP interact_pool_max_size Configured maximum size of each worker pool.
+# TYPE interact_pool_max_size gauge
+# HELP interact_tasks_submitted_total Tasks submitted to the supervisor.
+# TYPE interact_tasks_submitted_total counter
+interact_tasks_submitted_total{capability="x"} 2
+interact_tasks_submitted_total{capability="say \\"hi\\"\\\\now\\n"} 1
+# HELP interact_tasks_finished_total Tasks that reached a final status.
+# TYPE interact_tasks_finished_total counter
+# HELP interact_task_retries_total Run attempts that were queued again, by reason (failed or worker_lost).
+# TYPE interact_task_retries_total counter
+# HELP interact_task_hedges_total Speculative duplicates started for straggling tasks.
+# TYPE interact_task_hedges_total counter
+# HELP interact_task_leases_lost_total Finished runs whose queue lease had been reclaimed; outcome not stored.
+# TYPE interact_task_leases_lost_total counter
+# HELP interact_worker_runs_total Run attempts per worker, by outcome.
+# TYPE interact_worker_runs_total counter
+# HELP interact_worker_busy_seconds_total Seconds workers spent running tasks.
+# TYPE interact_worker_busy_seconds_total counter
+# HELP interact_task_wait_seconds Time from submission to first dispatch.
+# TYPE interact_task_wait_seconds histogram
+# HELP interact_task_run_seconds Duration of each run attempt.
+# TYPE interact_task_run_seconds histogram
+interact_task_run_seconds_bucket{capability="x",outcome="completed",le="0.1"} 1
+interact_task_run_seconds_bucket{capability="x",outcome="completed",le="1"} 2
+interact_task_run_seconds_bucket{capability="x",outcome="completed",le="+Inf"} 3
+interact_task_run_seconds_sum{capability="x",outcome="completed"} 2.5625
+interact_task_run_seconds_count{capability="x",outcome="completed"} 3
+"""
+
+def test_render_matches_prometheus_text_format():
+    supervisor = make_supervisor(max_concurrent=3)
+    supervisor.register_worker("w", EchoAgent(), ["x"])
+    metrics = SupervisorMetrics(supervisor, buckets=(0.1, 1.0))
+
+    metrics.inc("interact_tasks_submitted_total", 2, capability="x")
+    metrics.inc("interact_tasks_submitted_total", capability='say "hi"\\now\n')
+    for seconds in (0.0625, 0.5, 2.0):
+        metrics.observe("interact_task_run_seconds", seconds, outcome="completed", capability="x")
+
+    assert metrics.render() == EXPECTED
+
+class FlakyAgent:
+    """Fails each prompt's first run with the error mapped to it."""
+
+    def __init__(self, errors):
+        self.errors = dict(errors)
+        self.config = {}
+
+    async def run(self, prompt, first_response=None):
+        error = self.errors.pop(prompt, None)
+        if error:
+            raise error
+        return {"response": prompt}
+
+@pytest.mark.asyncio
+async def test_retries_are_counted_by_reason():
+    supervisor = make_supervisor(max_retries=1)
+    supervisor.register_worker("w", FlakyAgent({"lost": WorkerLost("node gone"), "failed": RuntimeError("boom")}), ["x"])
+
+    results = await supervisor.run_tasks([{"id": name, "type": "x", "input": name} for name in ("lost", "failed", "ok")])
+
+    assert {task["status"] for task in results.values()} == {"completed"}
+    counters = supervisor.metrics.snapshot()["counters"]
+    assert sorted((c["labels"]["reason"], c["value"]) for c in counters["interact_task_retries_total"]) == [
+        ("failed", 1), ("worker_lost", 1)
+    ]
+    runs = {c["labels"]["outcome"]: c["value"] for c in counters["interact_worker_runs_total"]}
+    assert runs == {"lost": 1, "retried": 1, "completed": 3}
@@ -0,0 +1,95 @@
+from anthropic.types import TextBlock, ToolUseBlock
+from src.framework.core.agent import CACHE_CONTROL, Agent
+from conftest import AGENT_CONFIG
+
+def tool(name):
+    async def handler(args):
+        return name
+    return {"name": name, "description": name, "input_schema": {"type": "object"}, "handler": handler}
+
+def make_agent(**config):
+    return Agent({**AGENT_CONFIG, "tools": [tool("read"), tool("grep")], "max_tool_result_chars": 0, **config})
+
+def breakpoints(value):
+    if hasattr(value, "model_dump"):
+        value = value.model_dump(exclude_none=True)
+    if isinstance(value, dict):
+        return (value.get("cache_control") is not None) + sum(breakpoints(v) for v in value.values())
+    if isinstance(value, list):
+        return sum(breakpoints(v) for v in value)
+    return 0
+
+def add_turn(agent, i):
+    agent.conversation_history.append({"role": "assistant", "content": [
+        TextBlock(type="text", text=f"looking {i}"),
+        ToolUseBlock(type="tool_use", id=f"t{i}", name="read", input={"path": str(i)})
+    ]})
+    agent.conversation_history.append({"role": "user", "content": [
+        {"type": "tool_result", "tool_use_id": f"t{i}", "content": f"contents {i}"}
+    ]})
+
+def test_breakpoints_on_system_tools_and_newest_message():
+    agent = make_agent()
+    agent.conversation_history.append({"role": "user", "content": "hello"})
+
+    request = agent._build_request()
+
+    assert request["system"] == [{"type": "text", "text": "s", "cache_control": CACHE_CONTROL}]
+    assert "cache_control" not in request["tools"][0]
+    # The blob store's read_result_page tool is disabled here, so grep is last
+    assert request["tools"][-1]["name"] == "grep"
+    assert request["tools"][-1]["cache_control"] == CACHE_CONTROL
+    assert request["messages"] == [
+        {"role": "user", "content": [{"type": "text", "text": "hello", "cache_control": CACHE_CONTROL}]}
+    ]
+
+def test_breakpoint_moves_to_the_last_block_of_the_newest_turn():
+    agent = make_agent()
+    agent.conversation_history.append({"role": "user", "content": "hello"})
+    add_turn(agent, 0)
+
+    messages = agent._build_request()["messages"]
+
+    assert messages[0] == {"role": "user", "content": "hello"}
+    assert "cache_control" not in messages[1]["content"][-1].model_dump(exclude_none=True)
+    assert messages[-1]["content"] == [
+        {"type": "tool_result", "tool_use_id": "t0", "content": "contents 0", "cache_control": CACHE_CONTROL}
+    ]
+
+def test_breakpoints_stay_within_the_limit_and_history_is_untouched():
+    agent = make_agent()
+    agent.conversation_history.append({"role": "user", "content": "hello"})
+    for i in range(10):
+        add_turn(agent, i)
+        request = agent._build_request()
+        # System prompt, tools and newest message; the API allows at most four
+        assert breakpoints(request) == 3
+
+    assert breakpoints(agent.conversation_history) == 0
+
+def test_first_request_marks_the_new_prompt():
+    agent = make_agent()
+
+    request = agent.first_request("hello")
+
+    assert request["messages"][-1]["content"][-1]["cache_control"] == CACHE_CONTROL
+    assert agent.conversation_history == []
+
+def test_caching_disabled_sends_no_breakpoints():
+    agent = make_agent(prompt_caching=False)
+    agent.conversation_history.append({"role": "user", "content": "hello"})
+    add_turn(agent, 0)
+
+    request = agent._build_request()
+
+    assert request["system"] == "s"
+    assert breakpoints(request) == 0
+
+def test_agent_without_tools_uses_two_breakpoints():
+    agent = make_agent(tools=[])
+    agent.conversation_history.append({"role": "user", "content": "hello"})
+
+    request = agent._build_request()
+
+    assert request["tools"] == []
+    assert breakpoints(request) == 2
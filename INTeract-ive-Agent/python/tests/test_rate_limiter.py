@@ -0,0 +1,108 @@
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+import pytest
+from src.framework.core.agent import Agent
+from src.framework.resilience.rate_limiter import RateLimiter
+
+def make_agent(client, limiter):
+    return Agent({
+        "name": "test",
+        "model": "claude-test",
+        "max_tokens": 100,
+        "system_prompt": "s",
+        "tools": [],
+        "client": client,
+        "rate_limiter": limiter,
+        "retry": {"max_attempts": 1, "base_delay": 0.0, "max_delay": 0.0}
+    })
+
+class FailingClient:
+    def __init__(self):
+        self.messages = self
+        self.with_raw_response = self
+        self.calls = 0
+
+    async def create(self, **kwargs):
+        self.calls += 1
+        raise RuntimeError("boom")
+
+def test_retry_after_seconds():
+    limiter = RateLimiter()
+    limiter.update_from_headers({"retry-after": "5"})
+
+    assert 4.5 < limiter.paused_until - time.monotonic() <= 5.0
+
+def test_retry_after_http_date():
+    limiter = RateLimiter()
+    when = datetime.now(timezone.utc) + timedelta(seconds=30)
+    limiter.update_from_headers({"retry-after": format_datetime(when, usegmt=True)})
+
+    assert 28 < limiter.paused_until - time.monotonic() <= 30
+
+def test_retry_after_iso_timestamp():
+    limiter = RateLimiter()
+    when = datetime.now(timezone.utc) + timedelta(seconds=30)
+    limiter.update_from_headers({"retry-after": when.isoformat()})
+
+    assert 28 < limiter.paused_until - time.monotonic() <= 30
+
+def test_retry_after_garbage_is_ignored():
+    limiter = RateLimiter()
+    limiter.update_from_headers({"retry-after": "soon"})
+
+    assert limiter.paused_until <= time.monotonic()
+
+@pytest.mark.asyncio
+async def test_failed_request_refunds_reservation():
+    limiter = RateLimiter({"requests_per_minute": None, "input_tokens_per_minute": 10000, "output_tokens_per_minute": 10000})
+    client = FailingClient()
+    agent = make_agent(client, limiter)
+
+    with pytest.raises(RuntimeError):
+        await agent.run("hello")
+
+    assert client.calls == 1
+    assert limiter.input_tokens.tokens == pytest.approx(10000, abs=1)
+    assert limiter.output_tokens.tokens == pytest.approx(10000, abs=1)
+
+@pytest.mark.asyncio
+async def test_settle_refunds_unused_estimate():
+    limiter = RateLimiter({"requests_per_minute": None, "input_tokens_per_minute": 10000, "output_tokens_per_minute": 10000})
+    reservation = await limiter.acquire(500, 1000)
+    limiter.settle(reservation, 400, 100)
+
+    assert limiter.input_tokens.tokens == pytest.approx(9600, abs=1)
+    assert limiter.output_tokens.tokens == pytest.approx(9900, abs=1)
+
+@pytest.mark.asyncio
+async def test_cancelled_after_admission_refunds_reservation():
+    limiter = RateLimiter({"requests_per_minute": 60, "input_tokens_per_minute": 600, "output_tokens_per_minute": 600})
+    limiter.paused_until = time.monotonic() + 60
+    waiter = asyncio.ensure_future(limiter.acquire(100, 200))
+    await asyncio.sleep(0)
+
+    # Admit it and cancel the caller before it gets to run again
+    future = limiter._waiters[0][4]
+    limiter.paused_until = 0.0
+    future.set_result(limiter._consume(100, 200))
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+
+    assert limiter.requests.tokens == pytest.approx(60, abs=0.1)
+    assert limiter.input_tokens.tokens == pytest.approx(600, abs=1)
+    assert limiter.output_tokens.tokens == pytest.approx(600, abs=1)
+
+def test_limiter_serves_successive_event_loops():
+    limiter = RateLimiter()
+
+    async def contended():
+        # A short pause makes callers queue, which starts the admission pump
+        limiter.paused_until = time.monotonic() + 0.02
+        return await asyncio.gather(*(limiter.acquire(10, 10, priority=i) for i in range(3)))
+
+    for _ in range(2):
+        assert len(asyncio.run(contended())) == 3
+        assert not limiter._waiters
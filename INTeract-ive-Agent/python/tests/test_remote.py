@@ -0,0 +1,165 @@
+import asyncio
+import os
+import subprocess
+import sys
+import textwrap
+from collections import Counter
+import pytest
+from src.framework.core.agent import Agent
+from src.framework.orchestration.remote import RemoteWorkerNode, read_frame, send_frame
+from src.framework.orchestration.router import ModelRouter
+from conftest import AGENT_CONFIG, make_supervisor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# A worker node whose agents answer with the node's PID after a short delay
+NODE_SCRIPT = textwrap.dedent("""
+    import asyncio, os, sys
+    from src.framework.core.agent import Agent
+    from src.framework.orchestration.remote import RemoteWorkerNode
+
+    async def run(self, prompt, first_response=None):
+        await asyncio.sleep(0.02)
+        return {"response": f"{os.getpid()}:{prompt}"}
+
+    Agent.run = run
+    config = {"name": "n", "model": "m", "max_tokens": 10, "system_prompt": "s", "tools": []}
+    node = RemoteWorkerNode({"x": config}, slots=4, heartbeat_interval=0.2)
+    asyncio.run(node.run(port=int(sys.argv[1])))
+""")
+
+def config(name, model="m"):
+    return {**AGENT_CONFIG, "name": name, "model": model}
+
+@pytest.fixture
+def agents(monkeypatch):
+    """Patched Agent.run: "slow" agents hang, others answer with agent name and model."""
+    running = Counter()
+    peak = Counter()
+
+    async def run(self, prompt, first_response=None):
+        name = self.config["name"]
+        running[name] += 1
+        peak[name] = max(peak[name], running[name])
+        try:
+            await asyncio.sleep(30 if name == "slow" else 0.05)
+            response = "" if self.config["model"] == "small" else f"{name}:{self.config['model']}:{prompt}"
+            return {"response": response, "stop_reason": "end_turn", "total_tokens": {"input": 1, "output": 1}}
+        finally:
+            running[name] -= 1
+
+    monkeypatch.setattr(Agent, "run", run)
+    return peak
+
+async def start_server(max_retries=1):
+    supervisor = make_supervisor(max_concurrent=8, max_retries=max_retries)
+    server = await supervisor.accept_remote_workers(heartbeat_timeout=1.0)
+    return supervisor, server, server._server.sockets[0].getsockname()[1]
+
+async def start_node(server, port, node):
+    running = asyncio.ensure_future(node.run(port=port))
+    while node.node_id not in server.nodes:
+        await asyncio.sleep(0.01)
+    return running
+
+async def wait_until(condition):
+    while not condition():
+        await asyncio.sleep(0.01)
+
+@pytest.mark.asyncio
+async def test_replacement_node_picks_up_a_lost_task(agents):
+    supervisor, server, port = await start_server()
+    dying = await start_node(server, port, RemoteWorkerNode({"x": config("slow")}, slots=1, node_id="a"))
+
+    run = asyncio.ensure_future(supervisor.run_tasks([{"id": "t", "type": "x", "input": "go"}]))
+    await wait_until(lambda: supervisor.active_tasks)
+    dying.cancel()
+    await wait_until(lambda: "a" not in server.nodes)
+    # The task is queued again with no worker left; the waiter keeps the loop alive
+    await asyncio.sleep(0.1)
+    assert not run.done() and supervisor.is_running
+
+    replacement = await start_node(server, port, RemoteWorkerNode({"x": config("fast")}, node_id="b"))
+    results = await asyncio.wait_for(run, timeout=5)
+
+    assert results["t"]["status"] == "completed"
+    assert results["t"]["result"] == "fast:m:go"
+    assert results["t"]["retry_count"] == 1
+    await server.close()
+    await replacement
+
+@pytest.mark.asyncio
+async def test_lost_node_spends_a_retry(agents):
+    supervisor, server, port = await start_server(max_retries=0)
+    dying = await start_node(server, port, RemoteWorkerNode({"x": config("slow")}, node_id="a"))
+
+    run = asyncio.ensure_future(supervisor.run_tasks([{"id": "t", "type": "x", "input": "go"}]))
+    await wait_until(lambda: supervisor.active_tasks)
+    dying.cancel()
+    results = await asyncio.wait_for(run, timeout=5)
+
+    assert results["t"]["status"] == "failed"
+    assert "lost" in results["t"]["error"]
+    await server.close()
+
+@pytest.mark.asyncio
+async def test_node_runs_at_most_slots_tasks(agents):
+    connected = asyncio.get_running_loop().create_future()
+    server = await asyncio.start_server(lambda r, w: connected.set_result((r, w)), "127.0.0.1", 0)
+    node = RemoteWorkerNode({"x": config("n")}, slots=2, heartbeat_interval=60)
+    running = asyncio.ensure_future(node.run(port=server.sockets[0].getsockname()[1]))
+    reader, writer = await connected
+    assert (await read_frame(reader))["type"] == "hello"
+
+    for i in range(6):
+        await send_frame(writer, {"type": "task", "task_id": str(i), "task_type": "x", "input": str(i), "prompt": str(i)})
+    results = []
+    while len(results) < 6:
+        frame = await read_frame(reader)
+        if frame["type"] == "result":
+            results.append(frame["result"]["response"])
+
+    assert sorted(results) == [f"n:m:{i}" for i in range(6)]
+    assert agents["n"] == 2
+    writer.close()
+    await running
+    server.close()
+
+@pytest.mark.asyncio
+async def test_node_routes_tasks_through_its_router(agents):
+    supervisor, server, port = await start_server()
+    router = ModelRouter([{"name": "small", "model": "small"}, {"name": "large", "model": "large"}])
+    node = RemoteWorkerNode({"x": config("n")}, router=router)
+    running = await start_node(server, port, node)
+
+    results = await supervisor.run_tasks([{"id": "t", "type": "x", "input": "go"}])
+
+    # The small tier's empty answer fails validation and escalates
+    assert results["t"]["result"] == "n:large:go"
+    assert router.tier_stats["small"]["escalated"] == 1
+    await server.close()
+    await running
+
+@pytest.mark.asyncio
+async def test_nodes_in_separate_processes_survive_one_dropping_out():
+    supervisor, server, port = await start_server(max_retries=3)
+    nodes = [subprocess.Popen([sys.executable, "-c", NODE_SCRIPT, str(port)], cwd=ROOT) for _ in range(2)]
+    try:
+        await asyncio.wait_for(wait_until(lambda: len(server.nodes) == 2), timeout=30)
+
+        run = asyncio.ensure_future(supervisor.run_tasks([
+            {"id": str(i), "type": "x", "input": str(i)} for i in range(200)
+        ]))
+        await wait_until(lambda: len(supervisor.completed_tasks) >= 20)
+        nodes[0].kill()
+        results = await asyncio.wait_for(run, timeout=60)
+    finally:
+        await server.close()
+        for node in nodes:
+            node.kill()
+            await asyncio.to_thread(node.wait, 10)
+
+    assert Counter(t["status"] for t in results.values()) == {"completed": 200}
+    by_node = Counter(t["result"].split(":")[0] for t in results.values())
+    assert set(by_node) == {str(nodes[0].pid), str(nodes[1].pid)}
+    assert all(t["result"].endswith(f":{task_id}") for task_id, t in results.items())
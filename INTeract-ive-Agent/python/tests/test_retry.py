@@ -0,0 +1,106 @@
+import time
+from email.utils import format_datetime
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+import pytest
+from anthropic import APIConnectionError, APIStatusError
+from src.framework.resilience.retry import is_retryable, parse_retry_after, retry_after, task_deadline, with_retry
+
+FAST = {"max_attempts": 4, "base_delay": 0.0, "max_delay": 0.0}
+
+def status_error(status, **headers):
+    response = SimpleNamespace(status_code=status, headers=headers, request=None)
+    return APIStatusError(f"HTTP {status}", response=response, body=None)
+
+class Flaky:
+    def __init__(self, *errors, result="ok"):
+        self.errors = list(errors)
+        self.result = result
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return self.result
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    delays = []
+
+    async def sleep(delay):
+        delays.append(delay)
+
+    monkeypatch.setattr("src.framework.resilience.retry.asyncio.sleep", sleep)
+    return delays
+
+def test_retryable_errors():
+    assert is_retryable(APIConnectionError(request=None))
+    assert all(is_retryable(status_error(s)) for s in (408, 409, 429, 500, 529))
+    assert not is_retryable(status_error(400))
+    assert not is_retryable(status_error(500, **{"x-should-retry": "false"}))
+    assert is_retryable(status_error(400, **{"x-should-retry": "true"}))
+    assert not is_retryable(ValueError("bug"))
+
+def test_retry_after_accepts_seconds_and_dates():
+    later = datetime.now(timezone.utc) + timedelta(seconds=30)
+
+    assert parse_retry_after("2.5") == 2.5
+    assert parse_retry_after(format_datetime(later, usegmt=True)) == pytest.approx(30, abs=2)
+    assert parse_retry_after(later.isoformat()) == pytest.approx(30, abs=2)
+    assert parse_retry_after("-3") == 0.0
+    assert parse_retry_after("soon") is None
+
+    assert retry_after(status_error(429, **{"retry-after-ms": "1500", "retry-after": "9"})) == 1.5
+    assert retry_after(status_error(429, **{"retry-after": format_datetime(later, usegmt=True)})) == pytest.approx(30, abs=2)
+    assert retry_after(status_error(429)) is None
+    assert retry_after(ValueError()) is None
+
+@pytest.mark.asyncio
+async def test_transient_errors_are_retried(sleeps):
+    fn = Flaky(APIConnectionError(request=None), status_error(529))
+
+    assert await with_retry(fn, FAST) == "ok"
+    assert fn.calls == 3 and len(sleeps) == 2
+
+@pytest.mark.asyncio
+async def test_server_retry_after_replaces_backoff(sleeps):
+    fn = Flaky(status_error(429, **{"retry-after": "7"}))
+
+    await with_retry(fn, {**FAST, "max_delay": 1.0})
+
+    assert sleeps == [7.0]
+
+@pytest.mark.asyncio
+async def test_non_retryable_errors_raise_at_once(sleeps):
+    fn = Flaky(status_error(400), ValueError("unreachable"))
+
+    with pytest.raises(APIStatusError):
+        await with_retry(fn, FAST)
+    assert fn.calls == 1 and not sleeps
+
+    with pytest.raises(ValueError):
+        await with_retry(Flaky(ValueError("bug")), FAST)
+
+@pytest.mark.asyncio
+async def test_gives_up_after_max_attempts(sleeps):
+    fn = Flaky(*[status_error(500)] * 5)
+
+    with pytest.raises(APIStatusError):
+        await with_retry(fn, FAST)
+    assert fn.calls == 4 and len(sleeps) == 3
+
+@pytest.mark.asyncio
+async def test_no_retry_past_the_task_deadline(sleeps):
+    fn = Flaky(status_error(429, **{"retry-after": "10"}))
+    token = task_deadline.set(time.monotonic() + 5)
+    try:
+        with pytest.raises(APIStatusError):
+            await with_retry(fn, FAST)
+    finally:
+        task_deadline.reset(token)
+
+    assert fn.calls == 1 and not sleeps
+    # Without a deadline the same error is waited out
+    assert await with_retry(Flaky(status_error(429, **{"retry-after": "10"})), FAST) == "ok"
+    assert sleeps == [10.0]
@@ -0,0 +1,118 @@
+import pytest
+from src.framework.core.agent import Agent
+from src.framework.orchestration.router import ModelRouter, task_input_size
+from conftest import AGENT_CONFIG, make_supervisor
+
+TIERS = [
+    {"name": "small", "model": "haiku", "max_input_chars": 100, "task_types": ["lint", "summarize"]},
+    {"name": "medium", "model": "sonnet", "max_input_chars": 10000, "task_types": None},
+    {"name": "large", "model": "opus", "max_input_chars": None, "task_types": None}
+]
+
+def result(response, stop_reason="end_turn"):
+    return {"response": response, "iterations": 0, "tools_used": [], "stop_reason": stop_reason,
+            "total_tokens": {"input": 10, "output": 5}, "history_tokens_saved": []}
+
+@pytest.fixture
+def replies(monkeypatch):
+    """Model name -> AgentResult each tier's agent answers with; records the models asked."""
+    replies = {}
+    replies["asked"] = []
+
+    async def run(self, prompt, first_response=None):
+        replies["asked"].append((self.config["model"], first_response))
+        return replies[self.config["model"]]
+
+    monkeypatch.setattr(Agent, "run", run)
+    return replies
+
+def task(task_type="lint", data="x"):
+    return {"id": "t", "type": task_type, "input": data}
+
+def test_route_picks_the_cheapest_eligible_tier(tmp_path):
+    router = ModelRouter(TIERS)
+    big_file = tmp_path / "big.py"
+    big_file.write_text("y" * 500)
+
+    assert router.route(task("lint")) == 0
+    assert router.route(task("refactor")) == 1
+    assert router.route(task("lint", "y" * 101)) == 1
+    assert router.route(task("lint", {"files": [str(big_file)]})) == 1
+    assert router.route(task("lint", "y" * 20000)) == 2
+    assert task_input_size(task("lint", {"path": str(big_file), "n": 3})) == len(str(big_file)) + 500 + 1
+
+def test_route_falls_back_to_the_last_tier():
+    router = ModelRouter([{"name": "only-lint", "model": "haiku", "max_input_chars": None, "task_types": ["lint"]},
+                          {"name": "tiny", "model": "sonnet", "max_input_chars": 1, "task_types": None}])
+
+    assert router.route(task("refactor", "long input")) == 1
+    with pytest.raises(ValueError):
+        ModelRouter([])
+
+def test_agent_for_swaps_only_the_model():
+    base = Agent({**AGENT_CONFIG, "max_iterations": 7})
+
+    agent = ModelRouter(TIERS).agent_for(base, 2)
+
+    assert agent is not base
+    assert agent.config["model"] == "opus"
+    assert agent.config["max_iterations"] == 7 and agent.config["system_prompt"] == base.config["system_prompt"]
+
+@pytest.mark.asyncio
+async def test_accepted_result_stops_the_cascade(replies):
+    router = ModelRouter(TIERS)
+    replies["haiku"] = result("fine")
+
+    assert (await router.run(task(), Agent(AGENT_CONFIG), "go", "first"))["response"] == "fine"
+    assert replies["asked"] == [("haiku", "first")]
+    assert router.stats()["small"]["hit_rate"] == 1.0
+    assert router.stats()["medium"]["attempts"] == 0
+
+@pytest.mark.asyncio
+async def test_empty_or_cut_off_results_escalate(replies):
+    router = ModelRouter(TIERS)
+    replies.update({"haiku": result("  "), "sonnet": result("partial", "max_tokens"), "opus": result("done")})
+
+    final = await router.run(task(), Agent(AGENT_CONFIG), "go", "first")
+
+    assert final["response"] == "done"
+    # The batched first response belongs to the routed tier only
+    assert replies["asked"] == [("haiku", "first"), ("sonnet", None), ("opus", None)]
+    stats = router.stats()
+    assert [stats[t]["escalated"] for t in ("small", "medium", "large")] == [1, 1, 0]
+    assert [stats[t]["accepted"] for t in ("small", "medium", "large")] == [0, 0, 1]
+    assert stats["medium"]["input_tokens"] == 10 and stats["medium"]["output_tokens"] == 5
+
+@pytest.mark.asyncio
+async def test_last_tier_answer_is_kept_when_nothing_validates(replies):
+    router = ModelRouter(TIERS)
+    replies.update({"sonnet": result("", "tool_use"), "opus": result("still cut off", "tool_use")})
+
+    final = await router.run(task("refactor"), Agent(AGENT_CONFIG), "go")
+
+    assert final["response"] == "still cut off"
+    assert router.stats()["large"]["escalated"] == 0
+    assert router.stats()["large"]["hit_rate"] == 0.0
+
+@pytest.mark.asyncio
+async def test_custom_validator_applies_to_its_task_type(replies):
+    router = ModelRouter(TIERS, validators={"lint": lambda t, r: "PASS" in r["response"]})
+    replies.update({"haiku": result("looks ok"), "sonnet": result("PASS")})
+
+    assert (await router.run(task("lint"), Agent(AGENT_CONFIG), "go"))["response"] == "PASS"
+    # Other types keep the default rules, which accept "looks ok"
+    assert (await router.run(task("summarize"), Agent(AGENT_CONFIG), "go"))["response"] == "looks ok"
+    assert router.stats()["small"]["attempts"] == 2
+
+@pytest.mark.asyncio
+async def test_supervisor_runs_tasks_through_the_router(replies):
+    router = ModelRouter(TIERS)
+    replies.update({"haiku": result(""), "sonnet": result("escalated")})
+    supervisor = make_supervisor()
+    supervisor.router = router
+    supervisor.register_worker("w", Agent(AGENT_CONFIG), ["lint"])
+
+    results = await supervisor.run_tasks([task("lint")])
+
+    assert results["t"]["result"] == "escalated"
+    assert [model for model, _ in replies["asked"]] == ["haiku", "sonnet"]
@@ -0,0 +1,248 @@
+import asyncio
+import os
+import subprocess
+import sys
+import textwrap
+import threading
+import time
+import pytest
+from src.framework.core.agent import Agent
+from src.framework.orchestration.sqlite_queue import SQLiteTaskQueue
+from conftest import AGENT_CONFIG, EchoAgent, make_supervisor, task
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Completes every claimable task in the queue file, tagging results with its PID
+DRAIN_SCRIPT = textwrap.dedent("""
+    import os, sys, time
+    from src.framework.orchestration.sqlite_queue import SQLiteTaskQueue
+
+    queue = SQLiteTaskQueue(sys.argv[1])
+    while True:
+        task = queue.pop_ready(lambda task_type: True)
+        if task is None:
+            break
+        time.sleep(0.001)
+        queue.complete({**task, "status": "completed", "result": os.getpid()})
+    queue.close()
+""")
+
+def test_restart_keeps_results_and_remaining_work(tmp_path):
+    path = str(tmp_path / "tasks.db")
+    queue = SQLiteTaskQueue(path)
+    queue.push_many([task("a", priority=2), task("b", priority=1), task("c")])
+    done = queue.pop_ready(lambda t: True)
+    queue.complete({**done, "status": "completed", "result": "A"})
+    queue.close()
+
+    restarted = SQLiteTaskQueue(path)
+    assert restarted.completed()["a"]["result"] == "A"
+    assert [t["id"] for t in restarted.drain()] == ["b", "c"]
+    restarted.close()
+
+@pytest.mark.asyncio
+async def test_restarted_supervisor_finishes_the_rest(tmp_path):
+    path = str(tmp_path / "tasks.db")
+    first = make_supervisor(task_queue=SQLiteTaskQueue(path))
+    first.register_worker("w", EchoAgent(), ["x"])
+    await first.run_tasks([task("a")])
+    # Nothing in the first process serves "y", so these outlive it
+    await first.submit_tasks([task("b", "y"), task("c", "y")])
+    first.task_queue.close()
+
+    second = make_supervisor(task_queue=SQLiteTaskQueue(path))
+    second.register_worker("w", EchoAgent(), ["x", "y"])
+    assert set(second.completed_tasks) == {"a"}
+    await second.orchestrate()
+
+    assert {t: second.completed_tasks[t]["status"] for t in "abc"} == {t: "completed" for t in "abc"}
+    second.task_queue.close()
+
+def test_expired_lease_is_claimed_again(tmp_path):
+    path = str(tmp_path / "tasks.db")
+    crashed = SQLiteTaskQueue(path, lease_seconds=0.05, owner="crashed")
+    other = SQLiteTaskQueue(path, owner="other")
+    crashed.push(task("t"))
+    assert crashed.pop_ready(lambda t: True)["id"] == "t"
+    assert other.pop_ready(lambda t: True) is None
+
+    time.sleep(0.1)
+    assert other.pop_ready(lambda t: True)["id"] == "t"
+    # The lease now belongs to the other process
+    assert not crashed.renew("t")
+    assert other.renew("t")
+    crashed.close()
+    other.close()
+
+@pytest.mark.asyncio
+async def test_running_task_keeps_its_lease(tmp_path):
+    path = str(tmp_path / "tasks.db")
+    supervisor = make_supervisor(task_queue=SQLiteTaskQueue(path, lease_seconds=0.3, owner="runner"))
+    supervisor.register_worker("w", EchoAgent(delay=1.0), ["x"])
+    rival = SQLiteTaskQueue(path, owner="rival")
+
+    run = asyncio.ensure_future(supervisor.run_tasks([task("slow")]))
+    stolen = []
+    while not run.done():
+        await asyncio.sleep(0.05)
+        stolen.append(rival.pop_ready(lambda t: True))
+
+    assert (await run)["slow"]["status"] == "completed"
+    assert stolen and not any(stolen)
+    supervisor.task_queue.close()
+    rival.close()
+
+@pytest.mark.asyncio
+async def test_queue_calls_run_off_the_event_loop(tmp_path):
+    queue = SQLiteTaskQueue(str(tmp_path / "tasks.db"))
+    supervisor = make_supervisor(task_queue=queue)
+    supervisor.register_worker("w", EchoAgent(), ["x"])
+    threads = set()
+    pop_ready = queue.pop_ready
+
+    def recording_pop_ready(can_run):
+        threads.add(threading.current_thread().name)
+        return pop_ready(can_run)
+
+    queue.pop_ready = recording_pop_ready
+    await supervisor.run_tasks([task(str(i)) for i in range(5)])
+
+    assert threads and all(name.startswith("sqlite-task-queue") for name in threads)
+    queue.close()
+
+@pytest.mark.asyncio
+async def test_waiter_resolves_when_another_process_finishes(tmp_path):
+    path = str(tmp_path / "tasks.db")
+    supervisor = make_supervisor(task_queue=SQLiteTaskQueue(path, poll_interval=0.05))
+    await supervisor.submit_tasks([task("remote")])
+
+    waiter = asyncio.ensure_future(supervisor.wait_for_task("remote"))
+    await asyncio.sleep(0.1)
+    assert not waiter.done()
+
+    drain = await asyncio.to_thread(
+        subprocess.run, [sys.executable, "-c", DRAIN_SCRIPT, path], cwd=ROOT, timeout=60
+    )
+    assert drain.returncode == 0
+    finished = await asyncio.wait_for(waiter, timeout=5)
+
+    assert finished["status"] == "completed"
+    assert supervisor.completed_tasks["remote"]["result"] != os.getpid()
+    supervisor.task_queue.close()
+
+def test_two_processes_share_one_file(tmp_path):
+    path = str(tmp_path / "tasks.db")
+    queue = SQLiteTaskQueue(path)
+    queue.push_many([task(str(i)) for i in range(400)])
+
+    workers = [
+        subprocess.Popen([sys.executable, "-c", DRAIN_SCRIPT, path], cwd=ROOT)
+        for _ in range(2)
+    ]
+    assert [p.wait(timeout=120) for p in workers] == [0, 0]
+
+    completed = queue.completed()
+    assert len(completed) == 400
+    assert len(queue) == 0
+    # Each task was completed by one of the two processes
+    assert {t["result"] for t in completed.values()} <= {p.pid for p in workers}
+    queue.close()
+
+def test_claims_follow_priority_across_types(tmp_path):
+    queue = SQLiteTaskQueue(str(tmp_path / "tasks.db"))
+    queue.push_many([task("x1", "x", 1), task("y2", "y", 2), task("z3", "z", 3), task("y1", "y", 1), task("x2", "x", 2)])
+
+    popped = [queue.pop_ready(lambda t: t != "z")["id"] for _ in range(4)]
+
+    assert popped == ["y2", "x2", "x1", "y1"]
+    assert queue.pop_ready(lambda t: t != "z") is None
+    assert queue.depth("z") == 1 and queue.depth("x") == 0
+    queue.close()
+
+def test_claims_read_the_index_instead_of_every_row(tmp_path):
+    queue = SQLiteTaskQueue(str(tmp_path / "tasks.db"))
+    queue.push_many([task(str(i), "xyz"[i % 3], i % 4) for i in range(300)])
+    statements = []
+    queue._db.set_trace_callback(statements.append)
+    queue.pop_ready(lambda t: t != "z")
+    queue.depth("x")
+    queue._db.set_trace_callback(None)
+
+    plans = [
+        " / ".join(row[-1] for row in queue._db.execute(f"EXPLAIN QUERY PLAN {sql}"))
+        for sql in statements if not sql.startswith(("BEGIN", "COMMIT"))
+    ]
+    assert plans
+    for plan in plans:
+        # No full scans, and ORDER BY comes straight from tasks_ready
+        assert "SCAN tasks" not in plan and "TEMP B-TREE" not in plan, plan
+    queue.close()
+
+def test_complete_requires_the_lease(tmp_path):
+    path = str(tmp_path / "tasks.db")
+    slow = SQLiteTaskQueue(path, lease_seconds=0.05, owner="slow")
+    other = SQLiteTaskQueue(path, owner="other")
+    slow.push(task("t"))
+    claimed = slow.pop_ready(lambda t: True)
+    time.sleep(0.1)
+    reclaimed = other.pop_ready(lambda t: True)
+
+    assert reclaimed["id"] == "t"
+    # The slow process finishing late does not overwrite the new run
+    assert not slow.complete({**claimed, "status": "completed", "result": "late"})
+    assert "t" in other
+    assert other.complete({**reclaimed, "status": "completed", "result": "fresh"})
+    assert other.completed()["t"]["result"] == "fresh"
+    slow.close()
+    other.close()
+
+@pytest.mark.asyncio
+async def test_depth_is_read_off_the_event_loop(tmp_path, monkeypatch):
+    async def run(self, prompt, first_response=None):
+        await asyncio.sleep(0.01)
+        return {"response": prompt}
+
+    monkeypatch.setattr(Agent, "run", run)
+    queue = SQLiteTaskQueue(str(tmp_path / "tasks.db"))
+    supervisor = make_supervisor(max_concurrent=4, task_queue=queue)
+    # Idle sessions expire at once, so every dispatch asks whether to shrink
+    supervisor.register_pool("pool", AGENT_CONFIG, ["x"], {"min_size": 0, "max_size": 4, "idle_timeout": 0.0})
+    threads = []
+    depth = queue.depth
+
+    def recording_depth(task_type):
+        threads.append(threading.current_thread().name)
+        return depth(task_type)
+
+    queue.depth = recording_depth
+    await supervisor.run_tasks([task(str(i)) for i in range(8)])
+    await supervisor.submit_tasks([task("a"), task("b")])
+
+    gauge = lambda: supervisor.metrics.snapshot()["gauges"]["interact_queue_depth"]
+    assert gauge() == [{"labels": {"capability": "x"}, "value": 0}]
+    await supervisor.metrics.refresh()
+    assert gauge() == [{"labels": {"capability": "x"}, "value": 2}]
+    assert threads and all(name.startswith("sqlite-task-queue") for name in threads)
+    queue.close()
+
+@pytest.mark.asyncio
+async def test_lost_lease_is_counted_and_not_stored(tmp_path):
+    path = str(tmp_path / "tasks.db")
+    supervisor = make_supervisor(task_queue=SQLiteTaskQueue(path, lease_seconds=0.05, owner="slow"))
+    # Longer than the lease, and too short for the renewer to run
+    supervisor.register_worker("w", EchoAgent(delay=0.1), ["x"])
+    supervisor._renew_lease = lambda task, lease: asyncio.sleep(0)
+    rival = SQLiteTaskQueue(path, owner="rival")
+
+    run = asyncio.ensure_future(supervisor.run_tasks([task("t")]))
+    await asyncio.sleep(0.08)
+    stolen = rival.pop_ready(lambda t: True)
+    results = await run
+
+    assert stolen["id"] == "t"
+    assert results["t"]["status"] == "completed"
+    assert rival.completed() == {}
+    counters = supervisor.metrics.snapshot()["counters"]["interact_task_leases_lost_total"]
+    assert counters == [{"labels": {"capability": "x"}, "value": 1}]
+    supervisor.task_queue.close()
+    rival.close()
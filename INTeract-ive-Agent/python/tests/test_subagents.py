@@ -0,0 +1,40 @@
+import importlib
+import importlib.util
+import pytest
+
+# pattern_detector needs refactor_tools, which is not part of this tree yet
+HAS_REFACTOR_TOOLS = importlib.util.find_spec("src.framework.tools.refactor_tools") is not None
+
+@pytest.mark.parametrize("module, agent_name", [
+    ("src.agents.subagents.diff_generator", "diff_generator"),
+    ("src.agents.subagents.code_analyzer", "code_analyzer"),
+    pytest.param(
+        "src.agents.subagents.pattern_detector", "pattern_detector",
+        marks=pytest.mark.skipif(not HAS_REFACTOR_TOOLS, reason="refactor_tools is not available")
+    ),
+])
+def test_subagent_imports(module, agent_name):
+    agent = getattr(importlib.import_module(module), agent_name)
+    names = [tool["name"] for tool in agent.config["tools"]]
+
+    assert len(names) == len(set(names))
+    assert all(callable(tool["handler"]) for tool in agent.config["tools"])
+
+def test_diff_generator_tools():
+    from src.agents.subagents.diff_generator import diff_generator
+    names = {tool["name"] for tool in diff_generator.config["tools"]}
+
+    assert {"generate_diff_preview", "generate_batch_diff_preview", "apply_patch_set"} <= names
+
+@pytest.mark.asyncio
+async def test_generate_diff_preview_tool_uses_unified_diff():
+    from src.framework.tools.preview_tools import generate_diff_preview_tool
+    result = await generate_diff_preview_tool["handler"]({
+        "file_path": "mod.py",
+        "original_content": "a\nb\nc\n",
+        "new_content": "a\nB\nc\n"
+    })
+
+    assert result["additions"] == 1
+    assert result["deletions"] == 1
+    assert "-b\n+B\n" in result["diff"]
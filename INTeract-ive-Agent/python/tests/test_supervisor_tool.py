@@ -0,0 +1,102 @@
+import asyncio
+import json
+import pytest
+from src.framework.tools.supervisor_tool import create_delegate_tasks_tool, create_supervisor_tool
+from conftest import EchoAgent, make_supervisor
+
+class ConcurrencyAgent(EchoAgent):
+    """EchoAgent that records how many runs overlapped."""
+
+    def __init__(self, delay=0.05, failing=()):
+        super().__init__(delay, failing)
+        self.running = 0
+        self.peak = 0
+
+    async def run(self, prompt, first_response=None):
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        try:
+            return await super().run(prompt, first_response)
+        finally:
+            self.running -= 1
+
+def register_workers(supervisor, agent, capabilities, count):
+    # One task per worker at a time, so parallelism needs several workers
+    for i in range(count):
+        supervisor.register_worker(f"w{i}", agent, capabilities)
+
+def item(task_id, task_type="detect-patterns", **extra):
+    return {"task_id": task_id, "type": task_type, "input": {"file": f"{task_id}.py"}, **extra}
+
+@pytest.mark.asyncio
+async def test_delegate_tasks_runs_them_in_parallel():
+    supervisor = make_supervisor(max_concurrent=4)
+    agent = ConcurrencyAgent()
+    register_workers(supervisor, agent, ["detect-patterns"], 4)
+    tool = create_delegate_tasks_tool(supervisor)
+
+    results = json.loads(await tool["handler"]({"tasks": [item(f"t{i}") for i in range(4)]}))
+
+    assert agent.peak == 4
+    assert set(results) == {"t0", "t1", "t2", "t3"}
+    for task_id, outcome in results.items():
+        assert outcome["status"] == "completed" and outcome["error"] is None
+        assert f"{task_id}.py" in outcome["result"]
+
+@pytest.mark.asyncio
+async def test_concurrent_tool_calls_share_the_supervisor():
+    supervisor = make_supervisor(max_concurrent=6)
+    agent = ConcurrencyAgent()
+    register_workers(supervisor, agent, ["detect-patterns", "analyze-structure"], 4)
+    tool = create_delegate_tasks_tool(supervisor)
+
+    first, second = await asyncio.gather(
+        tool["handler"]({"tasks": [item("a1"), item("a2")]}),
+        tool["handler"]({"tasks": [item("b1", "analyze-structure"), item("b2", "analyze-structure")]})
+    )
+
+    # Each call gets exactly its own tasks back, and all four ran at once
+    assert set(json.loads(first)) == {"a1", "a2"}
+    assert set(json.loads(second)) == {"b1", "b2"}
+    assert agent.peak == 4
+
+@pytest.mark.asyncio
+async def test_failures_are_reported_per_task():
+    supervisor = make_supervisor()
+    supervisor.register_worker("w", EchoAgent(failing=["bad.py"]), ["detect-patterns"])
+    tool = create_delegate_tasks_tool(supervisor)
+
+    results = json.loads(await tool["handler"]({"tasks": [item("good"), item("bad")]}))
+
+    assert results["good"]["status"] == "completed"
+    assert results["bad"] == {"status": "failed", "result": None, "error": "tool crashed"}
+
+@pytest.mark.asyncio
+async def test_priority_orders_queued_tasks():
+    supervisor = make_supervisor(max_concurrent=1)
+    agent = EchoAgent()
+    supervisor.register_worker("w", agent, ["detect-patterns"])
+    tool = create_delegate_tasks_tool(supervisor)
+
+    await tool["handler"]({"tasks": [item("low"), item("high", priority=5), item("mid", priority=2)]})
+
+    assert [next(n for n in ("low", "high", "mid") if f"{n}.py" in p) for p in agent.prompts] == ["high", "mid", "low"]
+
+@pytest.mark.asyncio
+async def test_unserviceable_type_is_rejected():
+    supervisor = make_supervisor()
+    supervisor.register_worker("w", EchoAgent(), ["detect-patterns"])
+    tool = create_delegate_tasks_tool(supervisor)
+
+    with pytest.raises(ValueError, match="generate-diff"):
+        await tool["handler"]({"tasks": [item("t", "generate-diff")]})
+    assert not supervisor.task_queue
+
+@pytest.mark.asyncio
+async def test_delegate_task_returns_the_result_or_error():
+    supervisor = make_supervisor()
+    supervisor.register_worker("w", EchoAgent(failing=["bad.py"]), ["detect-patterns"])
+    tool = create_supervisor_tool(supervisor)
+
+    assert "good.py" in await tool["handler"](item("good"))
+    assert await tool["handler"](item("bad")) == "tool crashed"
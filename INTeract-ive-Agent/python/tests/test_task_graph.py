@@ -0,0 +1,85 @@
+import json
+import pytest
+from conftest import EchoAgent, make_supervisor
+
+def make_graph_supervisor(agent):
+    supervisor = make_supervisor(max_concurrent=4)
+    supervisor.register_worker("w1", agent, ["x"])
+    return supervisor
+
+@pytest.mark.asyncio
+async def test_cycle_is_rejected_before_anything_runs():
+    agent = EchoAgent()
+    supervisor = make_graph_supervisor(agent)
+
+    with pytest.raises(ValueError, match="cycle"):
+        await supervisor.run_graph([
+            {"id": "a", "type": "x", "input": "a", "depends_on": ["c"]},
+            {"id": "b", "type": "x", "input": "b", "depends_on": ["a"]},
+            {"id": "c", "type": "x", "input": "c", "depends_on": ["b"]},
+            {"id": "free", "type": "x", "input": "free"}
+        ])
+
+    assert len(supervisor.task_queue) == 0
+    assert not supervisor.blocked_tasks
+    assert agent.prompts == []
+
+@pytest.mark.asyncio
+async def test_unknown_dependency_is_rejected():
+    supervisor = make_graph_supervisor(EchoAgent())
+
+    with pytest.raises(ValueError, match="unknown task missing"):
+        await supervisor.submit_graph([{"id": "a", "type": "x", "input": "a", "depends_on": ["missing"]}])
+    assert len(supervisor.task_queue) == 0
+
+@pytest.mark.asyncio
+async def test_duplicate_ids_are_rejected():
+    supervisor = make_graph_supervisor(EchoAgent())
+
+    with pytest.raises(ValueError, match="duplicate"):
+        await supervisor.submit_graph([{"id": "a", "type": "x", "input": "1"}, {"id": "a", "type": "x", "input": "2"}])
+
+@pytest.mark.asyncio
+async def test_dependents_receive_upstream_results():
+    agent = EchoAgent()
+    supervisor = make_graph_supervisor(agent)
+
+    results = await supervisor.run_graph([
+        {"id": "merge", "type": "x", "input": "merge", "depends_on": ["left", "right"]},
+        {"id": "left", "type": "x", "input": "left"},
+        {"id": "right", "type": "x", "input": "right"}
+    ])
+
+    assert all(t["status"] == "completed" for t in results.values())
+    assert results["merge"]["upstream_results"] == {"left": "left", "right": "right"}
+    assert agent.prompts[-1].startswith("merge")
+    assert json.loads(agent.prompts[-1].split("depends on:\n", 1)[1]) == results["merge"]["upstream_results"]
+
+@pytest.mark.asyncio
+async def test_dependency_on_finished_task():
+    supervisor = make_graph_supervisor(EchoAgent())
+    await supervisor.run_tasks([{"id": "earlier", "type": "x", "input": "earlier"}])
+
+    results = await supervisor.run_graph([{"id": "later", "type": "x", "input": "later", "depends_on": ["earlier"]}])
+
+    assert results["later"]["upstream_results"] == {"earlier": "earlier"}
+
+@pytest.mark.asyncio
+async def test_failure_propagates_to_all_dependents():
+    agent = EchoAgent(failing=["root"])
+    supervisor = make_graph_supervisor(agent)
+
+    results = await supervisor.run_graph([
+        {"id": "root", "type": "x", "input": "root"},
+        {"id": "child", "type": "x", "input": "child", "depends_on": ["root"]},
+        {"id": "grandchild", "type": "x", "input": "grandchild", "depends_on": ["child"]},
+        {"id": "sibling", "type": "x", "input": "sibling"}
+    ])
+
+    assert results["root"]["status"] == "failed"
+    assert results["child"]["status"] == "failed"
+    assert results["child"]["error"] == "Upstream task root failed"
+    assert results["grandchild"]["error"] == "Upstream task child failed"
+    assert results["sibling"]["status"] == "completed"
+    assert sorted(agent.prompts) == ["root", "sibling"]
+    assert not supervisor.blocked_tasks and not supervisor.dependents
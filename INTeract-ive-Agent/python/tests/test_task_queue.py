@@ -0,0 +1,94 @@
+import asyncio
+import time
+import pytest
+from src.framework.orchestration.task_queue import TaskQueue
+from conftest import EchoAgent, make_supervisor, task
+
+def test_pops_highest_priority_first():
+    queue = TaskQueue()
+    queue.push_many([task("low", priority=0), task("high", priority=5), task("mid", priority=2)])
+
+    assert [queue.pop_ready(lambda t: True)["id"] for _ in range(3)] == ["high", "mid", "low"]
+    assert queue.pop_ready(lambda t: True) is None
+
+def test_fifo_within_a_priority():
+    queue = TaskQueue()
+    queue.push_many([task(str(i)) for i in range(10)])
+
+    assert [queue.pop_ready(lambda t: True)["id"] for _ in range(10)] == [str(i) for i in range(10)]
+
+def test_front_pushes_jump_their_priority_level():
+    queue = TaskQueue()
+    queue.push_many([task("a"), task("b"), task("urgent", priority=1)])
+    queue.push(task("retried"), front=True)
+
+    assert [queue.pop_ready(lambda t: True)["id"] for _ in range(4)] == ["urgent", "retried", "a", "b"]
+
+def test_pop_ready_skips_types_that_cannot_run():
+    queue = TaskQueue()
+    queue.push_many([task("busy", "x", priority=9), task("free", "y")])
+
+    assert queue.pop_ready(lambda t: t == "y")["id"] == "free"
+    assert queue.depth("x") == 1
+    assert queue.get("busy")["id"] == "busy"
+    assert queue.get("free") is None
+    assert len(queue) == 1
+
+def test_drain_returns_best_first():
+    queue = TaskQueue()
+    queue.push_many([task("x1", "x"), task("y1", "y", priority=3), task("x2", "x", priority=1)])
+
+    assert [t["id"] for t in queue.drain()] == ["y1", "x2", "x1"]
+    assert len(queue) == 0
+
+@pytest.mark.asyncio
+async def test_run_tasks_follows_priority_order():
+    supervisor = make_supervisor(max_concurrent=1)
+    supervisor.register_worker("w", EchoAgent(), ["x"])
+    await supervisor.submit_tasks([
+        {"id": "low", "type": "x", "input": "l", "priority": 0},
+        {"id": "high", "type": "x", "input": "h", "priority": 9}
+    ])
+
+    results = await supervisor.run_tasks([{"id": "mid", "type": "x", "input": "m", "priority": 5}])
+    await supervisor._wait_all(["low", "high"])
+
+    order = sorted(supervisor.completed_tasks.values(), key=lambda t: t["started_at"])
+    assert [t["id"] for t in order] == ["high", "mid", "low"]
+    assert results["mid"]["result"] == "m"
+
+@pytest.mark.asyncio
+async def test_submit_wakes_running_dispatch_loop():
+    supervisor = make_supervisor()
+    supervisor.register_worker("slow", EchoAgent(delay=1.0), ["slow"])
+    supervisor.register_worker("fast", EchoAgent(), ["fast"])
+
+    slow = asyncio.ensure_future(supervisor.run_tasks([{"id": "s", "type": "slow", "input": "s"}]))
+    await asyncio.sleep(0.05)
+    assert supervisor.is_running
+
+    started = time.monotonic()
+    await supervisor.run_tasks([{"id": "f", "type": "fast", "input": "f"}])
+
+    # Dispatched as soon as it was submitted, not when the slow task freed the loop
+    assert time.monotonic() - started < 0.5
+    assert not slow.done()
+    await slow
+
+@pytest.mark.asyncio
+async def test_dispatch_throughput():
+    supervisor = make_supervisor(max_concurrent=8)
+    for i in range(4):
+        supervisor.register_worker(f"w{i}", EchoAgent(), ["x"])
+    await supervisor.submit_tasks([
+        {"id": str(i), "type": "x", "input": str(i), "priority": i % 3} for i in range(50000)
+    ])
+
+    started = time.monotonic()
+    await supervisor.orchestrate()
+
+    assert len(supervisor.completed_tasks) == 50000
+    assert len(supervisor.task_queue) == 0
+    # Heap pops and condition wake-ups keep dispatch roughly linear; 100k
+    # tasks took about 7 s locally, so this leaves plenty of headroom
+    assert time.monotonic() - started < 20
@@ -0,0 +1,101 @@
+import asyncio
+import pytest
+from src.framework.core.tool_cache import ToolResultCache, path_dependencies
+from conftest import make_supervisor
+
+class Handler:
+    def __init__(self, delay=0.05, error=None):
+        self.delay = delay
+        self.error = error
+        self.calls = 0
+
+    async def __call__(self, tool_input):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return f"listing of {tool_input['path']} #{self.calls}"
+
+TOOL = {"name": "list_files", "cacheable": True, "depends_on": path_dependencies("path")}
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_calls_share_one_run(tmp_path):
+    cache = ToolResultCache()
+    handler = Handler()
+    args = {"path": str(tmp_path)}
+
+    results = await asyncio.gather(*(cache.call(TOOL, args, handler) for _ in range(5)))
+
+    assert handler.calls == 1
+    assert set(results) == {f"listing of {tmp_path} #1"}
+    assert cache.stats() == {"hits": 4, "misses": 1, "entries": 1}
+    assert await cache.call(TOOL, args, handler) == results[0]
+
+@pytest.mark.asyncio
+async def test_changed_dependency_misses(tmp_path):
+    cache = ToolResultCache()
+    handler = Handler(delay=0)
+    target = tmp_path / "file.txt"
+    target.write_text("a")
+    args = {"path": str(target)}
+
+    first = await cache.call(TOOL, args, handler)
+    target.write_text("longer")
+
+    assert await cache.call(TOOL, args, handler) != first
+    assert handler.calls == 2
+
+@pytest.mark.asyncio
+async def test_cancelled_owner_does_not_cancel_waiters(tmp_path):
+    cache = ToolResultCache()
+    handler = Handler()
+    args = {"path": str(tmp_path)}
+
+    owner = asyncio.ensure_future(cache.call(TOOL, args, handler))
+    await asyncio.sleep(0)
+    waiters = [asyncio.ensure_future(cache.call(TOOL, args, handler)) for _ in range(3)]
+    await asyncio.sleep(0.01)
+    owner.cancel()
+
+    results = await asyncio.gather(*waiters)
+
+    assert owner.cancelled()
+    # One waiter took over the run and the others shared it
+    assert handler.calls == 2
+    assert set(results) == {f"listing of {tmp_path} #2"}
+    assert not cache.in_flight
+    assert cache.stats()["entries"] == 1
+
+@pytest.mark.asyncio
+async def test_handler_errors_reach_every_waiter(tmp_path):
+    cache = ToolResultCache()
+    handler = Handler(error=PermissionError("denied"))
+    args = {"path": str(tmp_path)}
+
+    results = await asyncio.gather(*(cache.call(TOOL, args, handler) for _ in range(3)), return_exceptions=True)
+
+    assert handler.calls == 1
+    assert all(isinstance(r, PermissionError) for r in results)
+    assert cache.stats()["entries"] == 0
+
+class LeakingAgent:
+    """Raises a CancelledError that nobody asked for, like a cancelled shared future."""
+
+    def __init__(self):
+        self.config = {}
+
+    async def run(self, prompt, first_response=None):
+        await asyncio.sleep(0)
+        raise asyncio.CancelledError()
+
+@pytest.mark.asyncio
+async def test_leaked_cancellation_fails_the_task():
+    supervisor = make_supervisor()
+    supervisor.register_worker("w", LeakingAgent(), ["x"])
+
+    results = await asyncio.wait_for(supervisor.run_tasks([{"id": "t", "type": "x", "input": "go"}]), timeout=5)
+
+    assert results["t"]["status"] == "failed"
+    assert results["t"]["error"] == "Task run was cancelled"
+    assert supervisor.get_task_status("t")["status"] == "failed"
+    assert not supervisor.active_tasks
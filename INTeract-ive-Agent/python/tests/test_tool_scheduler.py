@@ -0,0 +1,109 @@
+import asyncio
+from types import SimpleNamespace
+import pytest
+from src.framework.core.agent import Agent
+from src.framework.core.tool_scheduler import ToolScheduler
+from conftest import AGENT_CONFIG
+
+class Recorder:
+    """Tool handlers that log when they start and finish."""
+
+    def __init__(self):
+        self.log = []
+        self.live = 0
+        self.peak = 0
+
+    def call(self, name, delay=0.02):
+        async def run():
+            self.log.append(f"start {name}")
+            self.live += 1
+            self.peak = max(self.peak, self.live)
+            await asyncio.sleep(delay)
+            self.live -= 1
+            self.log.append(f"end {name}")
+            return name
+        return run
+
+@pytest.mark.asyncio
+async def test_reads_run_concurrently():
+    recorder = Recorder()
+    scheduler = ToolScheduler(5)
+    for i in range(5):
+        scheduler.submit(recorder.call(f"read{i}", delay=0.05))
+
+    assert await scheduler.results() == [f"read{i}" for i in range(5)]
+    assert recorder.peak == 5
+
+@pytest.mark.asyncio
+async def test_concurrency_is_capped():
+    recorder = Recorder()
+    scheduler = ToolScheduler(2)
+    for i in range(6):
+        scheduler.submit(recorder.call(f"read{i}"))
+
+    await scheduler.results()
+    assert recorder.peak == 2
+
+@pytest.mark.asyncio
+async def test_serial_call_waits_for_earlier_and_blocks_later():
+    recorder = Recorder()
+    scheduler = ToolScheduler(5)
+    scheduler.submit(recorder.call("read1", delay=0.05))
+    scheduler.submit(recorder.call("read2"))
+    scheduler.submit(recorder.call("write", delay=0.05), serial=True)
+    scheduler.submit(recorder.call("read3"))
+
+    # Later calls finish first, yet results follow submission order
+    assert await scheduler.results() == ["read1", "read2", "write", "read3"]
+    log = recorder.log
+    assert log.index("start write") > max(log.index("end read1"), log.index("end read2"))
+    assert log.index("start read3") > log.index("end write")
+
+@pytest.mark.asyncio
+async def test_consecutive_serial_calls_never_overlap():
+    recorder = Recorder()
+    scheduler = ToolScheduler(5)
+    for i in range(3):
+        scheduler.submit(recorder.call(f"write{i}"), serial=True)
+
+    await scheduler.results()
+    assert recorder.peak == 1
+    assert recorder.log == [f"{edge} write{i}" for i in range(3) for edge in ("start", "end")]
+
+@pytest.mark.asyncio
+async def test_failed_call_does_not_release_the_barrier_early():
+    recorder = Recorder()
+    scheduler = ToolScheduler(5)
+
+    async def broken():
+        await asyncio.sleep(0.02)
+        raise RuntimeError("boom")
+
+    scheduler.submit(broken)
+    scheduler.submit(recorder.call("write"), serial=True)
+
+    with pytest.raises(RuntimeError):
+        await scheduler.results()
+    await asyncio.sleep(0.05)
+    assert recorder.log == ["start write", "end write"]
+
+@pytest.mark.asyncio
+async def test_agent_turn_keeps_tool_result_order():
+    recorder = Recorder()
+
+    def tool(name, delay, serial=False):
+        async def handler(args):
+            return await recorder.call(name, delay)()
+        return {"name": name, "description": name, "input_schema": {"type": "object"},
+                "handler": handler, "serial": serial}
+
+    agent = Agent({**AGENT_CONFIG, "tools": [tool("slow_read", 0.05), tool("fast_read", 0.0), tool("write", 0.01, True)]})
+    blocks = [SimpleNamespace(id=f"t{i}", name=name, input={})
+              for i, name in enumerate(["slow_read", "fast_read", "write", "missing"])]
+
+    results = await agent._execute_tools(blocks, [])
+
+    assert [r["tool_use_id"] for r in results] == ["t0", "t1", "t2", "t3"]
+    assert [r["content"] for r in results[:3]] == ["slow_read", "fast_read", "write"]
+    assert results[3]["is_error"]
+    assert recorder.log.index("end fast_read") < recorder.log.index("end slow_read") < recorder.log.index("start write")
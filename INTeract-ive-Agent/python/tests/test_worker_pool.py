@@ -0,0 +1,80 @@
+import asyncio
+import pytest
+from src.framework.core.agent import Agent
+from src.framework.orchestration.worker_pool import WorkerPool
+from conftest import AGENT_CONFIG, make_supervisor
+
+@pytest.fixture
+def runs(monkeypatch):
+    """Replace Agent.run with a short sleep that records concurrency."""
+    state = {"live": 0, "peak": 0, "dirty": 0}
+
+    async def run(self, prompt, first_response=None):
+        if self.conversation_history:
+            state["dirty"] += 1
+        self.conversation_history.append({"role": "user", "content": prompt})
+        state["live"] += 1
+        state["peak"] = max(state["peak"], state["live"])
+        await asyncio.sleep(0.02)
+        state["live"] -= 1
+        return {"response": prompt}
+
+    monkeypatch.setattr(Agent, "run", run)
+    return state
+
+def make_pool_supervisor(pool_config):
+    supervisor = make_supervisor(max_concurrent=32)
+    supervisor.register_pool("pool", AGENT_CONFIG, ["x"], pool_config)
+    return supervisor
+
+def test_sessions_are_isolated_copies():
+    pool = WorkerPool("p", AGENT_CONFIG, ["x"], {"max_size": 2})
+    _, first = pool.new_session()
+    _, second = pool.new_session()
+
+    assert first is not second
+    assert first.config["tools"] is not second.config["tools"]
+    assert not pool.can_grow()
+
+def test_surplus_idle_respects_min_size_and_timeout():
+    pool = WorkerPool("p", AGENT_CONFIG, ["x"], {"min_size": 1, "max_size": 4, "idle_timeout": 10.0})
+    ids = [pool.new_session()[0] for _ in range(3)]
+    for worker_id in ids:
+        pool.idle_since[worker_id] = 100.0
+
+    assert pool.surplus_idle(ids, now=105.0) == []
+    assert pool.surplus_idle(ids, now=110.0) == ids[:2]
+
+@pytest.mark.asyncio
+async def test_pool_grows_to_max_size(runs):
+    supervisor = make_pool_supervisor({"min_size": 1, "max_size": 6, "idle_timeout": 60.0})
+    assert len(supervisor.pools["pool"].worker_ids) == 1
+
+    results = await supervisor.run_tasks([{"id": str(i), "type": "x", "input": str(i)} for i in range(30)])
+
+    assert all(t["status"] == "completed" for t in results.values())
+    assert len(supervisor.pools["pool"].worker_ids) == 6
+    assert runs["peak"] == 6
+
+@pytest.mark.asyncio
+async def test_pool_shrinks_back_when_idle(runs):
+    supervisor = make_pool_supervisor({"min_size": 2, "max_size": 5, "idle_timeout": 0.05})
+    await supervisor.run_tasks([{"id": str(i), "type": "x", "input": str(i)} for i in range(20)])
+    assert len(supervisor.pools["pool"].worker_ids) == 5
+
+    await asyncio.sleep(0.1)
+    await supervisor.orchestrate()
+
+    pool = supervisor.pools["pool"]
+    assert len(pool.worker_ids) == 2
+    assert sorted(supervisor.workers) == sorted(pool.worker_ids)
+
+@pytest.mark.asyncio
+async def test_pooled_sessions_reset_between_tasks(runs):
+    supervisor = make_pool_supervisor({"min_size": 1, "max_size": 1})
+
+    await supervisor.run_tasks([{"id": str(i), "type": "x", "input": str(i)} for i in range(5)])
+
+    assert runs["dirty"] == 0
+    worker = next(iter(supervisor.workers.values()))
+    assert worker["agent"].conversation_history == []
@@ -113,6 +113,8 @@ def create_refactoring_agent_options(
             "mcp__refactor-tools__suggest_refactoring",
             # MCP tools - Preview
             "mcp__preview-tools__generate_diff_preview",
+            "mcp__preview-tools__generate_batch_diff_preview",
+            "mcp__preview-tools__apply_patch_set",
             "mcp__preview-tools__create_summary_report",
         ],
         mcp_servers={
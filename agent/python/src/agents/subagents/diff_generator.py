@@ -25,6 +25,16 @@ For each refactoring:
 3. Generate a diff preview using the preview tools
 4. Wait for approval before applying
 
+When a refactoring touches more than one file, use generate_batch_diff_preview
+with search/replace or line-range edits for every file in a single call instead
+of previewing files one by one. It reads the files from disk itself, so there
+is no need to send full file contents.
+
+Once multi-file changes are approved, apply them with apply_patch_set using the
+same edits plus the expected_sha256 of each file from the preview. It writes
+every file atomically or none at all, so prefer it over repeated Edit/Write
+calls.
+
 Quality checks:
 - Verify imports are updated if needed
 - Check for broken references
@@ -32,6 +42,13 @@ Quality checks:
 - Maintain type safety (for TypeScript/Python type hints)
 
 Use the Edit tool for precise modifications. Always generate a preview first before making changes.""",
-    tools=["Read", "Edit", "Write", "mcp__preview-tools__generate_diff_preview"],
+    tools=[
+        "Read",
+        "Edit",
+        "Write",
+        "mcp__preview-tools__generate_diff_preview",
+        "mcp__preview-tools__generate_batch_diff_preview",
+        "mcp__preview-tools__apply_patch_set",
+    ],
     model="sonnet",
 )
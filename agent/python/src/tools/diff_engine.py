@@ -0,0 +1,278 @@
+"""Line diff engine (Myers O(ND) with patience anchoring) and unified diff output."""
+
+import io
+from bisect import bisect_left
+from collections import Counter
+from typing import Any
+
+# Ranges with more lines than this (both sides combined) are first split on
+# patience anchors: lines that occur exactly once on each side.
+PATIENCE_THRESHOLD = 2000
+
+# Give up on a range once its edit distance exceeds this many steps and
+# report it as a single replacement; unrelated blocks gain nothing from an
+# exact alignment and would otherwise cost O((N + M) * D).
+MAX_EDIT_COST = 1024
+
+Opcode = tuple[str, int, int, int, int]
+
+
+def _intern_lines(a: list[str], b: list[str]) -> tuple[list[int], list[int]]:
+    """Map each distinct line to an integer so comparisons are cheap."""
+    ids: dict[str, int] = {}
+    a_ids = [ids.setdefault(line, len(ids)) for line in a]
+    b_ids = [ids.setdefault(line, len(ids)) for line in b]
+    return a_ids, b_ids
+
+
+def _patience_anchors(
+    a: list[int], alo: int, ahi: int, b: list[int], blo: int, bhi: int
+) -> list[tuple[int, int]]:
+    """Return the longest increasing run of lines unique to both ranges."""
+    a_counts = Counter(a[alo:ahi])
+    b_counts = Counter(b[blo:bhi])
+    b_index = {b[j]: j for j in range(blo, bhi) if b_counts[b[j]] == 1}
+
+    candidates = [
+        (i, b_index[a[i]])
+        for i in range(alo, ahi)
+        if a_counts[a[i]] == 1 and a[i] in b_index
+    ]
+    if not candidates:
+        return []
+
+    # Patience sorting on the b positions gives the LIS in O(k log k).
+    tails: list[int] = []
+    tail_idx: list[int] = []
+    back: list[int] = [-1] * len(candidates)
+    for idx, (_, j) in enumerate(candidates):
+        pos = bisect_left(tails, j)
+        if pos > 0:
+            back[idx] = tail_idx[pos - 1]
+        if pos == len(tails):
+            tails.append(j)
+            tail_idx.append(idx)
+        else:
+            tails[pos] = j
+            tail_idx[pos] = idx
+
+    anchors: list[tuple[int, int]] = []
+    idx = tail_idx[-1]
+    while idx != -1:
+        anchors.append(candidates[idx])
+        idx = back[idx]
+    anchors.reverse()
+    return anchors
+
+
+def _bisect(
+    a: list[int], alo: int, ahi: int, b: list[int], blo: int, bhi: int
+) -> tuple[int, int] | None:
+    """Find the middle snake of a Myers diff and return its split point."""
+    n = ahi - alo
+    m = bhi - blo
+    max_d = (n + m + 1) // 2
+    v_offset = max_d
+    v_length = 2 * max_d + 2
+    v1 = [-1] * v_length
+    v1[v_offset + 1] = 0
+    v2 = v1[:]
+    delta = n - m
+    front = delta % 2 != 0
+    k1start = k1end = k2start = k2end = 0
+
+    for d in range(min(max_d, MAX_EDIT_COST)):
+        for k1 in range(-d + k1start, d + 1 - k1end, 2):
+            k1_offset = v_offset + k1
+            if k1 == -d or (k1 != d and v1[k1_offset - 1] < v1[k1_offset + 1]):
+                x1 = v1[k1_offset + 1]
+            else:
+                x1 = v1[k1_offset - 1] + 1
+            y1 = x1 - k1
+            while x1 < n and y1 < m and a[alo + x1] == b[blo + y1]:
+                x1 += 1
+                y1 += 1
+            v1[k1_offset] = x1
+            if x1 > n:
+                k1end += 2
+            elif y1 > m:
+                k1start += 2
+            elif front:
+                k2_offset = v_offset + delta - k1
+                if 0 <= k2_offset < v_length and v2[k2_offset] != -1:
+                    if x1 >= n - v2[k2_offset]:
+                        return alo + x1, blo + y1
+
+        for k2 in range(-d + k2start, d + 1 - k2end, 2):
+            k2_offset = v_offset + k2
+            if k2 == -d or (k2 != d and v2[k2_offset - 1] < v2[k2_offset + 1]):
+                x2 = v2[k2_offset + 1]
+            else:
+                x2 = v2[k2_offset - 1] + 1
+            y2 = x2 - k2
+            while x2 < n and y2 < m and a[ahi - x2 - 1] == b[bhi - y2 - 1]:
+                x2 += 1
+                y2 += 1
+            v2[k2_offset] = x2
+            if x2 > n:
+                k2end += 2
+            elif y2 > m:
+                k2start += 2
+            elif not front:
+                k1_offset = v_offset + delta - k2
+                if 0 <= k1_offset < v_length and v1[k1_offset] != -1:
+                    x1 = v1[k1_offset]
+                    y1 = v_offset + x1 - k1_offset
+                    if x1 >= n - x2:
+                        return alo + x1, blo + y1
+
+    return None
+
+
+def _matching_pairs(a: list[int], b: list[int]) -> list[tuple[int, int]]:
+    """Return the (i, j) index pairs of lines kept unchanged between a and b."""
+    pairs: list[tuple[int, int]] = []
+    stack = [(0, len(a), 0, len(b))]
+
+    while stack:
+        alo, ahi, blo, bhi = stack.pop()
+
+        # Trim the common prefix and suffix; most edits are local.
+        while alo < ahi and blo < bhi and a[alo] == b[blo]:
+            pairs.append((alo, blo))
+            alo += 1
+            blo += 1
+        while alo < ahi and blo < bhi and a[ahi - 1] == b[bhi - 1]:
+            ahi -= 1
+            bhi -= 1
+            pairs.append((ahi, bhi))
+        if alo == ahi or blo == bhi:
+            continue
+
+        if (ahi - alo) + (bhi - blo) > PATIENCE_THRESHOLD:
+            anchors = _patience_anchors(a, alo, ahi, b, blo, bhi)
+            if anchors:
+                prev_i, prev_j = alo, blo
+                for i, j in anchors:
+                    pairs.append((i, j))
+                    stack.append((prev_i, i, prev_j, j))
+                    prev_i, prev_j = i + 1, j + 1
+                stack.append((prev_i, ahi, prev_j, bhi))
+                continue
+
+        split = _bisect(a, alo, ahi, b, blo, bhi)
+        if split is None:
+            continue
+        x, y = split
+        stack.append((x, ahi, y, bhi))
+        stack.append((alo, x, blo, y))
+
+    pairs.sort()
+    return pairs
+
+
+def diff_lines(a: list[str], b: list[str]) -> list[Opcode]:
+    """Return difflib-style opcodes that turn ``a`` into ``b``."""
+    a_ids, b_ids = _intern_lines(a, b)
+    opcodes: list[Opcode] = []
+    i = j = 0
+
+    for mi, mj in _matching_pairs(a_ids, b_ids) + [(len(a), len(b))]:
+        if i < mi and j < mj:
+            opcodes.append(("replace", i, mi, j, mj))
+        elif i < mi:
+            opcodes.append(("delete", i, mi, j, mj))
+        elif j < mj:
+            opcodes.append(("insert", i, mi, j, mj))
+        if mi < len(a):
+            if opcodes and opcodes[-1][0] == "equal":
+                _, ei1, _, ej1, _ = opcodes[-1]
+                opcodes[-1] = ("equal", ei1, mi + 1, ej1, mj + 1)
+            else:
+                opcodes.append(("equal", mi, mi + 1, mj, mj + 1))
+        i, j = mi + 1, mj + 1
+
+    return opcodes
+
+
+def group_opcodes(opcodes: list[Opcode], context_lines: int = 3) -> list[list[Opcode]]:
+    """Split opcodes into hunks with at most ``context_lines`` of context."""
+    if not opcodes or all(op[0] == "equal" for op in opcodes):
+        return []
+
+    codes = list(opcodes)
+    n = max(context_lines, 0)
+    if codes[0][0] == "equal":
+        _, i1, i2, j1, j2 = codes[0]
+        codes[0] = ("equal", max(i1, i2 - n), i2, max(j1, j2 - n), j2)
+    if codes[-1][0] == "equal":
+        _, i1, i2, j1, j2 = codes[-1]
+        codes[-1] = ("equal", i1, min(i2, i1 + n), j1, min(j2, j1 + n))
+
+    groups: list[list[Opcode]] = []
+    group: list[Opcode] = []
+    for tag, i1, i2, j1, j2 in codes:
+        # A long equal run closes the current hunk and opens the next one.
+        if tag == "equal" and i2 - i1 > 2 * n:
+            group.append((tag, i1, min(i2, i1 + n), j1, min(j2, j1 + n)))
+            groups.append(group)
+            group = []
+            i1, j1 = max(i1, i2 - n), max(j1, j2 - n)
+        group.append((tag, i1, i2, j1, j2))
+    if group and not (len(group) == 1 and group[0][0] == "equal"):
+        groups.append(group)
+    return groups
+
+
+def _format_range(start: int, stop: int) -> str:
+    """Format a hunk range the way ``diff -u`` does."""
+    beginning = start + 1
+    length = stop - start
+    if length == 1:
+        return str(beginning)
+    if not length:
+        beginning -= 1
+    return f"{beginning},{length}"
+
+
+def unified_diff(
+    original_content: str,
+    new_content: str,
+    file_path: str,
+    context_lines: int = 3,
+) -> dict[str, Any]:
+    """Build a unified diff between two versions of a file."""
+    a = original_content.split("\n")
+    b = new_content.split("\n")
+    hunks = group_opcodes(diff_lines(a, b), context_lines)
+
+    out = io.StringIO()
+    additions = deletions = 0
+    if hunks:
+        out.write(f"--- a/{file_path}\n+++ b/{file_path}\n")
+    for hunk in hunks:
+        first, last = hunk[0], hunk[-1]
+        out.write(
+            f"@@ -{_format_range(first[1], last[2])} "
+            f"+{_format_range(first[3], last[4])} @@\n"
+        )
+        for tag, i1, i2, j1, j2 in hunk:
+            if tag == "equal":
+                for line in a[i1:i2]:
+                    out.write(f" {line}\n")
+                continue
+            if tag in ("replace", "delete"):
+                deletions += i2 - i1
+                for line in a[i1:i2]:
+                    out.write(f"-{line}\n")
+            if tag in ("replace", "insert"):
+                additions += j2 - j1
+                for line in b[j1:j2]:
+                    out.write(f"+{line}\n")
+
+    return {
+        "diff": out.getvalue(),
+        "additions": additions,
+        "deletions": deletions,
+        "hunks": len(hunks),
+    }
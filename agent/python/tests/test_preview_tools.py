@@ -0,0 +1,282 @@
+import pytest
+import json
+from src.tools.diff_engine import diff_lines, unified_diff
+from src.tools.preview_tools import (
+    _apply_edits,
+    _apply_patch_set_impl,
+    _create_summary_report_impl,
+    _generate_batch_diff_preview_impl,
+    _generate_diff_preview_impl,
+)
+
+
+def _apply_opcodes(a, b, opcodes):
+    out = []
+    for tag, i1, i2, j1, j2 in opcodes:
+        if tag == "equal":
+            assert a[i1:i2] == b[j1:j2]
+            out.extend(a[i1:i2])
+        else:
+            out.extend(b[j1:j2])
+    return out
+
+
+def test_diff_lines_reconstructs_target():
+    a = ["a", "b", "c", "a", "b", "b", "a"]
+    b = ["c", "b", "a", "b", "a", "c"]
+    opcodes = diff_lines(a, b)
+
+    assert _apply_opcodes(a, b, opcodes) == b
+    # Myers finds the minimal edit script: LCS of length 4
+    assert sum(i2 - i1 for tag, i1, i2, _, _ in opcodes if tag == "equal") == 4
+
+
+def test_insert_at_top_is_a_single_addition():
+    original = "\n".join(f"line {i}" for i in range(100))
+    new = "header\n" + original
+    result = unified_diff(original, new, "mod.py", context_lines=3)
+
+    assert result["additions"] == 1
+    assert result["deletions"] == 0
+    assert result["hunks"] == 1
+    assert "@@ -1,3 +1,4 @@\n+header\n line 0\n" in result["diff"]
+
+
+def test_context_lines_split_hunks():
+    original = [f"line {i}" for i in range(50)]
+    new = list(original)
+    new[5] = "changed 5"
+    new[40] = "changed 40"
+    text_a, text_b = "\n".join(original), "\n".join(new)
+
+    assert unified_diff(text_a, text_b, "f.py", context_lines=3)["hunks"] == 2
+    assert unified_diff(text_a, text_b, "f.py", context_lines=20)["hunks"] == 1
+
+    diff = unified_diff(text_a, text_b, "f.py", context_lines=0)["diff"]
+    assert diff.count("\n line") == 0
+
+
+def test_large_files_use_patience_anchors():
+    original = [f"def func_{i}(): return {i}" for i in range(5000)]
+    new = original[:2500] + ["def inserted(): pass"] + original[2500:]
+    result = unified_diff("\n".join(original), "\n".join(new), "big.py")
+
+    assert result["additions"] == 1
+    assert result["deletions"] == 0
+
+
+def test_identical_content_has_no_diff():
+    result = unified_diff("a\nb\n", "a\nb\n", "same.py")
+    assert result["diff"] == ""
+    assert result["hunks"] == 0
+
+
+@pytest.mark.asyncio
+async def test_generate_diff_preview():
+    result = await _generate_diff_preview_impl("x.py", "a\nb\nc", "a\nB\nc", 1)
+    data = json.loads(result["content"][0]["text"])
+
+    assert data["file"] == "x.py"
+    assert data["additions"] == 1
+    assert data["deletions"] == 1
+    assert data["diff"] == "--- a/x.py\n+++ b/x.py\n@@ -1,3 +1,3 @@\n a\n-b\n+B\n c\n"
+
+
+def test_apply_edits_line_ranges_use_disk_numbering():
+    content = "one\ntwo\nthree\nfour"
+    edits = [
+        {"start_line": 1, "end_line": 1, "content": "ONE"},
+        {"start_line": 3, "end_line": 4, "content": "THREE+FOUR"},
+        {"search": "two", "replace": "TWO"},
+    ]
+    assert _apply_edits(content, edits) == "ONE\nTWO\nTHREE+FOUR"
+
+
+def test_apply_edits_rejects_ambiguous_search():
+    with pytest.raises(ValueError):
+        _apply_edits("x = 1\nx = 1\n", [{"search": "x = 1", "replace": "x = 2"}])
+    assert _apply_edits("x = 1\nx = 1\n", [
+        {"search": "x = 1", "replace": "x = 2", "replace_all": True}
+    ]) == "x = 2\nx = 2\n"
+
+
+@pytest.mark.asyncio
+async def test_batch_diff_preview(tmp_path):
+    a = tmp_path / "a.py"
+    b = tmp_path / "b.py"
+    a.write_text("def old():\n    return 1\n")
+    b.write_text("VALUE = 1\n")
+    patch_path = tmp_path / "out.patch"
+
+    result = await _generate_batch_diff_preview_impl([
+        {"file_path": str(a), "edits": [{"search": "old", "replace": "new"}]},
+        {"file_path": str(b), "edits": [{"start_line": 1, "end_line": 1, "content": "VALUE = 2"}]},
+        {"file_path": str(tmp_path / "missing.py"), "edits": []},
+    ], output_path=str(patch_path))
+    data = json.loads(result["content"][0]["text"])
+
+    assert data["files_changed"] == 2
+    assert data["errors"] == 1
+    assert data["additions"] == 2 and data["deletions"] == 2
+    assert data["patch"].index("a.py") < data["patch"].index("b.py")
+    assert patch_path.read_text() == data["patch"]
+    assert len(data["files"][0]["sha256"]) == 64
+    # Previewing never touches the files on disk
+    assert a.read_text() == "def old():\n    return 1\n"
+
+
+@pytest.mark.asyncio
+async def test_batch_diff_preview_caps_patch(tmp_path):
+    files = []
+    for i in range(5):
+        path = tmp_path / f"f{i}.py"
+        path.write_text("x = 0\n" * 50)
+        files.append({"file_path": str(path), "edits": [{"start_line": 1, "end_line": 50, "content": "y = 1"}]})
+
+    result = await _generate_batch_diff_preview_impl(files, max_patch_chars=1000)
+    data = json.loads(result["content"][0]["text"])
+
+    assert data["truncated"]
+    assert len(data["patch"]) <= 1000
+    assert len(data["omitted_files"]) >= 1
+    assert data["files_changed"] == 5
+
+
+@pytest.fixture
+def patch_files(tmp_path):
+    paths = []
+    for i in range(3):
+        path = tmp_path / f"mod{i}.py"
+        path.write_text(f"def handler_{i}():\n    return old_name()\n")
+        paths.append(path)
+    return paths
+
+
+@pytest.mark.asyncio
+async def test_apply_patch_set(patch_files):
+    preview = await _generate_batch_diff_preview_impl([
+        {"file_path": str(p), "edits": [{"search": "old_name", "replace": "new_name"}]}
+        for p in patch_files
+    ])
+    hashes = [f["sha256"] for f in json.loads(preview["content"][0]["text"])["files"]]
+
+    result = await _apply_patch_set_impl([
+        {"file_path": str(p), "expected_sha256": h, "edits": [{"search": "old_name", "replace": "new_name"}]}
+        for p, h in zip(patch_files, hashes)
+    ])
+    data = json.loads(result["content"][0]["text"])
+
+    assert data["applied"]
+    assert len(data["files"]) == 3
+    assert all("new_name()" in p.read_text() for p in patch_files)
+    assert sorted(x.name for x in patch_files[0].parent.iterdir()) == ["mod0.py", "mod1.py", "mod2.py"]
+
+
+@pytest.mark.asyncio
+async def test_apply_patch_set_hash_mismatch_writes_nothing(patch_files):
+    edits = [{"search": "old_name", "replace": "new_name"}]
+    result = await _apply_patch_set_impl([
+        {"file_path": str(patch_files[0]), "edits": edits},
+        {"file_path": str(patch_files[1]), "expected_sha256": "0" * 64, "edits": edits},
+    ])
+    data = json.loads(result["content"][0]["text"])
+
+    assert result["is_error"]
+    assert not data["applied"]
+    assert "sha256 mismatch" in data["errors"][0]["error"]
+    assert all("old_name()" in p.read_text() for p in patch_files)
+
+
+@pytest.mark.asyncio
+async def test_apply_patch_set_rolls_back_on_commit_failure(patch_files, monkeypatch):
+    import os
+    real_replace = os.replace
+    calls = {"n": 0}
+
+    def flaky_replace(src, dst):
+        calls["n"] += 1
+        if calls["n"] == 2:
+            raise OSError("disk full")
+        return real_replace(src, dst)
+
+    monkeypatch.setattr(os, "replace", flaky_replace)
+    result = await _apply_patch_set_impl([
+        {"file_path": str(p), "edits": [{"search": "old_name", "replace": "new_name"}]}
+        for p in patch_files
+    ])
+    data = json.loads(result["content"][0]["text"])
+
+    assert not data["applied"]
+    assert "rolled back" in data["errors"][0]["error"]
+    assert all("old_name()" in p.read_text() for p in patch_files)
+    assert len(list(patch_files[0].parent.iterdir())) == 3
+
+
+@pytest.mark.asyncio
+async def test_apply_patch_set_dry_run(patch_files):
+    result = await _apply_patch_set_impl(
+        [{"file_path": str(patch_files[0]), "edits": [{"search": "old_name", "replace": "new_name"}]}],
+        dry_run=True,
+    )
+    data = json.loads(result["content"][0]["text"])
+
+    assert not data["applied"]
+    assert data["files"][0]["additions"] == 1
+    assert "old_name()" in patch_files[0].read_text()
+
+
+@pytest.mark.asyncio
+async def test_summary_report_from_json():
+    analysis = json.dumps({
+        "files_analyzed": 3,
+        "complexity": [{"file": "a.py", "score": 25}],
+        "suggestions": [{"type": "dead-code", "file": "b.py", "description": "unused"}],
+    })
+    result = await _create_summary_report_impl("/repo", analysis)
+    data = json.loads(result["content"][0]["text"])
+
+    assert data["saved_to"] == "Not saved"
+    assert "- a.py: Complexity score 25" in data["report"]
+    assert "No significant duplication found" in data["report"]
+    assert "- **dead-code** in b.py: unused" in data["report"]
+
+
+@pytest.mark.asyncio
+async def test_summary_report_streams_ndjson_findings(tmp_path):
+    findings = tmp_path / "findings.ndjson"
+    with findings.open("w") as f:
+        f.write(json.dumps({"category": "summary", "files_analyzed": 2000}) + "\n")
+        for i in range(2000):
+            f.write(json.dumps({
+                "category": "suggestions",
+                "type": "naming-consistency",
+                "file": f"mod{i}.py",
+                "description": "rename",
+                "severity": "critical" if i % 100 == 0 else "low",
+            }) + "\n")
+        f.write("not json\n")
+        f.write(json.dumps({"category": "duplicates", "count": 4, "description": "copy"}) + "\n")
+    output = tmp_path / "report.md"
+
+    result = await _create_summary_report_impl("/repo", findings_path=str(findings), output_path=str(output))
+    data = json.loads(result["content"][0]["text"])
+
+    assert "report" not in data
+    assert data["saved_to"] == str(output)
+    assert data["files_analyzed"] == 2000
+    assert data["total_suggestions"] == 2000
+    assert data["critical_issues"] == 20
+    assert data["findings"] == {"complexity": 0, "duplicates": 1, "suggestions": 2000}
+    assert data["skipped_lines"] == 1
+
+    report = output.read_text()
+    assert report.count("**naming-consistency**") == 2000
+    assert "- 4 occurrences: copy" in report
+    assert report.index("### Code Duplication") < report.index("### Refactoring Suggestions")
+    assert data["report_bytes"] == output.stat().st_size
+
+
+@pytest.mark.asyncio
+async def test_summary_report_requires_input():
+    result = await _create_summary_report_impl("/repo")
+    assert result["is_error"]